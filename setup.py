@@ -25,6 +25,11 @@ INSTALL_REQUIRES = [
     "structlog",
 ]
 
+EXTRAS_REQUIRE = {
+    # Transparent decompression of zstd compressed input
+    "zstd": ["zstandard"],
+}
+
 setup(
     name="greynoise",
     version="1.1.0",
@@ -37,6 +42,7 @@ setup(
     packages=find_packages(where="src"),
     package_data={"greynoise.cli": ["templates/*.j2"]},
     install_requires=INSTALL_REQUIRES,
+    extras_require=EXTRAS_REQUIRE,
     long_description=read("README.rst") + "\n\n" + read("CHANGELOG.rst"),
     python_requires=">=3.0, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, !=3.4.*",
     classifiers=[
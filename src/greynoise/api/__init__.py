@@ -1,18 +1,29 @@
 """GreyNoise API client."""
 
+import collections
 import re
-from collections import OrderedDict
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import cachetools
-import more_itertools
 import requests
 import structlog
 
 from greynoise.__version__ import __version__
 from greynoise.api.analyzer import Analyzer
+from greynoise.api.enricher import Enricher
+from greynoise.api.estimator import Estimator
 from greynoise.api.filter import Filter
+from greynoise.api.table import QuickResultTable
 from greynoise.exceptions import RateLimitError, RequestFailure
-from greynoise.util import configure_logging, load_config, validate_ip
+from greynoise.util import (
+    configure_logging,
+    is_routable_ip,
+    load_config,
+    normalize_query,
+    validate_ip,
+)
 
 if not structlog.is_configured():
     configure_logging()
@@ -35,6 +46,10 @@ class GreyNoise(object):
     :type timeout: int
     :param proxy: Add URL for proxy to redirect lookups
     :type proxy: str
+    :param chunk_size_controller:
+        Controller that tunes the number of IP addresses in every quick request
+        from recent requests. Defaults to ``IP_QUICK_CHECK_CHUNK_SIZE``.
+    :type chunk_size_controller: greynoise.api.chunker.ChunkSizeController | None
 
     """
 
@@ -85,6 +100,27 @@ class GreyNoise(object):
             octet=r"(?:(?:25[0-5])|(?:2[0-4]\d)|(?:1?\d?\d))"
         )
     )
+    IPV4_BYTES_REGEX = re.compile(IPV4_REGEX.pattern.encode("ascii"))
+
+    # Only full or compressed (with ::) forms are matched, so that timestamps
+    # and MAC addresses are discarded without having to validate them. Every
+    # address has two colons in its first ten characters, which is checked first
+    # to discard most positions in the text quickly.
+    IPV6_REGEX = re.compile(
+        r"(?<![0-9A-Fa-f:])(?=[0-9A-Fa-f]{{0,4}}:[0-9A-Fa-f]{{0,4}}:)(?:"
+        r"(?:{h}:){{6}}{ipv4}"
+        r"|(?:{h}(?::{h}){{0,5}})?::(?:{h}:){{0,5}}{ipv4}"
+        r"|(?:{h}:){{7}}{h}"
+        r"|(?:{h}(?::{h}){{0,6}})?::(?:{h}(?::{h}){{0,6}})?"
+        r")(?![0-9A-Fa-f:])".format(h=r"[0-9A-Fa-f]{1,4}", ipv4=IPV4_REGEX.pattern)
+    )
+    IPV6_BYTES_REGEX = re.compile(IPV6_REGEX.pattern.encode("ascii"))
+
+    # IPv6 goes first to match IPv4-mapped addresses as a whole
+    IP_REGEX = re.compile(
+        r"{}|{}".format(IPV6_REGEX.pattern, IPV4_REGEX.pattern)
+    )
+    IP_BYTES_REGEX = re.compile(IP_REGEX.pattern.encode("ascii"))
 
     def __init__(
         self,
@@ -97,6 +133,7 @@ class GreyNoise(object):
         cache_max_size=None,
         cache_ttl=None,
         offering=None,
+        chunk_size_controller=None,
     ):
         if any(
             configuration_value is None
@@ -121,6 +158,8 @@ class GreyNoise(object):
         self.integration_name = integration_name
         self.session = requests.Session()
         self.offering = offering
+        # Tunes the number of IP addresses in every quick request if set
+        self.chunk_size_controller = chunk_size_controller
 
         if cache_ttl is None or not isinstance(cache_ttl, int):
             cache_ttl = 3600
@@ -130,9 +169,12 @@ class GreyNoise(object):
             cache_max_size = 1000
         self.cache_max_size = cache_max_size
 
+        # Caches are shared by lookups made from multiple threads
+        self.cache_lock = threading.RLock()
         if use_cache:
             self.ip_quick_check_cache = initialize_cache(cache_max_size, cache_ttl)
             self.ip_context_cache = initialize_cache(cache_max_size, cache_ttl)
+            self.stats_cache = initialize_cache(cache_max_size, cache_ttl)
 
     def _request(self, endpoint, params=None, json=None, method="get"):
         """Handle the requesting of information from the API.
@@ -211,11 +253,60 @@ class GreyNoise(object):
 
         return body
 
-    def analyze(self, text):
+    def analyze(
+        self,
+        text,
+        input_format="text",
+        fields=None,
+        chunk_bytes=None,
+        chunk_ip_addresses=None,
+        ipv6=False,
+        batch_stats=False,
+        max_workers=1,
+        compact_ip_addresses=False,
+        checkpoint_path=None,
+        resume=False,
+        top_k=None,
+        approximate=False,
+        sample_rate=None,
+        stratify=False,
+    ):
         """Aggregate stats related to IP addresses from a given text.
 
         :param text: Text input
-        :type text: file-like | str
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :param input_format: Input format (text, jsonl, eve, csv or zeek).
+        :type input_format: str
+        :param fields: Fields or columns to extract IP addresses from.
+        :type fields: list(str) | None
+        :param chunk_bytes: Maximum size of the chunks of lines processed at once.
+        :type chunk_bytes: int | None
+        :param chunk_ip_addresses:
+            Maximum number of unique IP addresses in every chunk.
+        :type chunk_ip_addresses: int | None
+        :param ipv6: Whether to extract IPv6 addresses too.
+        :type ipv6: bool
+        :param batch_stats:
+            Whether to get stats for many IP addresses in every GNQL query.
+        :type batch_stats: bool
+        :param max_workers: Number of stats queries made concurrently.
+        :type max_workers: int
+        :param compact_ip_addresses:
+            Whether to keep track of unique IP addresses in a compact set.
+        :type compact_ip_addresses: bool
+        :param checkpoint_path: File where the analysis state is saved.
+        :type checkpoint_path: str | None
+        :param resume: Whether to continue from the saved analysis state.
+        :type resume: bool
+        :param top_k: Number of elements kept for every stats section.
+        :type top_k: int | None
+        :param approximate:
+            Whether to count elements in stats sections with sketches.
+        :type approximate: bool
+        :param sample_rate: Fraction of the unique IP addresses looked up.
+        :type sample_rate: float | None
+        :param stratify: Whether to sample every /16 network separately.
+        :type stratify: bool
         :return: Aggregated stats for all the IP addresses found.
         :rtype: dict
 
@@ -226,14 +317,211 @@ class GreyNoise(object):
             ]
             return response
         else:
-            analyzer = Analyzer(self)
+            analyzer = Analyzer(
+                self,
+                input_format=input_format,
+                fields=fields,
+                chunk_bytes=chunk_bytes,
+                chunk_ip_addresses=chunk_ip_addresses,
+                ipv6=ipv6,
+                batch_stats=batch_stats,
+                max_workers=max_workers,
+                compact_ip_addresses=compact_ip_addresses,
+                checkpoint_path=checkpoint_path,
+                resume=resume,
+                top_k=top_k,
+                approximate=approximate,
+                sample_rate=sample_rate,
+                stratify=stratify,
+            )
             return analyzer.analyze(text)
 
-    def filter(self, text, noise_only=False, riot_only=False):
+    def analyze_windows(
+        self,
+        text,
+        window_size,
+        window_slide=None,
+        window_unit="lines",
+        input_format="text",
+        fields=None,
+        ipv6=False,
+        batch_stats=False,
+        max_workers=1,
+        top_k=None,
+        approximate=False,
+        sample_rate=None,
+        stratify=False,
+    ):
+        """Aggregate stats related to IP addresses for every window of a text.
+
+        :param text: Text input (usually a stream that never ends).
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :param window_size: Window size in lines or seconds.
+        :type window_size: int | float
+        :param window_slide:
+            Number of lines or seconds between windows. Defaults to the window
+            size (tumbling windows).
+        :type window_slide: int | float | None
+        :param window_unit: Unit for the window size and slide (lines or seconds).
+        :type window_unit: str
+        :param input_format: Input format (text, jsonl, eve, csv or zeek).
+        :type input_format: str
+        :param fields: Fields or columns to extract IP addresses from.
+        :type fields: list(str) | None
+        :param ipv6: Whether to extract IPv6 addresses too.
+        :type ipv6: bool
+        :param batch_stats:
+            Whether to get stats for many IP addresses in every GNQL query.
+        :type batch_stats: bool
+        :param max_workers: Number of stats queries made concurrently.
+        :type max_workers: int
+        :param top_k: Number of elements kept for every stats section.
+        :type top_k: int | None
+        :param approximate:
+            Whether to count elements in stats sections with sketches.
+        :type approximate: bool
+        :param sample_rate: Fraction of the unique IP addresses looked up.
+        :type sample_rate: float | None
+        :param stratify: Whether to sample every /16 network separately.
+        :type stratify: bool
+        :return: Iterator with aggregated stats for every window once it's closed.
+        :rtype: iterable(dict)
+
+        """
+        if self.offering == "community":
+            response = [
+                {"message": "Quick Lookup not supported with Community offering"}
+            ]
+            return response
+        else:
+            analyzer = Analyzer(
+                self,
+                input_format=input_format,
+                fields=fields,
+                ipv6=ipv6,
+                batch_stats=batch_stats,
+                max_workers=max_workers,
+                top_k=top_k,
+                approximate=approximate,
+                sample_rate=sample_rate,
+                stratify=stratify,
+            )
+            return analyzer.analyze_windows(
+                text, window_size, window_slide=window_slide, window_unit=window_unit
+            )
+
+    def enrich(
+        self, text, input_format="jsonl", fields=None, context=False, max_workers=4
+    ):
+        """Annotate records with the GreyNoise classification of their IP addresses.
+
+        :param text: Text input
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :param input_format: Input format (jsonl or csv).
+        :type input_format: str
+        :param fields: Fields or columns that contain IP addresses.
+        :type fields: list(str) | None
+        :param context:
+            If set, also look up context for noise IP addresses
+            to annotate them with their classification.
+        :type context: bool
+        :param max_workers: Number of batches looked up concurrently.
+        :type max_workers: int
+        :return: Iterator that yields annotated records in the input order.
+        :rtype: iterable
+
+        """
+        if self.offering == "community":
+            response = [{"message": "Enrichment not supported with Community offering"}]
+            return response
+        else:
+            enricher = Enricher(
+                self,
+                input_format=input_format,
+                fields=fields,
+                context=context,
+                max_workers=max_workers,
+            )
+            return enricher.enrich(text)
+
+    def estimate(
+        self,
+        text,
+        command="analyze",
+        input_format="text",
+        fields=None,
+        chunk_bytes=None,
+        chunk_ip_addresses=None,
+        ipv6=False,
+        batch_stats=False,
+        max_workers=1,
+        request_latency=None,
+        requests_per_second=None,
+    ):
+        """Estimate the API cost of analyzing or filtering a text without lookups.
+
+        :param text: Text input
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :param command: Command whose cost is estimated (analyze or filter).
+        :type command: str
+        :param input_format: Input format (text, jsonl, eve, csv or zeek).
+        :type input_format: str
+        :param fields: Fields or columns to extract IP addresses from.
+        :type fields: list(str) | None
+        :param chunk_bytes: Maximum size of the chunks of lines processed at once.
+        :type chunk_bytes: int | None
+        :param chunk_ip_addresses:
+            Maximum number of unique IP addresses in every chunk.
+        :type chunk_ip_addresses: int | None
+        :param ipv6: Whether to extract IPv6 addresses too.
+        :type ipv6: bool
+        :param batch_stats:
+            Whether to get stats for many IP addresses in every GNQL query.
+        :type batch_stats: bool
+        :param max_workers: Number of stats queries made concurrently.
+        :type max_workers: int
+        :param request_latency: Expected seconds for every request.
+        :type request_latency: float | None
+        :param requests_per_second: Rate limit for all the requests (if any).
+        :type requests_per_second: float | None
+        :return:
+            Estimated number of unique IP addresses, requests for every endpoint
+            and projected wall time.
+        :rtype: dict
+
+        """
+        estimator = Estimator(
+            self,
+            command=command,
+            input_format=input_format,
+            fields=fields,
+            chunk_bytes=chunk_bytes,
+            chunk_ip_addresses=chunk_ip_addresses,
+            ipv6=ipv6,
+            batch_stats=batch_stats,
+            max_workers=max_workers,
+            request_latency=request_latency,
+            requests_per_second=requests_per_second,
+        )
+        return estimator.estimate(text)
+
+    def filter(
+        self,
+        text,
+        noise_only=False,
+        riot_only=False,
+        markup=None,
+        input_format="text",
+        fields=None,
+        chunk_bytes=None,
+        chunk_ip_addresses=None,
+        line_cache_size=0,
+        ipv6=False,
+    ):
         """Filter lines that contain IP addresses from a given text.
 
         :param text: Text input
-        :type text: file-like | str
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
         :param noise_only:
             If set, return only lines that contain IP addresses classified as noise,
             otherwise, return lines that contain IP addresses not classified as noise.
@@ -242,13 +530,41 @@ class GreyNoise(object):
             If set, return only lines that contain IP addresses in RIOT,
             otherwise, return lines that contain IP addresses not in RIOT.
         :type riot_only: bool
+        :param markup:
+            Templates used to surround IP addresses for each tag
+            (noise, not-noise and riot). Defaults to ``<tag>...</tag>`` markup.
+            If empty, lines are not modified.
+        :type markup: dict(str, str)
+        :param input_format: Input format (text, jsonl, eve, csv or zeek).
+        :type input_format: str
+        :param fields: Fields or columns to extract IP addresses from.
+        :type fields: list(str) | None
+        :param chunk_bytes: Maximum size of the chunks of lines processed at once.
+        :type chunk_bytes: int | None
+        :param chunk_ip_addresses:
+            Maximum number of unique IP addresses in every chunk.
+        :type chunk_ip_addresses: int | None
+        :param line_cache_size:
+            Maximum number of repeated lines whose output is cached.
+            Disabled if zero.
+        :type line_cache_size: int
+        :param ipv6: Whether to extract IPv6 addresses too.
+        :type ipv6: bool
         :return: Iterator that yields lines in chunks
         :rtype: iterable
 
         """
-        filter = Filter(self)
+        filter = Filter(
+            self,
+            input_format=input_format,
+            fields=fields,
+            chunk_bytes=chunk_bytes,
+            chunk_ip_addresses=chunk_ip_addresses,
+            line_cache_size=line_cache_size,
+            ipv6=ipv6,
+        )
         for filtered_chunk in filter.filter(
-            text, noise_only=noise_only, riot_only=riot_only
+            text, noise_only=noise_only, riot_only=riot_only, markup=markup
         ):
             yield filtered_chunk
 
@@ -292,11 +608,12 @@ class GreyNoise(object):
             endpoint = self.EP_NOISE_CONTEXT.format(ip_address=ip_address)
         if self.use_cache:
             cache = self.ip_context_cache
-            response = (
-                cache[ip_address]
-                if ip_address in self.ip_context_cache
-                else cache.setdefault(ip_address, self._request(endpoint))
-            )
+            with self.cache_lock:
+                response = cache.get(ip_address)
+            if response is None:
+                response = self._request(endpoint)
+                with self.cache_lock:
+                    response = cache.setdefault(ip_address, response)
         else:
             response = self._request(endpoint)
 
@@ -337,7 +654,7 @@ class GreyNoise(object):
             response = self._request(self.EP_GNQL, params=params)
             return response
 
-    def quick(self, ip_addresses, include_invalid=False):  # noqa: C901
+    def quick(self, ip_addresses, include_invalid=False, as_table=False):
         """Get activity associated with one or more IP addresses.
 
         :param ip_addresses: One or more IP addresses to use in the look-up.
@@ -347,85 +664,380 @@ class GreyNoise(object):
 
         :param include_invalid: True or False
         :type include_invalid: bool
+        :param as_table:
+            If set, results are returned as a columnar table that takes a few
+            bytes per IP address instead of a list of dictionaries. Ignored with
+            the community offering, since the response is just a message.
+        :type as_table: bool
+
+        """
+        results = self.quick_iter(ip_addresses, include_invalid=include_invalid)
+        if as_table and self.offering != "community":
+            return QuickResultTable.from_results(
+                results, self.CODE_MESSAGES, self.UNKNOWN_CODE_MESSAGE
+            )
+        return list(results)
+
+    def quick_iter(
+        self, ip_addresses, include_invalid=False, ordered=True, max_workers=1
+    ):
+        """Get activity associated with one or more IP addresses as it's returned.
+
+        Unlike :meth:`quick`, results are yielded as soon as the request for their
+        chunk is done, so callers can start processing them right away and only
+        the chunks in flight are kept in memory. Up to ``max_workers`` chunks are
+        requested concurrently.
+
+        :param ip_addresses: One or more IP addresses to use in the look-up.
+        :type ip_addresses: str | list
+        :param include_invalid: True or False
+        :type include_invalid: bool
+        :param ordered:
+            If set, results are yielded in the same order as in the input.
+            Otherwise, they are yielded in the order in which chunks are done.
+            The results cached are the same either way, but unordered results
+            may be added to the cache in a different order than in the input,
+            so which of them are evicted first later on isn't deterministic.
+        :type ordered: bool
+        :param max_workers:
+            Number of chunks requested concurrently. If set to 1, chunks are
+            requested in the calling thread.
+        :type max_workers: int
+        :return: Iterator that yields the status information for each IP address.
+        :rtype: iterable(dict)
 
         """
         if self.offering == "community":
-            response = [
-                {"message": "Quick Lookup not supported with Community offering"}
-            ]
-            return response
+            yield {"message": "Quick Lookup not supported with Community offering"}
+            return
+
+        valid_ip_addresses, invalid_ip_addresses = self._validate_ip_addresses(
+            ip_addresses
+        )
+
+        batches = self._get_quick_batches(valid_ip_addresses)
+        if max_workers == 1:
+            for batch in batches:
+                for result in self._quick_batch(*batch):
+                    yield result
         else:
-            if isinstance(ip_addresses, str):
-                ip_addresses = ip_addresses.split(",")
+            for result in self._quick_batches_concurrently(
+                batches, ordered, max_workers
+            ):
+                yield result
+
+        if include_invalid:
+            for ip_address in invalid_ip_addresses:
+                yield self._add_code_message(
+                    {"ip": ip_address, "noise": False, "code": "404"}
+                )
 
-            LOGGER.debug("Getting noise status...", ip_addresses=ip_addresses)
+    def _validate_ip_addresses(self, ip_addresses):
+        """Split IP addresses into valid and invalid ones.
 
-            valid_ip_addresses = [
-                ip_address
-                for ip_address in ip_addresses
-                if validate_ip(ip_address, strict=False)
-            ]
+        Duplicates are removed up front (keeping the same ordering as in the input)
+        and validation doesn't log every invalid IP address, so that large inputs
+        are processed in linear time.
 
-            if self.use_cache:
-                cache = self.ip_quick_check_cache
-                # Keep the same ordering as in the input
-                ordered_results = OrderedDict(
-                    (ip_address, cache.get(ip_address))
-                    for ip_address in valid_ip_addresses
-                )
-                api_ip_addresses = [
-                    ip_address
-                    for ip_address, result in ordered_results.items()
-                    if result is None
-                ]
-                if api_ip_addresses:
-                    api_results = []
-                    chunks = more_itertools.chunked(
-                        api_ip_addresses, self.IP_QUICK_CHECK_CHUNK_SIZE
+        :param ip_addresses: One or more IP addresses.
+        :type ip_addresses: str | list
+        :return: Valid and invalid IP addresses.
+        :rtype: tuple(list(str), list(str))
+
+        """
+        if isinstance(ip_addresses, str):
+            ip_addresses = ip_addresses.split(",")
+
+        ip_addresses = list(dict.fromkeys(ip_addresses))
+        LOGGER.debug("Getting noise status...", count=len(ip_addresses))
+
+        valid_ip_addresses = []
+        invalid_ip_addresses = []
+        for ip_address in ip_addresses:
+            if is_routable_ip(ip_address):
+                valid_ip_addresses.append(ip_address)
+            else:
+                invalid_ip_addresses.append(ip_address)
+        if invalid_ip_addresses:
+            LOGGER.warning(
+                "Invalid or non-routable IP addresses skipped",
+                count=len(invalid_ip_addresses),
+                sample=invalid_ip_addresses[:10],
+            )
+        return valid_ip_addresses, invalid_ip_addresses
+
+    def _get_quick_batches(self, ip_addresses):
+        """Split IP addresses into batches that need at most one request each.
+
+        Every batch has the IP addresses in it, their cached results (None if the
+        cache isn't used), the IP addresses that have to be requested and how many
+        of the results for them shouldn't be cached.
+
+        :param ip_addresses: Valid IP addresses.
+        :type ip_addresses: list(str)
+        :return: Iterator that yields batches in the same order as in the input.
+        :rtype: iterable(tuple)
+
+        """
+        if not self.use_cache:
+            start = 0
+            while start < len(ip_addresses):
+                end = start + self._get_quick_chunk_size()
+                chunk = ip_addresses[start:end]
+                yield chunk, None, chunk, 0
+                start = end
+            return
+
+        cache = self.ip_quick_check_cache
+        with self.cache_lock:
+            cached_results = [cache.get(ip_address) for ip_address in ip_addresses]
+
+        # Results that would be evicted by later results in the same
+        # call are not cached to avoid churning through the cache
+        uncached_count = max(cached_results.count(None) - cache.maxsize, 0)
+
+        start = 0
+        api_ip_addresses = []
+        chunk_size = self._get_quick_chunk_size()
+        for index, cached_result in enumerate(cached_results):
+            if cached_result is None:
+                api_ip_addresses.append(ip_addresses[index])
+                if len(api_ip_addresses) >= chunk_size:
+                    end = index + 1
+                    yield (
+                        ip_addresses[start:end],
+                        cached_results[start:end],
+                        api_ip_addresses,
+                        uncached_count,
                     )
-                    for chunk in chunks:
-                        api_result = self._request(
-                            self.EP_NOISE_MULTI, json={"ips": chunk}
-                        )
-                        if isinstance(api_result, list):
-                            api_results.extend(api_result)
-                        else:
-                            api_results.append(api_result)
-
-                    for api_result in api_results:
-                        ip_address = api_result["ip"]
-                        ordered_results[ip_address] = cache.setdefault(
-                            ip_address, api_result
-                        )
-                results = list(ordered_results.values())
+                    uncached_count -= len(api_ip_addresses)
+                    start = end
+                    api_ip_addresses = []
+                    chunk_size = self._get_quick_chunk_size()
+        if start < len(ip_addresses):
+            yield (
+                ip_addresses[start:],
+                cached_results[start:],
+                api_ip_addresses,
+                uncached_count,
+            )
 
+    def _get_quick_chunk_size(self):
+        """Get the number of IP addresses for the next quick request.
+
+        :return: Chunk size
+        :rtype: int
+
+        """
+        if self.chunk_size_controller is None:
+            return self.IP_QUICK_CHECK_CHUNK_SIZE
+        return self.chunk_size_controller.size
+
+    def _request_quick_chunk(self, ip_addresses):
+        """Request the status of a chunk of IP addresses.
+
+        Latency, payload size and errors are recorded in the chunk size controller
+        (if any) to tune the size of the next chunks.
+
+        :param ip_addresses: IP addresses to request.
+        :type ip_addresses: list(str)
+        :return: Bulk status information for IP addresses.
+        :rtype: list(dict) | dict
+
+        """
+        controller = self.chunk_size_controller
+        if controller is None:
+            return self._request(self.EP_NOISE_MULTI, json={"ips": ip_addresses})
+
+        # JSON payload size estimated without serializing it twice
+        payload_bytes = sum(len(ip_address) + 4 for ip_address in ip_addresses) + 9
+        start = time.perf_counter()
+        try:
+            response = self._request(self.EP_NOISE_MULTI, json={"ips": ip_addresses})
+        except (RequestFailure, requests.RequestException):
+            latency = time.perf_counter() - start
+            controller.record(len(ip_addresses), latency, payload_bytes, error=True)
+            raise
+        latency = time.perf_counter() - start
+        controller.record(len(ip_addresses), latency, payload_bytes)
+        return response
+
+    def _quick_batch(
+        self, ip_addresses, cached_results, api_ip_addresses, uncached_count
+    ):
+        """Get the results for a batch of IP addresses.
+
+        :param ip_addresses: IP addresses in the batch.
+        :type ip_addresses: list(str)
+        :param cached_results: Cached results for each IP address (or None).
+        :type cached_results: list(dict | None) | None
+        :param api_ip_addresses: IP addresses to request.
+        :type api_ip_addresses: list(str)
+        :param uncached_count: Number of API results that shouldn't be cached.
+        :type uncached_count: int
+        :return: Bulk status information for the batch IP addresses.
+        :rtype: list(dict)
+
+        """
+        api_results = []
+        if api_ip_addresses:
+            api_result = self._request_quick_chunk(api_ip_addresses)
+            if isinstance(api_result, list):
+                api_results = api_result
             else:
-                results = []
-                chunks = more_itertools.chunked(
-                    valid_ip_addresses, self.IP_QUICK_CHECK_CHUNK_SIZE
-                )
-                for chunk in chunks:
-                    result = self._request(self.EP_NOISE_MULTI, json={"ips": chunk})
-                    if isinstance(result, list):
-                        results.extend(result)
-                    else:
-                        results.append(result)
-
-            [
-                results.append({"ip": ip, "noise": False, "code": "404"})
-                for ip in ip_addresses
-                if ip not in valid_ip_addresses and include_invalid
+                api_results = [api_result]
+
+        if cached_results is None:
+            results = api_results
+        else:
+            cache = self.ip_quick_check_cache
+            api_results_by_ip = {}
+            with self.cache_lock:
+                for index, api_result in enumerate(api_results):
+                    ip_address = api_result["ip"]
+                    if index >= uncached_count:
+                        api_result = cache.setdefault(ip_address, api_result)
+                    api_results_by_ip[ip_address] = api_result
+
+            # Keep the same ordering as in the input
+            results = [
+                api_results_by_ip.get(ip_address) if result is None else result
+                for ip_address, result in zip(ip_addresses, cached_results)
             ]
+            results = [result for result in results if result is not None]
 
-            for result in results:
-                code = result["code"]
-                result["code_message"] = self.CODE_MESSAGES.get(
-                    code, self.UNKNOWN_CODE_MESSAGE.format(code)
-                )
-            return results
+        for result in results:
+            self._add_code_message(result)
+        return results
+
+    def _quick_batches_concurrently(self, batches, ordered, max_workers):
+        """Get the results for batches of IP addresses in worker threads.
+
+        :param batches: Batches of IP addresses.
+        :type batches: iterable(tuple)
+        :param ordered: If set, results are yielded in the same order as batches.
+        :type ordered: bool
+        :param max_workers: Number of batches requested concurrently.
+        :type max_workers: int
+        :return: Iterator that yields the status information for each IP address.
+        :rtype: iterable(dict)
+
+        """
+        pending_lookups = collections.deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch in batches:
+                pending_lookups.append(executor.submit(self._quick_batch, *batch))
+                if len(pending_lookups) >= max_workers:
+                    for result in self._pop_lookup(pending_lookups, ordered):
+                        yield result
+
+            while pending_lookups:
+                for result in self._pop_lookup(pending_lookups, ordered):
+                    yield result
+
+    def _pop_lookup(self, pending_lookups, ordered):
+        """Wait for a pending lookup and get its results.
+
+        :param pending_lookups: Lookups in flight.
+        :type pending_lookups: collections.deque(concurrent.futures.Future)
+        :param ordered:
+            If set, wait for the oldest lookup. Otherwise, for the first one done.
+        :type ordered: bool
+        :return: Bulk status information for the lookup IP addresses.
+        :rtype: list(dict)
+
+        """
+        if ordered:
+            lookup = pending_lookups.popleft()
+        else:
+            done_lookups, _ = wait(pending_lookups, return_when=FIRST_COMPLETED)
+            lookup = next(iter(done_lookups))
+            pending_lookups.remove(lookup)
+        return lookup.result()
+
+    def _add_code_message(self, result):
+        """Add a human readable message for the result code.
+
+        :param result: Status information for an IP address.
+        :type result: dict
+        :return: The same result.
+        :rtype: dict
+
+        """
+        code = result["code"]
+        result["code_message"] = self.CODE_MESSAGES.get(
+            code, self.UNKNOWN_CODE_MESSAGE.format(code)
+        )
+        return result
+
+    def split(
+        self,
+        text,
+        sinks,
+        markup=None,
+        summary=None,
+        input_format="text",
+        fields=None,
+        chunk_bytes=None,
+        chunk_ip_addresses=None,
+        line_cache_size=0,
+        ipv6=False,
+    ):
+        """Split lines into noise, RIOT and clean lines in a single pass.
+
+        :param text: Text input
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :param sinks:
+            Output (file-like or callable) for each route (noise, riot or clean).
+        :type sinks: dict(str, file-like | callable)
+        :param markup:
+            Templates used to surround IP addresses for each tag
+            (noise, not-noise and riot). Defaults to ``<tag>...</tag>`` markup.
+            If empty, lines are not modified.
+        :type markup: dict(str, str)
+        :param summary: Output for the classification of every IP address found.
+        :type summary: file-like | callable | None
+        :param input_format: Input format (text, jsonl, eve, csv or zeek).
+        :type input_format: str
+        :param fields: Fields or columns to extract IP addresses from.
+        :type fields: list(str) | None
+        :param chunk_bytes: Maximum size of the chunks of lines processed at once.
+        :type chunk_bytes: int | None
+        :param chunk_ip_addresses:
+            Maximum number of unique IP addresses in every chunk.
+        :type chunk_ip_addresses: int | None
+        :param line_cache_size:
+            Maximum number of repeated lines whose output is cached.
+            Disabled if zero.
+        :type line_cache_size: int
+        :param ipv6: Whether to extract IPv6 addresses too.
+        :type ipv6: bool
+
+        """
+        filter = Filter(
+            self,
+            input_format=input_format,
+            fields=fields,
+            chunk_bytes=chunk_bytes,
+            chunk_ip_addresses=chunk_ip_addresses,
+            line_cache_size=line_cache_size,
+            ipv6=ipv6,
+        )
+        filter.split(text, sinks, markup=markup, summary=summary)
 
     def stats(self, query, count=None):
-        """Run GNQL stats query."""
+        """Run GNQL stats query.
+
+        Results are cached by normalized query (and count) when the cache is used.
+
+        :param query: GNQL query
+        :type query: str
+        :param count: Number of elements in every section of the stats.
+        :type count: int | None
+        :return: Stats for the query
+        :rtype: dict
+
+        """
         if self.offering == "community":
             response = {"message": "Stats Query not supported with Community offering"}
             return response
@@ -434,7 +1046,17 @@ class GreyNoise(object):
             params = {"query": query}
             if count is not None:
                 params["count"] = count
-            response = self._request(self.EP_GNQL_STATS, params=params)
+            if self.use_cache:
+                cache = self.stats_cache
+                cache_key = (normalize_query(query), count)
+                with self.cache_lock:
+                    response = cache.get(cache_key)
+                if response is None:
+                    response = self._request(self.EP_GNQL_STATS, params=params)
+                    with self.cache_lock:
+                        response = cache.setdefault(cache_key, response)
+            else:
+                response = self._request(self.EP_GNQL_STATS, params=params)
             return response
 
     def metadata(self):
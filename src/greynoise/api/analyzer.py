@@ -1,8 +1,25 @@
 """Analyzer module."""
 
-import functools
+import collections
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-import more_itertools
+import structlog
+
+from greynoise.api.checkpoint import Checkpoint
+from greynoise.api.chunker import Chunker, round_up
+from greynoise.api.extractor import EXTRACTORS, normalize_ipv6
+from greynoise.api.ipset import IPAddressSet
+from greynoise.api.reader import TimedLines
+from greynoise.api.sampler import Sampler
+from greynoise.api.sketch import SectionSketch
+from greynoise.api.table import QuickResultTable
+from greynoise.exceptions import RateLimitError, RequestFailure
+
+LOGGER = structlog.get_logger()
 
 
 class Analyzer(object):
@@ -10,10 +27,99 @@ class Analyzer(object):
 
     :param api: API client
     :type api: greynoise.api.GreyNoise
+    :param input_format:
+        Input format (text, jsonl, eve, csv or zeek). For structured formats,
+        IP addresses are extracted only from the given fields.
+    :type input_format: str
+    :param fields: Fields or columns to extract IP addresses from.
+    :type fields: list(str) | None
+    :param chunk_bytes:
+        Maximum size of the chunks of lines analyzed at once. Defaults to
+        ``ANALYZE_CHUNK_BYTES``.
+    :type chunk_bytes: int | None
+    :param chunk_ip_addresses:
+        Maximum number of unique IP addresses in every chunk, rounded up to fill
+        whole quick requests. Defaults to ``ANALYZE_CHUNK_IP_ADDRESSES``.
+    :type chunk_ip_addresses: int | None
+    :param ipv6:
+        Whether to extract IPv6 addresses too. IPv6 addresses are looked up in
+        their canonical form.
+    :type ipv6: bool
+    :param batch_stats:
+        Whether to get stats for many IPv4 addresses at once with a GNQL query
+        that matches any of them (up to ``ANALYZE_STATS_QUERY_MAX_LENGTH``
+        characters) instead of one query for each IP address. Batched queries
+        request ``ANALYZE_BATCH_STATS_COUNT_PER_IP`` elements per IP address for
+        every section. If a batched query fails or any of its sections might
+        have been cut, its IP addresses are queried one by one.
+    :type batch_stats: bool
+    :param max_workers: Number of stats queries made concurrently.
+    :type max_workers: int
+    :param compact_ip_addresses:
+        Whether to keep track of the unique IP addresses found in a compact
+        :class:`greynoise.api.ipset.IPAddressSet` (a few bytes for every IP
+        address, but slower to update) instead of a set of strings. The summary
+        is then computed from quick checks made in chunks.
+    :type compact_ip_addresses: bool
+    :param checkpoint_path:
+        File where the analysis state is saved after every chunk (written in
+        the background at most once every ``ANALYZE_CHECKPOINT_INTERVAL``
+        seconds, with the stats in a ``<path>.state`` file next to it, see
+        :class:`greynoise.api.checkpoint.Checkpoint`). IP addresses are then
+        quick checked for every chunk.
+    :type checkpoint_path: str | None
+    :param resume:
+        Whether to continue from the state saved in the checkpoint file, if
+        any, skipping the lines and IP addresses already processed. The same
+        text and options must be used.
+    :type resume: bool
+    :param top_k:
+        Number of elements kept for every stats section (the ones with the
+        highest counts), selected with a heap instead of sorting all of them.
+        All of them are kept by default.
+    :type top_k: int | None
+    :param approximate:
+        Whether to count elements in every stats section with sketches
+        (:class:`greynoise.api.sketch.SectionSketch`) to use constant memory.
+        Only the most frequent elements (at least ``ANALYZE_SKETCH_CAPACITY``)
+        are kept and their counts are upper bounds, with a ``max_error`` value
+        for each of them.
+    :type approximate: bool
+    :param sample_rate:
+        Fraction of the unique IP addresses looked up (selected with a hash of
+        each one of them, see :class:`greynoise.api.sampler.Sampler`). The
+        summary then has estimated ratios with 95% confidence intervals and
+        stats counts are scaled to all the unique IP addresses found. All of
+        them are looked up by default.
+    :type sample_rate: float | None
+    :param stratify:
+        Whether to sample every /16 network separately, so that each one of
+        them is represented. Stats are then kept for every network and their
+        counts scaled by its own sampling ratio, so batched stats queries don't
+        mix IP addresses from different networks.
+    :type stratify: bool
 
     """
 
-    ANALYZE_TEXT_CHUNK_SIZE = 10000
+    ANALYZE_CHUNK_BYTES = 16 * 1024 * 1024
+    ANALYZE_CHUNK_IP_ADDRESSES = 10000
+    # Deprecated: chunks used to have a fixed number of lines
+    ANALYZE_TEXT_CHUNK_SIZE = ANALYZE_CHUNK_IP_ADDRESSES
+    # Keeps the URL for batched stats queries under 8KB once encoded
+    ANALYZE_STATS_QUERY_MAX_LENGTH = 4000
+    # Elements requested for every section of batched stats queries for each IP
+    # address in the batch, so that sections aren't cut to the default page
+    ANALYZE_BATCH_STATS_COUNT_PER_IP = 10
+    ANALYZE_RATE_LIMIT_RETRIES = 5
+    ANALYZE_RATE_LIMIT_BACKOFF = 1.0
+    ANALYZE_CHECKPOINT_INTERVAL = 30.0
+    # Every section keeps track of at least 1000 elements (so elements with
+    # more than 0.1% of the total count are always found) and count-min sketches
+    # over-estimate by at most 0.1% of the total count with 99.3% probability.
+    ANALYZE_SKETCH_CAPACITY = 1000
+    ANALYZE_SKETCH_WIDTH = 2719
+    ANALYZE_SKETCH_DEPTH = 5
+    ANALYZE_WINDOW_UNITS = ("lines", "seconds")
 
     SECTION_KEY_TO_ELEMENT_KEY = {
         "actors": "actor",
@@ -27,61 +133,527 @@ class Analyzer(object):
         "spoofable": "spoofable",
     }
 
-    def __init__(self, api):
+    def __init__(
+        self,
+        api,
+        input_format="text",
+        fields=None,
+        chunk_bytes=None,
+        chunk_ip_addresses=None,
+        ipv6=False,
+        batch_stats=False,
+        max_workers=1,
+        compact_ip_addresses=False,
+        checkpoint_path=None,
+        resume=False,
+        top_k=None,
+        approximate=False,
+        sample_rate=None,
+        stratify=False,
+    ):
+        if input_format not in EXTRACTORS:
+            raise ValueError("Unknown input format: {!r}".format(input_format))
+        if max_workers < 1:
+            raise ValueError("Number of workers must be positive")
+        if resume and checkpoint_path is None:
+            raise ValueError("A checkpoint file is required to resume")
+        if top_k is not None and top_k < 1:
+            raise ValueError("Number of top elements must be positive")
+        if approximate and checkpoint_path is not None:
+            raise ValueError("Approximate stats can't be saved in checkpoints")
+        if sample_rate is not None and not 0 < sample_rate <= 1:
+            raise ValueError("Sample rate must be between 0 and 1")
+        if stratify and sample_rate is None:
+            raise ValueError("A sample rate is required to stratify")
+        if stratify and approximate:
+            raise ValueError("Approximate stats can't be scaled for every stratum")
+        if sample_rate is not None and checkpoint_path is not None:
+            raise ValueError("Sampled analysis can't be saved in checkpoints")
         self.api = api
+        self.input_format = input_format
+        self.fields = fields
+        self.chunk_bytes = chunk_bytes or self.ANALYZE_CHUNK_BYTES
+        self.chunk_ip_addresses = round_up(
+            chunk_ip_addresses or self.ANALYZE_CHUNK_IP_ADDRESSES,
+            api.IP_QUICK_CHECK_CHUNK_SIZE,
+        )
+        self.ipv6 = ipv6
+        self.batch_stats = batch_stats
+        self.max_workers = max_workers
+        self.compact_ip_addresses = compact_ip_addresses
+        self.checkpoint_path = checkpoint_path
+        self.resume = resume
+        self.top_k = top_k
+        self.approximate = approximate
+        self.sample_rate = sample_rate
+        self.stratify = stratify
+        # Workers wait until this time once any of them is rate limited
+        self._rate_limited_until = 0
+        self._rate_limit_lock = threading.Lock()
+        # Stats aggregated so far by the running analysis
+        self._text_stats = None
+        self._text_stats_lock = threading.Lock()
+        # IP addresses looked up by the running analysis (if sampled)
+        self._sampler = None
 
     def analyze(self, text):
         """Aggregate stats related to IP addresses from a given text.
 
-        :param text: Text input
-        :type text: file-like | str
+        :param text:
+            Text input. Bytes-like lines (a ``bytes`` text, a file opened in binary
+            mode or :class:`greynoise.api.reader.MappedLines`) are not decoded.
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
         :return: Aggregated stats for all the IP addresses found.
         :rtype: dict
 
         """
-        if isinstance(text, str):
+        if isinstance(text, (str, bytes)):
             text = text.splitlines(True)
-        chunks = more_itertools.chunked(text, self.ANALYZE_TEXT_CHUNK_SIZE)
         text_stats = {
             "query": [],
             "count": 0,
             "stats": {},
         }
-        text_ip_addresses = set()
-        chunks_stats = [
-            self._analyze_chunk(chunk, text_ip_addresses) for chunk in chunks
-        ]
-        functools.reduce(self._aggregate_stats, chunks_stats, text_stats)
+        text_ip_addresses = IPAddressSet() if self.compact_ip_addresses else set()
+        extractor = EXTRACTORS[self.input_format](self.api, self.fields, self.ipv6)
+        chunker = Chunker(
+            extractor, self.chunk_bytes, self.chunk_ip_addresses, keep_spans=False
+        )
 
-        # This maps section dictionaries to list of dictionaries
-        # (undoing mapping done previously to keep track of count values)
-        for section_key, section_value in text_stats["stats"].items():
-            section_element_key = self.SECTION_KEY_TO_ELEMENT_KEY[section_key]
-            text_stats["stats"][section_key] = sorted(
-                [
-                    {section_element_key: element_key, "count": element_count}
-                    for element_key, element_count in section_value.items()
-                ],
-                key=lambda element: (-element["count"], element[section_element_key]),
+        checkpoint = None
+        progress = None
+        if self.checkpoint_path is not None:
+            checkpoint = Checkpoint(
+                self.checkpoint_path, self.ANALYZE_CHECKPOINT_INTERVAL
             )
+            progress = {"line_count": 0, "noise_ip_count": 0, "riot_ip_count": 0}
+            state = checkpoint.load() if self.resume else None
+            if state is not None:
+                text = self._resume(
+                    state, text, extractor, text_stats, text_ip_addresses, progress
+                )
+            checkpoint.start(append=state is not None)
+
+        with self._text_stats_lock:
+            self._text_stats = text_stats
+            if self.sample_rate is not None:
+                self._sampler = Sampler(self.sample_rate, self.stratify)
+        try:
+            if self.max_workers == 1:
+                self._analyze_chunks(
+                    chunker.chunks(text),
+                    text_stats,
+                    text_ip_addresses,
+                    checkpoint=checkpoint,
+                    progress=progress,
+                )
+            else:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    self._analyze_chunks(
+                        chunker.chunks(text),
+                        text_stats,
+                        text_ip_addresses,
+                        executor,
+                        checkpoint,
+                        progress,
+                    )
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        text_stats = self.snapshot()
+
+        if self._sampler is not None:
+            # Sampled IP addresses were already checked for every chunk
+            text_stats["summary"] = self._sampler.summary()
+        else:
+            text_stats["summary"] = self._get_summary(text_ip_addresses, progress)
+        return text_stats
+
+    def analyze_windows(
+        self, text, window_size, window_slide=None, window_unit="lines"
+    ):
+        """Aggregate stats for every window of a text (usually a stream).
+
+        Lines are split into panes of ``window_slide`` lines or seconds and a
+        window (the last ``window_size / window_slide`` panes) is analyzed every
+        time a pane is closed, so windows are tumbling when both sizes are the
+        same and sliding otherwise. Time windows are based on the wall time when
+        lines are read (in a background thread), so a pane is closed as soon as
+        its end time passes, even if no more lines are read, and windows without
+        lines are skipped. Windows that cover less than the window size (the
+        first ones of sliding windows and the one closed at the end of the text)
+        are marked as partial.
+
+        Only the unique IP addresses of the panes in the current window are kept,
+        along with their stats and quick check results, so every window only
+        looks up the IP addresses that weren't in the previous one. Batched stats
+        can't be split by IP address, so they can only be used with tumbling
+        windows.
+
+        :param text: Text input (read as it's needed).
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :param window_size: Window size in lines or seconds.
+        :type window_size: int | float
+        :param window_slide:
+            Number of lines or seconds between windows (a divisor of the window
+            size). Defaults to the window size.
+        :type window_slide: int | float | None
+        :param window_unit: Unit for the window size and slide (lines or seconds).
+        :type window_unit: str
+        :return:
+            Iterator that yields aggregated stats and summary for every window as
+            soon as it's closed, with the lines and wall time it covers and
+            whether it's partial.
+        :rtype: iterable(dict)
+
+        """
+        window_slide = window_slide or window_size
+        if window_unit not in self.ANALYZE_WINDOW_UNITS:
+            raise ValueError("Unknown window unit: {!r}".format(window_unit))
+        if window_size <= 0 or window_slide <= 0:
+            raise ValueError("Window size and slide must be positive")
+        pane_count = int(round(window_size / float(window_slide)))
+        if pane_count < 1 or abs(pane_count * window_slide - window_size) > 1e-9:
+            raise ValueError("Window size must be a multiple of the window slide")
+        if window_unit == "lines" and int(window_slide) != window_slide:
+            raise ValueError("Window size and slide in lines must be integers")
+        if self.checkpoint_path is not None:
+            raise ValueError("Windowed analysis can't be saved in checkpoints")
+        if self.batch_stats and pane_count > 1:
+            raise ValueError("Batched stats can't be used with sliding windows")
+
+        if isinstance(text, (str, bytes)):
+            text = text.splitlines(True)
+        return self._analyze_windows(text, window_slide, window_unit, pane_count)
+
+    def _analyze_windows(self, text, pane_size, pane_unit, pane_count):
+        """Aggregate stats for every window of lines.
+
+        :param text: Lines to analyze.
+        :type text: iterable(str) | iterable(bytes)
+        :param pane_size: Pane size in lines or seconds.
+        :type pane_size: int | float
+        :param pane_unit: Unit for the pane size (lines or seconds).
+        :type pane_unit: str
+        :param pane_count: Number of panes in a window.
+        :type pane_count: int
+        :return: Iterator that yields aggregated stats for every window.
+        :rtype: iterable(dict)
+
+        """
+        extractor = EXTRACTORS[self.input_format](self.api, self.fields, self.ipv6)
+        panes = collections.deque(maxlen=pane_count)
+        # Stats and quick check results for the IP addresses in the last window
+        lookups = {"stats": {}, "quick": {}}
+        executor = None
+        if self.max_workers > 1:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for pane in self._get_panes(
+                text, extractor, pane_size, pane_unit, pane_count
+            ):
+                panes.append(pane)
+                if any(pane["line_count"] for pane in panes):
+                    partial = len(panes) < pane_count or pane["partial"]
+                    yield self._analyze_window(panes, lookups, partial, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _get_panes(self, text, extractor, pane_size, pane_unit, pane_count):
+        """Split lines into panes and extract their unique IP addresses.
+
+        :param text: Lines to split.
+        :type text: iterable(str) | iterable(bytes)
+        :param extractor: Extractor used to find IP addresses in each line.
+        :type extractor: greynoise.api.extractor.Extractor
+        :param pane_size: Pane size in lines or seconds.
+        :type pane_size: int | float
+        :param pane_unit: Unit for the pane size (lines or seconds).
+        :type pane_unit: str
+        :param pane_count:
+            Number of panes in a window. After a long time without lines, only
+            this number of empty panes is yielded.
+        :type pane_count: int
+        :return:
+            Iterator that yields the first line number, number of lines, start and
+            end time and unique IP addresses of every pane, and whether it was
+            closed before its end (at the end of the text).
+        :rtype: iterable(dict)
 
-        if text_ip_addresses:
-            noise_ip_addresses = []
-            riot_ip_addresses = []
+        """
+
+        def get_timeout():
+            # Wait for the next line only until the current pane ends
+            if pane is None:
+                return None
+            return max(pane["start_time"] + pane_size - now, 0)
+
+        pane = None
+        now = None
+        binary = False
+        for line, now in self._time_lines(text, pane_unit, get_timeout):
+            if pane is None:
+                pane = new_pane(0, now)
+                binary = not isinstance(line, str)
+            elif pane_unit == "seconds":
+                closed_panes, pane = self._close_expired_panes(
+                    pane, now, pane_size, pane_count
+                )
+                for closed_pane in closed_panes:
+                    yield self._close_pane(closed_pane, binary)
+                if line is None:
+                    # No line was read before the pane ended
+                    continue
+
+            self._add_line(pane, line, now, extractor)
+            if pane_unit == "lines" and pane["line_count"] == pane_size:
+                yield self._close_pane(pane, binary)
+                pane = new_pane(pane["start_line"] + pane["line_count"], now)
+
+        if pane is not None and pane["line_count"]:
+            pane["partial"] = True
+            yield self._close_pane(pane, binary)
+
+    def _time_lines(self, text, pane_unit, get_timeout):
+        """Get the wall time when each line is read.
+
+        :param text: Lines to read.
+        :type text: iterable(str) | iterable(bytes)
+        :param pane_unit: Unit for the pane size (lines or seconds).
+        :type pane_unit: str
+        :param get_timeout:
+            Callable that returns how long to wait for the next line. Only used
+            for time panes, that need to be closed even when no line is read.
+        :type get_timeout: callable
+        :return: Iterator that yields each line with its wall time.
+        :rtype: iterable(tuple)
+
+        """
+        if pane_unit == "seconds":
+            return TimedLines(text, get_timeout)
+        return ((line, time.time()) for line in text)
+
+    def _add_line(self, pane, line, now, extractor):
+        """Add a line and its IP addresses to a pane.
+
+        :param pane: Pane to update.
+        :type pane: dict
+        :param line: Line to add.
+        :type line: str | bytes
+        :param now: Wall time when the line was read.
+        :type now: float
+        :param extractor: Extractor used to find IP addresses in the line.
+        :type extractor: greynoise.api.extractor.Extractor
+
+        """
+        line_ip_matches = extractor.extract(line)
+        if line_ip_matches:
+            pane["ip_addresses"].update(match.group(0) for match in line_ip_matches)
+        pane["line_count"] += 1
+        pane["end_time"] = now
+
+    def _close_expired_panes(self, pane, now, pane_size, pane_count):
+        """Close time panes that ended before the given time.
+
+        :param pane: Current pane.
+        :type pane: dict
+        :param now: Wall time.
+        :type now: float
+        :param pane_size: Pane size in seconds.
+        :type pane_size: int | float
+        :param pane_count:
+            Number of panes in a window. After a long time without lines, only
+            this number of empty panes is closed.
+        :type pane_count: int
+        :return: Panes closed and the pane for the given time.
+        :rtype: tuple(list(dict), dict)
+
+        """
+        closed_panes = []
+        while now >= pane["start_time"] + pane_size:
+            pane["end_time"] = pane["start_time"] + pane_size
+            closed_panes.append(pane)
+            pane = new_pane(pane["start_line"] + pane["line_count"], pane["end_time"])
+            if len(closed_panes) > pane_count:
+                # Every window would be empty until now
+                pane["start_time"] += (
+                    (now - pane["start_time"]) // pane_size * pane_size
+                )
+        return closed_panes, pane
+
+    def _close_pane(self, pane, binary):
+        """Normalize the IP addresses of a pane once it's closed.
+
+        :param pane: Pane being closed.
+        :type pane: dict
+        :param binary: Whether the IP addresses were extracted from bytes.
+        :type binary: bool
+        :return: The same pane.
+        :rtype: dict
+
+        """
+        pane["ip_addresses"] = self._normalize_ip_addresses(
+            pane["ip_addresses"], binary
+        )
+        return pane
 
-            for result in self.api.quick(text_ip_addresses):
-                if result["noise"]:
-                    noise_ip_addresses.append(result["ip"])
-                if result["riot"]:
-                    riot_ip_addresses.append(result["ip"])
+    def _analyze_window(self, panes, lookups, partial, executor=None):
+        """Aggregate stats for the IP addresses in a window.
 
+        :param panes: Panes in the window.
+        :type panes: iterable(dict)
+        :param lookups:
+            Stats and quick check results for every IP address in the previous
+            window, updated for this one.
+        :type lookups: dict(str, dict)
+        :param partial: Whether the window covers less than the window size.
+        :type partial: bool
+        :param executor: Executor used to look up stats concurrently (if any).
+        :type executor: concurrent.futures.Executor | None
+        :return: Aggregated stats and summary for the window.
+        :rtype: dict
+
+        """
+        window_ip_addresses = set()
+        for pane in panes:
+            window_ip_addresses.update(pane["ip_addresses"])
+        # Forget IP addresses that are no longer in the window
+        for ip_lookups in lookups.values():
+            for ip_address in list(ip_lookups):
+                if ip_address not in window_ip_addresses:
+                    del ip_lookups[ip_address]
+        window_stats = {"query": [], "count": 0, "stats": {}}
+        with self._text_stats_lock:
+            self._text_stats = window_stats
+            if self.sample_rate is not None:
+                self._sampler = Sampler(self.sample_rate, self.stratify)
+
+        ip_addresses = window_ip_addresses
+        if self._sampler is not None:
+            ip_addresses = self._sampler.sample(ip_addresses)
+        ip_addresses = sorted(ip_addresses)
+        if self.batch_stats:
+            window_query_stats = self._lookup_stats(ip_addresses, executor)
+        else:
+            window_query_stats = self._get_window_stats(
+                ip_addresses, lookups["stats"], executor
+            )
+        self._aggregate_stats(window_stats, window_query_stats)
+
+        window_stats = self.snapshot()
+        if self._sampler is not None:
+            self._sampler.add_results(
+                self._get_window_results(ip_addresses, lookups["quick"])
+            )
+            window_stats["summary"] = self._sampler.summary()
         else:
-            noise_ip_addresses = set()
-            riot_ip_addresses = set()
+            results = self._get_window_results(window_ip_addresses, lookups["quick"])
+            window_stats["summary"] = self._get_summary(
+                window_ip_addresses,
+                {
+                    "noise_ip_count": results.count(noise=True),
+                    "riot_ip_count": results.count(riot=True),
+                },
+            )
+
+        panes = [pane for pane in panes if pane["line_count"]]
+        window_stats["window"] = {
+            "start_line": panes[0]["start_line"],
+            "line_count": sum(pane["line_count"] for pane in panes),
+            "start_time": format_time(panes[0]["start_time"]),
+            "end_time": format_time(panes[-1]["end_time"]),
+            "partial": partial,
+        }
+        return window_stats
+
+    def _get_window_stats(self, ip_addresses, ip_stats, executor=None):
+        """Get stats for the IP addresses in a window one by one.
+
+        :param ip_addresses: IP addresses in the window (sorted).
+        :type ip_addresses: list(str)
+        :param ip_stats: Stats for IP addresses already looked up (updated).
+        :type ip_stats: dict(str, dict)
+        :param executor: Executor used to look up stats concurrently (if any).
+        :type executor: concurrent.futures.Executor | None
+        :return: Stats for every IP address in the same order.
+        :rtype: list(dict)
+
+        """
+        new_ip_addresses = [
+            ip_address for ip_address in ip_addresses if ip_address not in ip_stats
+        ]
+        # Stats are yielded in the same order as the IP addresses
+        ip_stats.update(
+            zip(new_ip_addresses, self._lookup_stats(new_ip_addresses, executor))
+        )
+        return [ip_stats[ip_address] for ip_address in ip_addresses]
+
+    def _get_window_results(self, ip_addresses, ip_results):
+        """Get quick check results for the IP addresses in a window.
+
+        :param ip_addresses: IP addresses in the window.
+        :type ip_addresses: iterable(str)
+        :param ip_results:
+            Noise and RIOT flags for IP addresses already checked (updated).
+        :type ip_results: dict(str, tuple(int, int))
+        :return: Quick check results for every IP address.
+        :rtype: greynoise.api.table.QuickResultTable
+
+        """
+        new_ip_addresses = [
+            ip_address for ip_address in ip_addresses if ip_address not in ip_results
+        ]
+        if new_ip_addresses:
+            # IP addresses without results count as neither noise nor RIOT
+            ip_results.update(dict.fromkeys(new_ip_addresses, (0, 0)))
+            results = self.api.quick(new_ip_addresses, as_table=True)
+            for index in range(len(results)):
+                ip_results[results.ip_address(index)] = (
+                    results.noise[index],
+                    results.riot[index],
+                )
+        return QuickResultTable.from_results(
+            {
+                "ip": ip_address,
+                "noise": ip_results[ip_address][0],
+                "riot": ip_results[ip_address][1],
+            }
+            for ip_address in ip_addresses
+        )
+
+    def _get_summary(self, text_ip_addresses, progress=None):
+        """Count noise and RIOT IP addresses for the whole text.
+
+        :param text_ip_addresses: Unique IP addresses found.
+        :type text_ip_addresses: set(str) | greynoise.api.ipset.IPAddressSet
+        :param progress: Summary counts kept for every chunk (if any).
+        :type progress: dict | None
+        :return: IP address counts and ratios.
+        :rtype: dict
+
+        """
+        if progress is not None:
+            # IP addresses were already checked for every chunk
+            noise_ip_count = progress["noise_ip_count"]
+            riot_ip_count = progress["riot_ip_count"]
+        elif self.compact_ip_addresses:
+            # Avoid converting every IP address back to a string at once
+            ip_addresses = iter(text_ip_addresses)
+            noise_ip_count, riot_ip_count = self._get_summary_counts(
+                iter(
+                    lambda: list(
+                        itertools.islice(ip_addresses, self.chunk_ip_addresses)
+                    ),
+                    [],
+                )
+            )
+        else:
+            noise_ip_count, riot_ip_count = self._get_summary_counts(
+                [text_ip_addresses] if text_ip_addresses else []
+            )
 
         ip_count = len(text_ip_addresses)
-        noise_ip_count = len(noise_ip_addresses)
-        riot_ip_count = len(riot_ip_addresses)
         not_noise_ip_count = ip_count - noise_ip_count - riot_ip_count
         if ip_count > 0:
             noise_ip_ratio = float(noise_ip_count) / ip_count
@@ -90,7 +662,7 @@ class Analyzer(object):
             noise_ip_ratio = 0
             riot_ip_ratio = 0
 
-        text_stats["summary"] = {
+        return {
             "ip_count": ip_count,
             "noise_ip_count": noise_ip_count,
             "not_noise_ip_count": not_noise_ip_count,
@@ -99,58 +671,552 @@ class Analyzer(object):
             "riot_ip_ratio": riot_ip_ratio,
         }
 
-        return text_stats
+    def _resume(self, state, text, extractor, text_stats, text_ip_addresses, progress):
+        """Restore the analysis state from a checkpoint.
+
+        :param state: State loaded from the checkpoint.
+        :type state: dict
+        :param text: Lines to analyze.
+        :type text: iterable(str) | iterable(bytes)
+        :param extractor: Extractor used to find IP addresses in each line.
+        :type extractor: greynoise.api.extractor.Extractor
+        :param text_stats: Aggregated stats updated from the checkpoint.
+        :type text_stats: dict
+        :param text_ip_addresses: IP addresses updated from the checkpoint.
+        :type text_ip_addresses: set(str) | greynoise.api.ipset.IPAddressSet
+        :param progress: Progress updated from the checkpoint.
+        :type progress: dict
+        :return: Lines that haven't been processed yet.
+        :rtype: iterable(str) | iterable(bytes)
+
+        """
+        LOGGER.info(
+            "Resuming analysis from checkpoint",
+            path=self.checkpoint_path,
+            line_count=state["line_count"],
+            ip_count=len(state["ip_addresses"]),
+        )
+        # Every IP address is queried once in the same order
+        text_stats["query"] = state["ip_addresses"]
+        text_stats["count"] = state["count"]
+        text_stats["stats"] = {
+            section_key: collections.Counter(section_stats)
+            for section_key, section_stats in state["stats"].items()
+        }
+        text_ip_addresses.update(state["ip_addresses"])
+        for key in progress:
+            progress[key] = state[key]
+
+        # Skip lines already processed (keeping track of headers)
+        text = iter(text)
+        for line in itertools.islice(text, progress["line_count"]):
+            extractor.skip(line)
+        return text
+
+    def _analyze_chunks(
+        self,
+        chunks,
+        text_stats,
+        text_ip_addresses,
+        executor=None,
+        checkpoint=None,
+        progress=None,
+    ):
+        """Aggregate stats for every chunk of lines.
+
+        Stats for every query are aggregated as soon as they are received
+        (instead of keeping them for the whole text), so memory used for
+        sections depends only on the number of distinct elements in them.
+
+        :param chunks: Lines with the IP addresses already extracted from them.
+        :type chunks: iterable(greynoise.api.chunker.Chunk)
+        :param text_stats: Aggregated stats for the chunks already analyzed.
+        :type text_stats: dict
+        :param text_ip_addresses: IP addresses already seen in other chunks.
+        :type text_ip_addresses: set(str) | greynoise.api.ipset.IPAddressSet
+        :param executor: Executor used to look up stats concurrently (if any).
+        :type executor: concurrent.futures.Executor | None
+        :param checkpoint:
+            Checkpoint saved after every chunk (if any). IP addresses are then
+            checked for every chunk to keep track of the summary counts.
+        :type checkpoint: greynoise.api.checkpoint.Checkpoint | None
+        :param progress:
+            Number of lines processed and noise and RIOT IP address counts.
+        :type progress: dict | None
+
+        """
+        for chunk in chunks:
+            ip_addresses, chunk_stats = self._analyze_chunk(
+                chunk, text_ip_addresses, executor
+            )
+            self._aggregate_stats(text_stats, chunk_stats)
+            if self._sampler is not None and ip_addresses:
+                self._sampler.add_results(self.api.quick(ip_addresses, as_table=True))
+            if checkpoint is None:
+                continue
+
+            noise_ip_count, riot_ip_count = self._get_summary_counts(
+                [ip_addresses] if ip_addresses else []
+            )
+            progress["line_count"] += len(chunk.lines)
+            progress["noise_ip_count"] += noise_ip_count
+            progress["riot_ip_count"] += riot_ip_count
+            checkpoint.save(
+                progress["line_count"],
+                ip_addresses,
+                text_stats["count"],
+                text_stats["stats"],
+                progress["noise_ip_count"],
+                progress["riot_ip_count"],
+            )
 
-    def _analyze_chunk(self, text, text_ip_addresses):
+    def _analyze_chunk(self, chunk, text_ip_addresses, executor=None):
         """Analyze chunk of lines that contain IP addresses from a given text.
 
-        :param text: Text input
-        :type text: str
+        :param chunk: Lines with the IP addresses already extracted from them.
+        :type chunk: greynoise.api.chunker.Chunk
         :param text_ip_addresses: IP addresses already seen in other chunks.
-        :type text_ip_addresses: set(str)
-        :return: Iterator with stats for each one of the IP addresses found.
-        :rtype: dict
+        :type text_ip_addresses: set(str) | greynoise.api.ipset.IPAddressSet
+        :param executor: Executor used to look up stats concurrently (if any).
+        :type executor: concurrent.futures.Executor | None
+        :return:
+            IP addresses not seen in other chunks and iterator with stats for each
+            one of the queries made for them.
+        :rtype: tuple(list(str), iterable(dict))
 
         """
-        chunk_ip_addresses = set()
-        for input_line in text:
-            chunk_ip_addresses.update(self.api.IPV4_REGEX.findall(input_line))
+        binary = not isinstance(chunk.lines[0], str)
+        chunk_ip_addresses = self._normalize_ip_addresses(chunk.ip_addresses, binary)
 
         # Keep only IP addresses not seen in other chunks and query those
-        chunk_ip_addresses -= text_ip_addresses
-        text_ip_addresses.update(chunk_ip_addresses)
+        if isinstance(text_ip_addresses, IPAddressSet):
+            chunk_ip_addresses = text_ip_addresses.add_new(chunk_ip_addresses)
+        else:
+            chunk_ip_addresses -= text_ip_addresses
+            text_ip_addresses.update(chunk_ip_addresses)
+        if self._sampler is not None:
+            chunk_ip_addresses = self._sampler.sample(chunk_ip_addresses)
 
-        chunk_stats = [
-            self.api.stats(query=ip_address) for ip_address in chunk_ip_addresses
-        ]
-        return chunk_stats
+        # Query IP addresses always in the same order for deterministic output
+        ip_addresses = sorted(chunk_ip_addresses)
+        return ip_addresses, self._lookup_stats(ip_addresses, executor)
+
+    def _normalize_ip_addresses(self, ip_addresses, binary):
+        """Convert extracted IP addresses to the form in which they're looked up.
+
+        :param ip_addresses: Unique IP addresses extracted from lines.
+        :type ip_addresses: set(str) | set(bytes)
+        :param binary: Whether the IP addresses were extracted from bytes.
+        :type binary: bool
+        :return: Decoded IP addresses (IPv6 addresses in their canonical form).
+        :rtype: set(str)
+
+        """
+        if binary:
+            # Decode only unique IP addresses instead of every occurrence
+            ip_addresses = {ip_address.decode("ascii") for ip_address in ip_addresses}
+        if self.ipv6:
+            ip_addresses = {
+                normalize_ipv6(ip_address) if ":" in ip_address else ip_address
+                for ip_address in ip_addresses
+            }
+        return ip_addresses
+
+    def _lookup_stats(self, ip_addresses, executor=None):
+        """Get stats for IP addresses.
+
+        :param ip_addresses: IP addresses to get stats for.
+        :type ip_addresses: list(str)
+        :param executor: Executor used to look up stats concurrently (if any).
+        :type executor: concurrent.futures.Executor | None
+        :return: Iterator with stats for each one of the queries made.
+        :rtype: iterable(dict)
+
+        """
+        if self.batch_stats:
+            batches = self._get_stats_batches(ip_addresses)
+        else:
+            batches = ([ip_address] for ip_address in ip_addresses)
+
+        if executor is None:
+            batches_stats = map(self._get_batch_stats, batches)
+        else:
+            batches_stats = self._get_batches_stats(batches, executor)
+        return (
+            query_stats for batch_stats in batches_stats for query_stats in batch_stats
+        )
+
+    def _get_batches_stats(self, batches, executor):
+        """Get stats for batches of IP addresses concurrently.
+
+        Unlike ``executor.map``, batches are submitted as results are consumed,
+        so only up to ``max_workers`` of them are in flight at any time.
+
+        :param batches: Batches of IP addresses to get stats for.
+        :type batches: iterable(list(str))
+        :param executor: Executor used to look up stats concurrently.
+        :type executor: concurrent.futures.Executor
+        :return: Iterator with stats for each batch in the same order.
+        :rtype: iterable(list(dict))
+
+        """
+        pending_batches = collections.deque()
+        for batch in batches:
+            pending_batches.append(executor.submit(self._get_batch_stats, batch))
+            if len(pending_batches) >= self.max_workers:
+                yield pending_batches.popleft().result()
+
+        while pending_batches:
+            yield pending_batches.popleft().result()
+
+    def _get_summary_counts(self, batches):
+        """Count noise and RIOT IP addresses with quick checks.
+
+        :param batches: IP addresses checked in every quick call.
+        :type batches: iterable(iterable(str))
+        :return: Number of noise and RIOT IP addresses.
+        :rtype: tuple(int, int)
+
+        """
+        noise_ip_count = 0
+        riot_ip_count = 0
+        for batch in batches:
+            results = self.api.quick(batch, as_table=True)
+            noise_ip_count += results.count(noise=True)
+            riot_ip_count += results.count(riot=True)
+        return noise_ip_count, riot_ip_count
+
+    def _get_batch_stats(self, batch):
+        """Get stats for a batch of IP addresses in a single GNQL query.
+
+        :param batch: IP addresses to get stats for.
+        :type batch: list(str)
+        :return:
+            Stats for each query made. Stats for batched queries have the list of
+            IP addresses in them as their query.
+        :rtype: list(dict)
+
+        """
+        if len(batch) == 1:
+            return [self._get_stats(batch[0])]
+
+        query = " OR ".join("ip:{}".format(ip_address) for ip_address in batch)
+        count = len(batch) * self.ANALYZE_BATCH_STATS_COUNT_PER_IP
+        try:
+            batch_stats = self._get_stats(query, count)
+        except RateLimitError:
+            raise
+        except RequestFailure as exception:
+            LOGGER.warning(
+                "Batched stats query failed, querying IP addresses one by one",
+                ip_count=len(batch),
+                error=exception,
+            )
+            return [self._get_stats(ip_address) for ip_address in batch]
+
+        # A section with as many elements as requested might have been cut
+        sections = (batch_stats.get("stats") or {}).values()
+        if any(section and len(section) >= count for section in sections):
+            LOGGER.warning(
+                "Batched stats query truncated, querying IP addresses one by one",
+                ip_count=len(batch),
+            )
+            return [self._get_stats(ip_address) for ip_address in batch]
+        return [dict(batch_stats, query=batch)]
+
+    def _get_stats(self, query, count=None):
+        """Run GNQL stats query.
+
+        When stats are looked up concurrently, every worker waits once any of
+        them is rate limited and the query is retried with exponential backoff
+        (up to ``ANALYZE_RATE_LIMIT_RETRIES`` times).
+
+        :param query: GNQL query
+        :type query: str
+        :param count:
+            Number of elements in every section of the stats (API default if
+            None).
+        :type count: int | None
+        :return: Stats for the query
+        :rtype: dict
+
+        """
+        kwargs = {"query": query}
+        if count is not None:
+            kwargs["count"] = count
+
+        if self.max_workers == 1:
+            return self.api.stats(**kwargs)
+
+        for attempt in range(self.ANALYZE_RATE_LIMIT_RETRIES + 1):
+            with self._rate_limit_lock:
+                delay = self._rate_limited_until - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            try:
+                return self.api.stats(**kwargs)
+            except RateLimitError:
+                if attempt == self.ANALYZE_RATE_LIMIT_RETRIES:
+                    raise
+                backoff = self.ANALYZE_RATE_LIMIT_BACKOFF * 2 ** attempt
+                LOGGER.warning("Rate limited, waiting to retry", backoff=backoff)
+                with self._rate_limit_lock:
+                    self._rate_limited_until = max(
+                        self._rate_limited_until, time.monotonic() + backoff
+                    )
+
+    def _get_stats_batches(self, ip_addresses):
+        """Split IP addresses into batches that fit in a GNQL query.
+
+        IPv6 addresses are always queried one by one. When the sample is
+        stratified, every batch has IP addresses from a single stratum (sorted
+        IP addresses in the same /16 network are next to each other).
+
+        :param ip_addresses: IP addresses to get stats for.
+        :type ip_addresses: list(str)
+        :return: Iterator that yields lists of IP addresses.
+        :rtype: iterable(list(str))
+
+        """
+        batch = []
+        length = 0
+        stratum = None
+        for ip_address in ip_addresses:
+            if ":" in ip_address:
+                yield [ip_address]
+                continue
+
+            # Length of the ip:<ip_address> term and the OR operator
+            term_length = len(ip_address) + 7
+            ip_address_stratum = self._get_stratum(ip_address)
+            if batch and (
+                length + term_length > self.ANALYZE_STATS_QUERY_MAX_LENGTH
+                or ip_address_stratum != stratum
+            ):
+                yield batch
+                batch = []
+                length = 0
+            batch.append(ip_address)
+            length += term_length
+            stratum = ip_address_stratum
+        if batch:
+            yield batch
+
+    def snapshot(self):
+        """Get stats aggregated so far.
+
+        This may be called from another thread while :meth:`analyze` is running
+        to get partial results (without summary). Once the analysis is finished,
+        the stats for the whole text are returned. When sampled, counts are
+        scaled to all the unique IP addresses found so far.
+
+        :return: Aggregated stats (or None if no analysis has been started).
+        :rtype: dict | None
+
+        """
+        with self._text_stats_lock:
+            text_stats = self._text_stats
+            if text_stats is None:
+                return None
+            query = list(text_stats["query"])
+            if self.stratify:
+                count, stats = self._get_stratified_stats(text_stats)
+                scale = 1
+            else:
+                count = text_stats["count"]
+                scale = 1 if self._sampler is None else self._sampler.scale
+                stats = {}
+                for section_key, section_stats in text_stats["stats"].items():
+                    if isinstance(section_stats, SectionSketch):
+                        stats[section_key] = section_stats.items()
+                    else:
+                        stats[section_key] = [
+                            (element_key, element_count, None)
+                            for element_key, element_count in section_stats.items()
+                        ]
+
+        # This maps section counters to list of dictionaries
+        # (undoing mapping done previously to keep track of count values)
+        for section_key, section_items in stats.items():
+            section_element_key = self.SECTION_KEY_TO_ELEMENT_KEY[section_key]
+            elements = []
+            for element_key, element_count, element_max_error in section_items:
+                element = {
+                    section_element_key: element_key,
+                    "count": scale_count(element_count, scale),
+                }
+                if element_max_error is not None:
+                    element["max_error"] = scale_count(element_max_error, scale)
+                elements.append(element)
+
+            def sort_key(element, section_element_key=section_element_key):
+                return -element["count"], element[section_element_key]
+
+            if self.top_k is None:
+                stats[section_key] = sorted(elements, key=sort_key)
+            else:
+                # Keep only the top elements without sorting all of them
+                stats[section_key] = heapq.nsmallest(self.top_k, elements, key=sort_key)
+        return {"query": query, "count": scale_count(count, scale), "stats": stats}
+
+    def _get_stratified_stats(self, text_stats):
+        """Scale stats kept for every stratum by its own sampling ratio.
+
+        :param text_stats: Aggregated stats for every stratum.
+        :type text_stats: dict
+        :return: Scaled stats count and element counts for every section.
+        :rtype: tuple(int, dict(str, list(tuple)))
+
+        """
+        count = 0.0
+        section_counts = collections.defaultdict(collections.Counter)
+        for stratum, stratum_stats in text_stats.get("strata", {}).items():
+            scale = self._sampler.stratum_scale(stratum)
+            count += stratum_stats["count"] * scale
+            for section_key, section_stats in stratum_stats["stats"].items():
+                element_counts = section_counts[section_key]
+                for element_key, element_count in section_stats.items():
+                    element_counts[element_key] += element_count * scale
+
+        stats = {
+            section_key: [
+                (element_key, int(round(element_count)), None)
+                for element_key, element_count in element_counts.items()
+            ]
+            for section_key, element_counts in section_counts.items()
+        }
+        return int(round(count)), stats
+
+    def _get_stratum(self, ip_address):
+        """Get the stratum of an IP address when the sample is stratified.
+
+        :param ip_address: IP address.
+        :type ip_address: str
+        :return: Stratum (None if the sample isn't stratified).
+        :rtype: str | None
+
+        """
+        if not self.stratify:
+            return None
+        return self._sampler.get_stratum(ip_address)
+
+    def _new_section_stats(self):
+        """Create counter for the elements in a stats section.
+
+        :return: Exact counter or sketch in approximate mode.
+        :rtype: collections.Counter | greynoise.api.sketch.SectionSketch
+
+        """
+        if not self.approximate:
+            return collections.Counter()
+        return SectionSketch(
+            max(self.ANALYZE_SKETCH_CAPACITY, self.top_k or 0),
+            self.ANALYZE_SKETCH_WIDTH,
+            self.ANALYZE_SKETCH_DEPTH,
+        )
 
     def _aggregate_stats(self, accumulator, chunk_stats):
         """Aggregate stats for different IP addresses.
 
+        Stats for each query are folded into the accumulator as they are consumed
+        from the iterator and then discarded.
+
         :param accumulator: Aggregated stats for multiple IP addresses.
         :type accumulator: dict
         :param chunk_stats:
             Stats for given chunk of text. These stats are not aggregated yet,
-            so they are a list of stats for each query made for that chunk.
-        :type chunk_stats: list(dict)
+            so they are stats for each query made for that chunk.
+        :type chunk_stats: iterable(dict)
 
         """
         for query_stats in chunk_stats:
-            accumulator["query"].append(query_stats["query"])
-            accumulator["count"] += query_stats["count"]
-            for section_key, section_values in query_stats["stats"].items():
-                if section_values is None:
-                    continue
-                section_stats = accumulator["stats"].setdefault(section_key, {})
+            with self._text_stats_lock:
+                # Batched queries keep track of the IP addresses in them
+                if isinstance(query_stats["query"], list):
+                    accumulator["query"].extend(query_stats["query"])
+                    stratum = self._get_stratum(query_stats["query"][0])
+                else:
+                    accumulator["query"].append(query_stats["query"])
+                    stratum = self._get_stratum(query_stats["query"])
+                # Stratified stats are kept for every stratum to scale them
+                stats_accumulator = accumulator
+                if self.stratify:
+                    stats_accumulator = accumulator.setdefault(
+                        "strata", {}
+                    ).setdefault(stratum, {"count": 0, "stats": {}})
+
+                stats_accumulator["count"] += query_stats["count"]
+                for section_key, section_values in query_stats["stats"].items():
+                    if section_values is None:
+                        continue
+                    section_stats = stats_accumulator["stats"].get(section_key)
+                    if section_stats is None:
+                        section_stats = self._new_section_stats()
+                        stats_accumulator["stats"][section_key] = section_stats
 
-                # This maps a list of dictionaries to a dictionary
-                # to easily keep track of counts.
-                section_element_key = self.SECTION_KEY_TO_ELEMENT_KEY[section_key]
-                for section_value in section_values:
-                    element_key = section_value[section_element_key]
-                    element_count = section_value["count"]
-                    section_stats.setdefault(element_key, 0)
-                    section_stats[element_key] += element_count
+                    # This maps a list of dictionaries to a counter
+                    # to easily keep track of counts.
+                    section_element_key = self.SECTION_KEY_TO_ELEMENT_KEY[section_key]
+                    if self.approximate:
+                        for section_value in section_values:
+                            section_stats.add(
+                                section_value[section_element_key],
+                                section_value["count"],
+                            )
+                        continue
+                    for section_value in section_values:
+                        section_stats[section_value[section_element_key]] += (
+                            section_value["count"]
+                        )
 
         return accumulator
+
+
+def scale_count(count, scale):
+    """Scale count from a sample.
+
+    :param count: Count for the sampled IP addresses.
+    :type count: int
+    :param scale: Ratio between all the IP addresses and the sampled ones.
+    :type scale: float
+    :return: Estimated count for all the IP addresses.
+    :rtype: int
+
+    """
+    if scale == 1:
+        return count
+    return int(round(count * scale))
+
+
+def new_pane(start_line, start_time):
+    """Create an empty window pane.
+
+    :param start_line: Number of the first line in the pane.
+    :type start_line: int
+    :param start_time: Wall time when the pane starts.
+    :type start_time: float
+    :return: Pane without lines.
+    :rtype: dict
+
+    """
+    return {
+        "start_line": start_line,
+        "line_count": 0,
+        "start_time": start_time,
+        "end_time": start_time,
+        "ip_addresses": set(),
+        "partial": False,
+    }
+
+
+def format_time(timestamp):
+    """Format wall time.
+
+    :param timestamp: Seconds since the epoch.
+    :type timestamp: float
+    :return: Time in ISO 8601 format (UTC).
+    :rtype: str
+
+    """
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
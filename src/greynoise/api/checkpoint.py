@@ -0,0 +1,191 @@
+"""Analyzer checkpoint module."""
+
+import json
+import os
+import threading
+
+import structlog
+
+LOGGER = structlog.get_logger()
+
+
+class Checkpoint(object):
+    """Journal of the analyzer state written in the background.
+
+    The IP addresses looked up are appended to the checkpoint file (one per
+    line), so only the new ones are written every time. The rest of the state
+    (number of input lines processed, aggregated stats and noise and RIOT IP
+    address counts from quick checks) is written to a ``<path>.state`` file
+    that is replaced atomically, along with the size of the journal it matches,
+    so the checkpoint doesn't grow with a copy of the stats for every write and
+    anything appended after the last state (if the process is killed while
+    writing) is ignored when loading.
+
+    :meth:`save` only keeps the latest record (and the IP addresses looked up
+    since the last write), while a background thread writes it at most once
+    every ``interval`` seconds, so the analysis doesn't wait for the disk.
+
+    :param path: Path to the checkpoint file.
+    :type path: str
+    :param interval: Minimum number of seconds between writes.
+    :type interval: float
+
+    """
+
+    def __init__(self, path, interval=30.0):
+        self.path = path
+        self.state_path = path + ".state"
+        self.interval = interval
+        # Latest record and IP addresses looked up since the last write
+        self._record = None
+        self._pending_ip_addresses = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+        self._file = None
+        # Size of the journal that matches the state found when loading
+        self._size = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def load(self):
+        """Load the state from the last checkpoint written.
+
+        :return:
+            Number of lines processed, every IP address looked up (in order),
+            stats count, aggregated stats and noise and RIOT IP address counts.
+            None if there's no checkpoint.
+        :rtype: dict | None
+
+        """
+        self._size = 0
+        if not os.path.exists(self.state_path):
+            return None
+
+        with open(self.state_path, "rb") as state_file:
+            state = json.loads(state_file.read().decode("utf-8"))
+        journal_size = state.pop("journal_size")
+        with open(self.path, "rb") as journal_file:
+            journal = journal_file.read(journal_size)
+        if len(journal) < journal_size:
+            LOGGER.warning("Ignoring checkpoint with an incomplete journal")
+            return None
+        self._size = journal_size
+
+        state["ip_addresses"] = journal.decode("ascii").splitlines()
+        state["stats"] = {
+            section_key: dict(section_items)
+            for section_key, section_items in state["stats"].items()
+        }
+        return state
+
+    def start(self, append=False):
+        """Open the checkpoint file and start writing records in the background.
+
+        :param append:
+            Whether to keep the records found when loading (when resuming).
+            Anything after them is discarded.
+        :type append: bool
+
+        """
+        self._file = open(self.path, "ab" if append else "wb")
+        if append:
+            self._file.truncate(self._size)
+        elif os.path.exists(self.state_path):
+            # The state of a previous analysis doesn't match the new journal
+            os.remove(self.state_path)
+        self._thread = threading.Thread(target=self._write_records, daemon=True)
+        self._thread.start()
+
+    def save(
+        self, line_count, ip_addresses, count, stats, noise_ip_count, riot_ip_count
+    ):
+        """Queue a checkpoint record.
+
+        :param line_count: Number of input lines processed.
+        :type line_count: int
+        :param ip_addresses: IP addresses looked up since the last record.
+        :type ip_addresses: list(str)
+        :param count: Stats count.
+        :type count: int
+        :param stats: Counts for every element in every section.
+        :type stats: dict(str, dict)
+        :param noise_ip_count: Number of noise IP addresses.
+        :type noise_ip_count: int
+        :param riot_ip_count: Number of RIOT IP addresses.
+        :type riot_ip_count: int
+
+        """
+        record = {
+            "line_count": line_count,
+            "count": count,
+            # Element keys aren't always strings, so items are kept as pairs
+            "stats": {
+                section_key: list(section_stats.items())
+                for section_key, section_stats in stats.items()
+            },
+            "noise_ip_count": noise_ip_count,
+            "riot_ip_count": riot_ip_count,
+        }
+        with self._condition:
+            self._record = record
+            self._pending_ip_addresses.extend(ip_addresses)
+
+    def close(self):
+        """Write the queued records and close the checkpoint file."""
+        if self._thread is None:
+            return
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+
+    def _write_records(self):
+        """Write queued records until the checkpoint is closed."""
+        while True:
+            with self._condition:
+                if not self._closed:
+                    self._condition.wait(self.interval)
+                record = self._record
+                ip_addresses = self._pending_ip_addresses
+                self._record = None
+                self._pending_ip_addresses = []
+                closed = self._closed
+
+            if record is not None:
+                if ip_addresses:
+                    self._file.write(
+                        "".join(
+                            ip_address + "\n" for ip_address in ip_addresses
+                        ).encode("ascii")
+                    )
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                record["journal_size"] = self._file.tell()
+                self._write_state(record)
+                LOGGER.debug(
+                    "Checkpoint saved", path=self.path, line_count=record["line_count"]
+                )
+            if closed:
+                return
+
+    def _write_state(self, record):
+        """Replace the state file atomically.
+
+        :param record: Latest record with the journal size it matches.
+        :type record: dict
+
+        """
+        temporary_path = self.state_path + ".tmp"
+        with open(temporary_path, "w") as state_file:
+            json.dump(record, state_file)
+            state_file.flush()
+            os.fsync(state_file.fileno())
+        os.replace(temporary_path, self.state_path)
@@ -0,0 +1,248 @@
+"""Chunker module."""
+
+import collections
+import threading
+
+import structlog
+
+LOGGER = structlog.get_logger()
+
+Chunk = collections.namedtuple("Chunk", ["lines", "ip_spans", "ip_addresses"])
+ChunkSizeDecision = collections.namedtuple(
+    "ChunkSizeDecision",
+    [
+        "request_size",
+        "latency",
+        "payload_bytes",
+        "error",
+        "old_size",
+        "new_size",
+        "reason",
+    ],
+)
+
+
+def round_up(value, multiple):
+    """Round value up to a multiple of another value.
+
+    :param value: Value to round.
+    :type value: int
+    :param multiple: Value is rounded to a multiple of this one.
+    :type multiple: int
+    :return: Rounded value
+    :rtype: int
+
+    """
+    return -(-value // multiple) * multiple
+
+
+class Chunker(object):
+    """Split lines into chunks limited by size and by unique IP addresses.
+
+    Lines are scanned for IP addresses while chunking, so every chunk is closed
+    before it grows over the byte budget (bounding memory usage for long lines)
+    or over the unique IP address budget (so that chunks of short lines still
+    fill whole requests to the API). A chunk always contains at least one line,
+    even if that line is over budget by itself.
+
+    The offsets of every IP address in each line are kept only when
+    ``keep_spans`` is set (for callers that mark up or classify lines), and then
+    they're counted in the byte budget as ``SPAN_SIZE`` bytes each.
+
+    :param extractor: Extractor used to find IP addresses in each line.
+    :type extractor: greynoise.api.extractor.Extractor
+    :param max_bytes: Maximum size in bytes (or characters for ``str`` lines).
+    :type max_bytes: int
+    :param max_ip_addresses: Maximum number of unique IP addresses.
+    :type max_ip_addresses: int
+    :param keep_spans: Whether to keep the offsets of the IP addresses.
+    :type keep_spans: bool
+
+    """
+
+    # Approximate memory used by every span: a tuple of two integers and a pointer
+    # to it in the line's list
+    SPAN_SIZE = 64
+
+    def __init__(self, extractor, max_bytes, max_ip_addresses, keep_spans=True):
+        if max_bytes < 1:
+            raise ValueError("Chunk size in bytes must be positive")
+        if max_ip_addresses < 1:
+            raise ValueError("Chunk size in IP addresses must be positive")
+        self.extractor = extractor
+        self.max_bytes = max_bytes
+        self.max_ip_addresses = max_ip_addresses
+        self.keep_spans = keep_spans
+
+    def chunks(self, text):
+        """Split lines into chunks.
+
+        :param text: Lines to split
+        :type text: iterable(str) | iterable(bytes)
+        :return:
+            Iterator that yields chunks with the lines, the IP address spans for
+            each line (None for header lines, and no spans at all unless
+            ``keep_spans`` is set) and the unique IP addresses.
+        :rtype: iterable(Chunk)
+
+        """
+        extract = self.extractor.extract
+        max_bytes = self.max_bytes
+        max_ip_addresses = self.max_ip_addresses
+        keep_spans = self.keep_spans
+        span_size = self.SPAN_SIZE
+
+        lines = []
+        ip_spans = [] if keep_spans else None
+        ip_addresses = set()
+        size = 0
+        for line in text:
+            line_ip_matches = extract(line)
+            line_size = len(line)
+            if line_ip_matches:
+                line_ip_addresses = {match.group(0) for match in line_ip_matches}
+                line_ip_addresses.difference_update(ip_addresses)
+                if keep_spans:
+                    line_size += span_size * len(line_ip_matches)
+            else:
+                line_ip_addresses = ()
+
+            if lines and (
+                size + line_size > max_bytes
+                or len(ip_addresses) + len(line_ip_addresses) > max_ip_addresses
+            ):
+                yield Chunk(lines, ip_spans, ip_addresses)
+                lines = []
+                ip_spans = [] if keep_spans else None
+                ip_addresses = set()
+                size = 0
+                if line_ip_matches:
+                    line_ip_addresses = {match.group(0) for match in line_ip_matches}
+
+            lines.append(line)
+            if keep_spans:
+                # Empty (or cached) lines and headers are kept as they are
+                ip_spans.append(
+                    [match.span() for match in line_ip_matches]
+                    if line_ip_matches
+                    else line_ip_matches
+                )
+            ip_addresses.update(line_ip_addresses)
+            size += line_size
+
+        if lines:
+            yield Chunk(lines, ip_spans, ip_addresses)
+
+
+class ChunkSizeController(object):
+    """Tune the number of IP addresses in every quick request.
+
+    Large requests have long tail latencies under load and may hit timeouts,
+    while small requests waste round trips. After every request, the chunk size
+    is scaled so that the expected latency (from the average latency per IP
+    address over the last requests) stays under ``target_latency``, is capped
+    so that the request payload stays under ``max_payload_bytes`` and is halved
+    on errors. It's only increased if none of the last requests failed.
+
+    Every decision is kept in :attr:`decisions` (up to ``max_decisions``) and
+    the current size in :attr:`size`.
+
+    :param min_size: Minimum number of IP addresses in a request.
+    :type min_size: int
+    :param max_size: Maximum number of IP addresses in a request.
+    :type max_size: int
+    :param target_latency: Target latency per request in seconds.
+    :type target_latency: float
+    :param max_payload_bytes: Maximum request payload size in bytes.
+    :type max_payload_bytes: int
+    :param window: Number of recent requests taken into account.
+    :type window: int
+    :param max_decisions: Number of recent decisions kept.
+    :type max_decisions: int
+
+    """
+
+    GROWTH_FACTOR = 1.5
+
+    def __init__(
+        self,
+        min_size=100,
+        max_size=1000,
+        target_latency=5.0,
+        max_payload_bytes=1024 * 1024,
+        window=10,
+        max_decisions=100,
+    ):
+        if min_size < 1 or max_size < min_size:
+            raise ValueError("Chunk size bounds must be positive and ordered")
+        if target_latency <= 0:
+            raise ValueError("Target latency must be positive")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.max_payload_bytes = max_payload_bytes
+        self.size = max_size
+        self.decisions = collections.deque(maxlen=max_decisions)
+        self._latencies = collections.deque(maxlen=window)
+        self._errors = collections.deque(maxlen=window)
+        # Requests may be recorded from multiple threads
+        self._lock = threading.Lock()
+
+    @property
+    def error_rate(self):
+        """Ratio of recent requests that failed."""
+        if not self._errors:
+            return 0.0
+        return float(sum(self._errors)) / len(self._errors)
+
+    def record(self, size, latency, payload_bytes, error=False):
+        """Record a request and update the chunk size.
+
+        :param size: Number of IP addresses in the request.
+        :type size: int
+        :param latency: Request latency in seconds.
+        :type latency: float
+        :param payload_bytes: Request payload size in bytes.
+        :type payload_bytes: int
+        :param error: Whether the request failed.
+        :type error: bool
+        :return: The new chunk size.
+        :rtype: int
+
+        """
+        with self._lock:
+            self._errors.append(error)
+            if error:
+                new_size = self.size // 2
+                reason = "error"
+            else:
+                self._latencies.append(float(latency) / size)
+                latency_per_ip = sum(self._latencies) / len(self._latencies)
+                expected_latency = latency_per_ip * self.size
+                if expected_latency > self.target_latency:
+                    new_size = int(self.target_latency / latency_per_ip)
+                    reason = "latency"
+                elif (
+                    expected_latency * self.GROWTH_FACTOR <= self.target_latency
+                    and not any(self._errors)
+                ):
+                    new_size = int(self.size * self.GROWTH_FACTOR)
+                    reason = "grow"
+                else:
+                    new_size = self.size
+                    reason = "hold"
+
+                payload_limit = self.max_payload_bytes * size // max(payload_bytes, 1)
+                if new_size > payload_limit:
+                    new_size = payload_limit
+                    reason = "payload"
+
+            new_size = min(max(new_size, self.min_size), self.max_size)
+            decision = ChunkSizeDecision(
+                size, latency, payload_bytes, error, self.size, new_size, reason
+            )
+            self.decisions.append(decision)
+            if new_size != self.size:
+                LOGGER.debug("Chunk size updated", **decision._asdict())
+            self.size = new_size
+            return new_size
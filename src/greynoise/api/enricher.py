@@ -0,0 +1,245 @@
+"""Enricher module."""
+
+import collections
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import more_itertools
+import structlog
+
+LOGGER = structlog.get_logger()
+
+
+class Enricher(object):
+    """Annotate records with the GreyNoise classification of their IP addresses.
+
+    Records are read in batches and the unique IP addresses in every batch are
+    looked up in a worker thread. Up to ``max_workers`` batches are looked up
+    concurrently, but records are always yielded in the same order as in the
+    input, so memory usage is bounded by the number of batches in flight.
+
+    :param api: API client
+    :type api: greynoise.api.GreyNoise
+    :param input_format: Input format (jsonl or csv).
+    :type input_format: str
+    :param fields: Fields or columns that contain IP addresses.
+    :type fields: list(str) | None
+    :param context:
+        If set, also look up context for noise IP addresses
+        to annotate them with their classification.
+    :type context: bool
+    :param max_workers: Number of batches looked up concurrently.
+    :type max_workers: int
+
+    """
+
+    ENRICH_BATCH_SIZE = 1000
+    INPUT_FORMATS = ("jsonl", "csv")
+    DEFAULT_FIELDS = ("src_ip", "dest_ip")
+
+    # Key used to add annotations to JSON records
+    ANNOTATION_KEY = "greynoise"
+    ANNOTATION_KEYS = ("noise", "riot", "code")
+
+    def __init__(
+        self, api, input_format="jsonl", fields=None, context=False, max_workers=4
+    ):
+        if input_format not in self.INPUT_FORMATS:
+            raise ValueError("Unknown input format: {!r}".format(input_format))
+        self.api = api
+        self.input_format = input_format
+        self.fields = list(fields or self.DEFAULT_FIELDS)
+        self.context = context
+        self.max_workers = max_workers
+
+    @property
+    def annotation_keys(self):
+        """Keys added to the annotation of every IP address."""
+        if self.context:
+            return self.ANNOTATION_KEYS + ("classification",)
+        return self.ANNOTATION_KEYS
+
+    @property
+    def csv_columns(self):
+        """Columns added to CSV records."""
+        return [
+            "{}_{}".format(field, annotation_key)
+            for field in self.fields
+            for annotation_key in self.annotation_keys
+        ]
+
+    def enrich(self, text):
+        """Annotate records with the GreyNoise classification of their IP addresses.
+
+        JSON records are annotated with an object under the ``greynoise`` key that
+        contains the annotations for each one of the fields. CSV records get
+        ``<field>_<annotation>`` columns appended (see :attr:`csv_columns`).
+
+        Lines that aren't valid JSON are skipped with a warning and JSON values
+        that aren't objects are yielded without annotations, so a bad record
+        doesn't stop the stream.
+
+        :param text: Text input
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :return: Iterator that yields annotated records as dictionaries.
+        :rtype: iterable
+
+        """
+        if isinstance(text, (str, bytes)):
+            text = text.splitlines(True)
+        lines = (
+            line if isinstance(line, str) else str(line, "utf-8", "replace")
+            for line in text
+        )
+        if self.input_format == "csv":
+            records = csv.DictReader(lines)
+        else:
+            records = self._parse_json_lines(lines)
+
+        batches = more_itertools.chunked(records, self.ENRICH_BATCH_SIZE)
+        pending_batches = collections.deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch in batches:
+                batch_ip_addresses = self._get_ip_addresses(batch)
+                lookup = executor.submit(self._lookup, batch_ip_addresses)
+                pending_batches.append((batch, batch_ip_addresses, lookup))
+
+                # Wait for the oldest batch to keep the same order as in the input
+                if len(pending_batches) >= self.max_workers:
+                    for record in self._annotate_batch(*pending_batches.popleft()):
+                        yield record
+
+            while pending_batches:
+                for record in self._annotate_batch(*pending_batches.popleft()):
+                    yield record
+
+    def _parse_json_lines(self, lines):
+        """Parse JSON lines skipping the ones that aren't valid JSON.
+
+        :param lines: Lines of text.
+        :type lines: iterable(str)
+        :return: Iterator that yields a JSON value for every valid line.
+        :rtype: iterable
+
+        """
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exception:
+                LOGGER.warning(
+                    "Skipping line that isn't valid JSON",
+                    line_number=line_number,
+                    error=str(exception),
+                )
+
+    def _get_field(self, record, field):
+        """Get field value from a record.
+
+        Dotted field names are used as keys first and then as paths to nested
+        values (that is, ``id.orig_h`` is looked up both as a key and as
+        ``record["id"]["orig_h"]``).
+
+        :param record: Record being processed.
+        :type record: dict
+        :param field: Field name
+        :type field: str
+        :return: Field value
+        :rtype: str | None
+
+        """
+        if field in record:
+            return record[field]
+
+        value = record
+        for key in field.split("."):
+            if not isinstance(value, dict) or key not in value:
+                return None
+            value = value[key]
+        return value
+
+    def _get_ip_addresses(self, batch):
+        """Get IP addresses from the fields of every record in a batch.
+
+        :param batch: Records
+        :type batch: list(dict)
+        :return: IP address in each field for every record.
+        :rtype: list(dict)
+
+        """
+        batch_ip_addresses = []
+        for record in batch:
+            record_ip_addresses = {}
+            if not isinstance(record, dict):
+                # JSON values that aren't objects have no fields
+                batch_ip_addresses.append(record_ip_addresses)
+                continue
+            for field in self.fields:
+                value = self._get_field(record, field)
+                if isinstance(value, str) and self.api.IPV4_REGEX.fullmatch(value):
+                    record_ip_addresses[field] = value
+            batch_ip_addresses.append(record_ip_addresses)
+        return batch_ip_addresses
+
+    def _lookup(self, batch_ip_addresses):
+        """Look up the unique IP addresses in a batch.
+
+        :param batch_ip_addresses: IP address in each field for every record.
+        :type batch_ip_addresses: list(dict)
+        :return: Annotations for each IP address
+        :rtype: dict(str, dict)
+
+        """
+        unique_ip_addresses = list(
+            more_itertools.unique_everseen(
+                ip_address
+                for record_ip_addresses in batch_ip_addresses
+                for ip_address in record_ip_addresses.values()
+            )
+        )
+        if not unique_ip_addresses:
+            return {}
+
+        annotations = {}
+        for result in self.api.quick(unique_ip_addresses):
+            annotation = {key: result.get(key) for key in self.ANNOTATION_KEYS}
+            if self.context:
+                annotation["classification"] = (
+                    self.api.ip(result["ip"]).get("classification")
+                    if result["noise"]
+                    else None
+                )
+            annotations[result["ip"]] = annotation
+        return annotations
+
+    def _annotate_batch(self, batch, batch_ip_addresses, lookup):
+        """Annotate records in a batch once its lookup is done.
+
+        :param batch: Records
+        :type batch: list(dict)
+        :param batch_ip_addresses: IP address in each field for every record.
+        :type batch_ip_addresses: list(dict)
+        :param lookup: Lookup for the batch IP addresses.
+        :type lookup: concurrent.futures.Future
+        :return: Annotated records
+        :rtype: list(dict)
+
+        """
+        annotations = lookup.result()
+        for record, record_ip_addresses in zip(batch, batch_ip_addresses):
+            record_annotations = {
+                field: annotations[ip_address]
+                for field, ip_address in record_ip_addresses.items()
+                if ip_address in annotations
+            }
+            if self.input_format == "csv":
+                for field in self.fields:
+                    annotation = record_annotations.get(field, {})
+                    for annotation_key in self.annotation_keys:
+                        column = "{}_{}".format(field, annotation_key)
+                        record[column] = annotation.get(annotation_key)
+            elif isinstance(record, dict):
+                record[self.ANNOTATION_KEY] = record_annotations
+        return batch
@@ -0,0 +1,170 @@
+"""API cost estimator module."""
+
+import time
+
+from greynoise.api.analyzer import Analyzer
+from greynoise.api.chunker import Chunker, round_up
+from greynoise.api.extractor import EXTRACTORS
+from greynoise.api.filter import Filter
+from greynoise.api.sketch import HyperLogLog
+
+
+class Estimator(object):
+    """Estimate the API cost of analyzing or filtering a text (dry run).
+
+    The text is scanned and split in chunks the same way as in a real run, but
+    nothing is looked up: unique IP addresses are counted with HyperLogLog
+    sketches (using a few kilobytes regardless of the input size) to estimate
+    the number of requests to every endpoint and the wall time they would take.
+
+    :param api: API client
+    :type api: greynoise.api.GreyNoise
+    :param command: Command whose cost is estimated (analyze or filter).
+    :type command: str
+    :param input_format: Input format (text, jsonl, eve, csv or zeek).
+    :type input_format: str
+    :param fields: Fields or columns to extract IP addresses from.
+    :type fields: list(str) | None
+    :param chunk_bytes: Maximum size of the chunks of lines processed at once.
+    :type chunk_bytes: int | None
+    :param chunk_ip_addresses: Maximum number of unique IP addresses in every chunk.
+    :type chunk_ip_addresses: int | None
+    :param ipv6: Whether to extract IPv6 addresses too.
+    :type ipv6: bool
+    :param batch_stats: Whether stats are queried for many IP addresses at once.
+    :type batch_stats: bool
+    :param max_workers: Number of stats queries made concurrently.
+    :type max_workers: int
+    :param request_latency:
+        Expected seconds for every request. Defaults to
+        ``ESTIMATE_REQUEST_LATENCY``.
+    :type request_latency: float | None
+    :param requests_per_second: Rate limit for all the requests (if any).
+    :type requests_per_second: float | None
+
+    """
+
+    ESTIMATE_REQUEST_LATENCY = 0.5
+    CHUNK_SIZES = {
+        "analyze": (Analyzer.ANALYZE_CHUNK_BYTES, Analyzer.ANALYZE_CHUNK_IP_ADDRESSES),
+        "filter": (Filter.FILTER_CHUNK_BYTES, Filter.FILTER_CHUNK_IP_ADDRESSES),
+    }
+
+    def __init__(
+        self,
+        api,
+        command="analyze",
+        input_format="text",
+        fields=None,
+        chunk_bytes=None,
+        chunk_ip_addresses=None,
+        ipv6=False,
+        batch_stats=False,
+        max_workers=1,
+        request_latency=None,
+        requests_per_second=None,
+    ):
+        if command not in self.CHUNK_SIZES:
+            raise ValueError("Unknown command: {!r}".format(command))
+        if input_format not in EXTRACTORS:
+            raise ValueError("Unknown input format: {!r}".format(input_format))
+        if max_workers < 1:
+            raise ValueError("Number of workers must be positive")
+        default_chunk_bytes, default_chunk_ip_addresses = self.CHUNK_SIZES[command]
+        self.api = api
+        self.command = command
+        self.input_format = input_format
+        self.fields = fields
+        self.chunk_bytes = chunk_bytes or default_chunk_bytes
+        self.chunk_ip_addresses = round_up(
+            chunk_ip_addresses or default_chunk_ip_addresses,
+            api.IP_QUICK_CHECK_CHUNK_SIZE,
+        )
+        self.ipv6 = ipv6
+        self.batch_stats = batch_stats
+        self.max_workers = max_workers
+        self.request_latency = request_latency or self.ESTIMATE_REQUEST_LATENCY
+        self.requests_per_second = requests_per_second
+
+    def estimate(self, text):
+        """Estimate the API cost for a given text.
+
+        :param text: Text input
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :return:
+            Number of lines, estimated number of unique IP addresses (and its
+            relative standard error), requests for every endpoint, time spent
+            scanning the text and projected wall time for a real run.
+        :rtype: dict
+
+        """
+        if isinstance(text, (str, bytes)):
+            text = text.splitlines(True)
+        extractor = EXTRACTORS[self.input_format](self.api, self.fields, self.ipv6)
+        chunker = Chunker(
+            extractor, self.chunk_bytes, self.chunk_ip_addresses, keep_spans=False
+        )
+        quick_chunk_size = self.api.IP_QUICK_CHECK_CHUNK_SIZE
+
+        ipv4_sketch = HyperLogLog()
+        ipv6_sketch = HyperLogLog()
+        line_count = 0
+        # IP addresses are looked up for every chunk when filtering
+        chunk_quick_request_count = 0
+        # Used to estimate how many IPv4 addresses fit in a batched stats query
+        ipv4_length = 0
+        ipv4_count = 0
+
+        start = time.perf_counter()
+        for chunk in chunker.chunks(text):
+            line_count += len(chunk.lines)
+            chunk_quick_request_count += -(-len(chunk.ip_addresses) // quick_chunk_size)
+            separator = ":" if isinstance(chunk.lines[0], str) else b":"
+            for ip_address in chunk.ip_addresses:
+                if separator in ip_address:
+                    ipv6_sketch.add(ip_address)
+                else:
+                    ipv4_sketch.add(ip_address)
+                    ipv4_length += len(ip_address)
+                    ipv4_count += 1
+        scan_time = time.perf_counter() - start
+
+        ipv4_ip_count = ipv4_sketch.count()
+        ipv6_ip_count = ipv6_sketch.count()
+        ip_count = ipv4_ip_count + ipv6_ip_count
+
+        if self.command == "filter":
+            requests = {self.api.EP_NOISE_MULTI: chunk_quick_request_count}
+            request_time = chunk_quick_request_count * self.request_latency
+        else:
+            if self.batch_stats and ipv4_count:
+                # Length of every ip:<ip_address> term and the OR operator
+                term_length = ipv4_length / ipv4_count + 7
+                batch_size = max(
+                    int(Analyzer.ANALYZE_STATS_QUERY_MAX_LENGTH // term_length), 1
+                )
+                stats_request_count = -(-ipv4_ip_count // batch_size) + ipv6_ip_count
+            else:
+                stats_request_count = ip_count
+            quick_request_count = -(-ip_count // quick_chunk_size)
+            requests = {
+                self.api.EP_NOISE_MULTI: quick_request_count,
+                self.api.EP_GNQL_STATS: stats_request_count,
+            }
+            request_time = (
+                quick_request_count + stats_request_count / float(self.max_workers)
+            ) * self.request_latency
+
+        if self.requests_per_second:
+            request_time = max(
+                request_time, sum(requests.values()) / self.requests_per_second
+            )
+
+        return {
+            "line_count": line_count,
+            "ip_count": ip_count,
+            "ip_count_error": ipv4_sketch.error,
+            "requests": requests,
+            "scan_time": scan_time,
+            "projected_time": scan_time + request_time,
+        }
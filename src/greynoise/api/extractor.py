@@ -0,0 +1,363 @@
+"""IP address extractor module."""
+
+import abc
+import functools
+import ipaddress
+import re
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize_ipv6(ip_address):
+    """Get the canonical form of an IPv6 address.
+
+    The same address might be written in different ways (leading zeros, upper
+    case or compressed groups). The canonical form is the compressed lower case
+    one, except for IPv4-mapped addresses that are mapped to the IPv4 address.
+
+    :param ip_address: IPv6 address as found in the text.
+    :type ip_address: str
+    :return: Canonical IP address or None if the address is not valid.
+    :rtype: str | None
+
+    """
+    try:
+        address = ipaddress.IPv6Address(ip_address)
+    except ValueError:
+        return None
+    if address.ipv4_mapped is not None:
+        return str(address.ipv4_mapped)
+    return address.compressed
+
+
+class Extractor(abc.ABC):
+    """Extract IP addresses from lines.
+
+    Extractors work both with ``str`` and bytes-like lines. For every line, they
+    return the IP address matches (``re.Match`` objects) found in that line, so
+    callers can get both the IP address values and their offsets in the line.
+    Subclasses implement :meth:`extract` for every input format.
+
+    :param api: API client
+    :type api: greynoise.api.GreyNoise
+    :param fields: Fields to extract IP addresses from.
+    :type fields: list(str) | None
+    :param ipv6: Whether to extract IPv6 addresses too.
+    :type ipv6: bool
+
+    """
+
+    DEFAULT_FIELDS = ()
+
+    def __init__(self, api, fields=None, ipv6=False):
+        if ipv6:
+            self.ip_regex = api.IP_REGEX
+            self.ip_bytes_regex = api.IP_BYTES_REGEX
+        else:
+            self.ip_regex = api.IPV4_REGEX
+            self.ip_bytes_regex = api.IPV4_BYTES_REGEX
+        self.fields = list(fields or self.DEFAULT_FIELDS)
+        self.ipv6 = ipv6
+
+    @abc.abstractmethod
+    def extract(self, line):
+        """Extract IP addresses from a line.
+
+        :param line: Line being processed.
+        :type line: str | bytes
+        :return:
+            IP address matches in the line or None if the line is a header
+            that doesn't contain any data.
+        :rtype: list(re.Match) | None
+
+        """
+
+    def skip(self, line):
+        """Process a line that is skipped without extracting IP addresses.
+
+        Extractors for formats with headers use this to keep track of them.
+
+        :param line: Line being skipped.
+        :type line: str | bytes
+
+        """
+
+    def findall(self, line):
+        """Extract IP address values from a line.
+
+        :param line: Line being processed.
+        :type line: str | bytes
+        :return: IP addresses in the line
+        :rtype: list(str) | list(bytes)
+
+        """
+        return [match.group(0) for match in self.extract(line) or ()]
+
+    def _extract_from_spans(self, line, spans):
+        """Extract IP addresses from the given spans of a line.
+
+        :param line: Line being processed.
+        :type line: str | bytes
+        :param spans: Start and end offsets of the field values.
+        :type spans: list(tuple(int, int))
+        :return: IP address matches in the line
+        :rtype: list(re.Match)
+
+        """
+        ip_regex = self.ip_regex if isinstance(line, str) else self.ip_bytes_regex
+        matches = []
+        for start, end in spans:
+            matches.extend(ip_regex.finditer(line, start, end))
+        return self._valid_matches(matches)
+
+    def _valid_matches(self, matches):
+        """Discard IPv6 matches that are not valid addresses.
+
+        IPv6 matches might have too many groups, since that's not checked by the
+        regular expression, so they're validated.
+
+        :param matches: IP address matches
+        :type matches: iterable(re.Match)
+        :return: Valid IP address matches
+        :rtype: list(re.Match)
+
+        """
+        if not self.ipv6:
+            return list(matches)
+        valid_matches = []
+        for match in matches:
+            ip_address = match.group(0)
+            if not isinstance(ip_address, str):
+                ip_address = ip_address.decode("ascii")
+            if ":" not in ip_address or normalize_ipv6(ip_address) is not None:
+                valid_matches.append(match)
+        return valid_matches
+
+
+class TextExtractor(Extractor):
+    """Extract IP addresses found anywhere in a line."""
+
+    def extract(self, line):
+        """Extract IP addresses from a line.
+
+        :param line: Line being processed.
+        :type line: str | bytes
+        :return: IP address matches in the line
+        :rtype: list(re.Match)
+
+        """
+        ip_regex = self.ip_regex if isinstance(line, str) else self.ip_bytes_regex
+        return self._valid_matches(ip_regex.finditer(line))
+
+    def findall(self, line):
+        """Extract IP address values from a line.
+
+        :param line: Line being processed.
+        :type line: str | bytes
+        :return: IP addresses in the line
+        :rtype: list(str) | list(bytes)
+
+        """
+        if self.ipv6:
+            return super(TextExtractor, self).findall(line)
+        ip_regex = self.ip_regex if isinstance(line, str) else self.ip_bytes_regex
+        return ip_regex.findall(line)
+
+
+class JSONExtractor(Extractor):
+    """Extract IP addresses from the given fields in JSON lines.
+
+    Records are not parsed. Instead, the string value for every field is located
+    using a regular expression that matches the ``"field": "value"`` pair. Fields
+    are matched by key name at any nesting level.
+
+    """
+
+    DEFAULT_FIELDS = ("src_ip", "dest_ip")
+
+    def __init__(self, api, fields=None, ipv6=False):
+        super(JSONExtractor, self).__init__(api, fields, ipv6)
+        field_pattern = r'"(?:{})"\s*:\s*"((?:[^"\\]|\\.)*)"'.format(
+            "|".join(re.escape(field) for field in self.fields)
+        )
+        self.field_regex = re.compile(field_pattern)
+        self.field_bytes_regex = re.compile(field_pattern.encode("utf-8"))
+
+    def extract(self, line):
+        """Extract IP addresses from the values of the given fields.
+
+        :param line: Line being processed.
+        :type line: str | bytes
+        :return: IP address matches in the line
+        :rtype: list(re.Match)
+
+        """
+        if isinstance(line, str):
+            field_regex = self.field_regex
+        else:
+            field_regex = self.field_bytes_regex
+        spans = [match.span(1) for match in field_regex.finditer(line)]
+        return self._extract_from_spans(line, spans)
+
+
+class EVEExtractor(JSONExtractor):
+    """Extract IP addresses from Suricata EVE JSON records."""
+
+    DEFAULT_FIELDS = ("src_ip", "dest_ip")
+
+
+class CSVExtractor(Extractor):
+    """Extract IP addresses from the given columns in CSV lines.
+
+    Columns are selected either by name, in which case the first line is used as
+    the header, or by a zero-based index.
+
+    """
+
+    DEFAULT_FIELDS = ("src_ip", "dest_ip")
+    DELIMITER = ","
+
+    def __init__(self, api, fields=None, ipv6=False):
+        super(CSVExtractor, self).__init__(api, fields, ipv6)
+        self.columns = None
+        if all(field.isdigit() for field in self.fields):
+            self.columns = sorted(int(field) for field in self.fields)
+
+        # A field is a sequence of unquoted characters and quoted sections
+        field_pattern = r'(?:[^{0}"]|"[^"]*")*'.format(re.escape(self.DELIMITER))
+        self.field_regex = re.compile(field_pattern)
+        self.field_bytes_regex = re.compile(field_pattern.encode("utf-8"))
+        self.delimiter_bytes = self.DELIMITER.encode("utf-8")
+
+    def extract(self, line):
+        """Extract IP addresses from the values of the given columns.
+
+        :param line: Line being processed.
+        :type line: str | bytes
+        :return:
+            IP address matches in the line or None if the line is the header.
+        :rtype: list(re.Match) | None
+
+        """
+        if isinstance(line, memoryview):
+            line = line.tobytes()
+        if self.columns is None:
+            self._set_columns(line)
+            return None
+        if not self.columns:
+            return []
+
+        spans = self._field_spans(line, self.columns[-1])
+        return self._extract_from_spans(
+            line, [spans[column] for column in self.columns if column < len(spans)]
+        )
+
+    def skip(self, line):
+        """Get the selected columns from the header if it's skipped.
+
+        :param line: Line being skipped.
+        :type line: str | bytes
+
+        """
+        if self.columns is None:
+            self.extract(line)
+
+    def _set_columns(self, line):
+        """Get the index of the selected columns from the header.
+
+        :param line: Header line
+        :type line: str | bytes
+
+        """
+        if not isinstance(line, str):
+            line = line.decode("utf-8", "replace")
+        names = [
+            line[start:end].strip().strip('"')
+            for start, end in self._field_spans(line)
+        ]
+        self.columns = sorted(
+            index for index, name in enumerate(names) if name in self.fields
+        )
+
+    def _field_spans(self, line, last_column=None):
+        """Get start and end offsets of the fields in a line.
+
+        :param line: Line being processed.
+        :type line: str | bytes
+        :param last_column: Stop when this column is found.
+        :type last_column: int | None
+        :return: Start and end offset for each field
+        :rtype: list(tuple(int, int))
+
+        """
+        if isinstance(line, str):
+            field_regex = self.field_regex
+            delimiter = self.DELIMITER
+        else:
+            field_regex = self.field_bytes_regex
+            delimiter = self.delimiter_bytes
+
+        spans = []
+        start = 0
+        while last_column is None or len(spans) <= last_column:
+            end = field_regex.match(line, start).end()
+            spans.append((start, end))
+            if not line.startswith(delimiter, end):
+                break
+            start = end + 1
+        return spans
+
+
+class ZeekExtractor(CSVExtractor):
+    """Extract IP addresses from the given columns in Zeek TSV logs.
+
+    Column names are taken from the ``#fields`` header line and every other line
+    that starts with ``#`` is considered a header as well.
+
+    """
+
+    DEFAULT_FIELDS = ("id.orig_h", "id.resp_h")
+    DELIMITER = "\t"
+
+    def extract(self, line):
+        """Extract IP addresses from the values of the given columns.
+
+        :param line: Line being processed.
+        :type line: str | bytes
+        :return:
+            IP address matches in the line or None if the line is a header.
+        :rtype: list(re.Match) | None
+
+        """
+        if isinstance(line, memoryview):
+            line = line.tobytes()
+        header_prefix = "#" if isinstance(line, str) else b"#"
+        if not line.startswith(header_prefix):
+            if self.columns is None:
+                return []
+            return super(ZeekExtractor, self).extract(line)
+
+        fields_prefix = "#fields\t" if isinstance(line, str) else b"#fields\t"
+        if line.startswith(fields_prefix):
+            _, _, names = line.partition(fields_prefix)
+            self._set_columns(names)
+        return None
+
+    def skip(self, line):
+        """Get the selected columns from header lines if they're skipped.
+
+        :param line: Line being skipped.
+        :type line: str | bytes
+
+        """
+        header_prefix = "#" if isinstance(line, str) else b"#"
+        if line[:1] == header_prefix:
+            self.extract(line)
+
+
+EXTRACTORS = {
+    "text": TextExtractor,
+    "jsonl": JSONExtractor,
+    "eve": EVEExtractor,
+    "csv": CSVExtractor,
+    "zeek": ZeekExtractor,
+}
@@ -1,6 +1,22 @@
 """Filter module."""
 
-import more_itertools
+import collections
+import json
+
+import cachetools
+import structlog
+
+from greynoise.api.chunker import Chunker, round_up
+from greynoise.api.extractor import EXTRACTORS, normalize_ipv6
+
+LOGGER = structlog.get_logger()
+
+ClassifiedLine = collections.namedtuple(
+    "ClassifiedLine", ["line", "ip_addresses", "routes"]
+)
+ClassifiedIPAddress = collections.namedtuple(
+    "ClassifiedIPAddress", ["ip_address", "start", "end", "noise", "riot"]
+)
 
 
 class Filter(object):
@@ -8,19 +24,91 @@ class Filter(object):
 
     :param api: API client
     :type api: greynoise.api.GreyNoise
+    :param input_format:
+        Input format (text, jsonl, eve, csv or zeek). For structured formats,
+        IP addresses are extracted only from the given fields.
+    :type input_format: str
+    :param fields: Fields or columns to extract IP addresses from.
+    :type fields: list(str) | None
+    :param chunk_bytes:
+        Maximum size of the chunks of lines filtered at once. Defaults to
+        ``FILTER_CHUNK_BYTES``.
+    :type chunk_bytes: int | None
+    :param chunk_ip_addresses:
+        Maximum number of unique IP addresses in every chunk, rounded up to fill
+        whole quick requests. Defaults to ``FILTER_CHUNK_IP_ADDRESSES``.
+    :type chunk_ip_addresses: int | None
+    :param line_cache_size:
+        Maximum number of lines in the LRU cache of filtered lines. Lines found in
+        the cache are not scanned again for IP addresses. Disabled if zero.
+    :type line_cache_size: int
+    :param ipv6:
+        Whether to extract IPv6 addresses too. IPv6 addresses are looked up in
+        their canonical form.
+    :type ipv6: bool
 
     """
 
-    FILTER_TEXT_CHUNK_SIZE = 10000
+    FILTER_CHUNK_BYTES = 16 * 1024 * 1024
+    FILTER_CHUNK_IP_ADDRESSES = 10000
+    # Deprecated: chunks used to have a fixed number of lines
+    FILTER_TEXT_CHUNK_SIZE = FILTER_CHUNK_IP_ADDRESSES
 
-    def __init__(self, api):
+    ROUTES = ("noise", "riot", "clean")
+
+    MARKUP = {
+        "noise": "<noise>{}</noise>",
+        "not-noise": "<not-noise>{}</not-noise>",
+        "riot": "<riot>{}</riot>",
+    }
+
+    def __init__(
+        self,
+        api,
+        input_format="text",
+        fields=None,
+        chunk_bytes=None,
+        chunk_ip_addresses=None,
+        line_cache_size=0,
+        ipv6=False,
+    ):
+        if input_format not in EXTRACTORS:
+            raise ValueError("Unknown input format: {!r}".format(input_format))
         self.api = api
+        self.input_format = input_format
+        self.fields = fields
+        self.chunk_bytes = chunk_bytes or self.FILTER_CHUNK_BYTES
+        self.chunk_ip_addresses = round_up(
+            chunk_ip_addresses or self.FILTER_CHUNK_IP_ADDRESSES,
+            api.IP_QUICK_CHECK_CHUNK_SIZE,
+        )
+        self.line_cache_size = line_cache_size
+        self.ipv6 = ipv6
+        self.statistics = collections.Counter()
 
-    def filter(self, text, noise_only, riot_only):
+    @property
+    def line_cache_hit_rate(self):
+        """Ratio of lines found in the line cache during the last filter call."""
+        hits = self.statistics["line_cache_hits"]
+        lookups = hits + self.statistics["line_cache_misses"]
+        if lookups == 0:
+            return 0.0
+        return float(hits) / lookups
+
+    def filter(self, text, noise_only, riot_only, markup=None):
         """Filter lines that contain IP addresses from a given text.
 
+        Lines might be either ``str`` or bytes-like objects (a ``bytes`` text,
+        a file opened in binary mode or :class:`greynoise.api.reader.MappedLines`).
+        Bytes-like lines are never decoded: IP addresses are extracted with
+        ``IPV4_BYTES_REGEX``, markup is inserted as bytes and chunks are yielded as
+        ``bytes``, so input that is not valid UTF-8 is passed through as it is.
+
+        Line counts, including line cache hits and misses, are kept in
+        :attr:`statistics` and logged once all lines have been filtered.
+
         :param text: Text input
-        :type text: file-like | str
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
         :param noise_only:
             If set, return only lines that contain IP addresses classified as noise,
             otherwise, return lines that contain IP addresses not classified as noise.
@@ -29,116 +117,524 @@ class Filter(object):
             If set, return only lines that contain IP addresses in RIOT,
             otherwise, return lines that contain IP addresses not in RIOT.
         :type riot_only: bool
+        :param markup:
+            Templates used to surround IP addresses for each tag. Defaults to
+            ``<tag>...</tag>`` markup. If empty, lines are not modified.
+        :type markup: dict(str, str)
         :return: Iterator that yields lines in chunks
         :rtype: iterable
 
         """
-        if isinstance(text, str):
-            text = text.splitlines(True)
-        chunks = more_itertools.chunked(text, self.FILTER_TEXT_CHUNK_SIZE)
+        if noise_only:
+            route = "noise"
+        elif riot_only:
+            route = "riot"
+        else:
+            route = "clean"
+
+        chunks, line_cache = self._get_chunks(text)
         for chunk in chunks:
-            yield self._filter_chunk(chunk, noise_only, riot_only)
+            routed_lines = self._route_chunk(chunk, [route], markup, line_cache)
+            yield join_lines(chunk, routed_lines[route])
+        self._log_statistics(line_cache)
+
+    def split(self, text, sinks, markup=None, summary=None):
+        """Split lines into noise, RIOT and clean lines in a single pass.
+
+        Every line is scanned and its IP addresses looked up just once. Lines are
+        routed to the following outputs:
 
-    def _filter_chunk(self, text, noise_only, riot_only):  # noqa: C901
-        """Filter chunk of lines that contain IP addresses from a given text.
+        - noise: all the IP addresses in the line are classified as noise
+        - riot: all the IP addresses in the line are in RIOT
+        - clean: any other line (that is, lines selected by :meth:`filter` when
+          neither ``noise_only`` nor ``riot_only`` are set)
+
+        A line goes to both the noise and the RIOT outputs when it matches both of
+        them. Lines that don't contain data (such as CSV headers) are written to
+        all outputs.
 
         :param text: Text input
-        :type text: str
-        :param noise_only:
-            If set, return only lines that contain IP addresses classified as noise,
-            otherwise, return lines that contain IP addresses not classified as noise.
-        :type noise_only: bool
-        :param riot_only:
-            If set, return only lines that contain IP addresses in RIOT,
-            otherwise, return lines that contain IP addresses not in RIOT.
-        :type riot_only: bool
-        :return: Filtered line
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :param sinks:
+            Output for each route. Outputs are either file-like objects or
+            callables that are passed the lines in chunks. Lines for routes
+            without an output are discarded.
+        :type sinks: dict(str, file-like | callable)
+        :param markup:
+            Templates used to surround IP addresses for each tag. Defaults to
+            ``<tag>...</tag>`` markup. If empty, lines are not modified.
+        :type markup: dict(str, str)
+        :param summary:
+            Output for the classification of every IP address found. One JSON
+            object with the noise, RIOT and code values is written per line for
+            each IP address, the first time it's found.
+        :type summary: file-like | callable | None
+        :raises ValueError: when the sinks contain an unknown route.
+
+        """
+        unknown_routes = set(sinks) - set(self.ROUTES)
+        if unknown_routes:
+            raise ValueError("Unknown routes: {}".format(", ".join(unknown_routes)))
+        writers = {route: get_writer(sink) for route, sink in sinks.items()}
+
+        write_summary = None
+        if summary is not None:
+            write_summary = SummaryWriter(get_writer(summary))
+
+        chunks, line_cache = self._get_chunks(text)
+        for chunk in chunks:
+            routed_lines = self._route_chunk(
+                chunk, list(writers), markup, line_cache, write_summary
+            )
+            for route, lines in routed_lines.items():
+                if lines:
+                    writers[route](join_lines(chunk, lines))
+        self._log_statistics(line_cache)
+
+    def classify_lines(self, text):
+        """Classify the IP addresses found in every line.
+
+        Lines are processed in chunks, the same way as in :meth:`filter`, but
+        instead of marked up text, a record is yielded for every line with the
+        IP addresses found in it, their offsets and their classification. The
+        line cache is not used.
+
+        IP addresses have the same type as the lines (``str`` or ``bytes``) and
+        their offsets can be used to slice the line. Lines that don't contain data
+        (such as CSV headers) are yielded with ``ip_addresses`` set to None and
+        routed to all outputs.
+
+        :param text: Text input
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :return:
+            Iterator that yields the line, the IP addresses in it and the routes
+            the line belongs to (noise, riot or clean, as in :meth:`split`).
+        :rtype: iterable(ClassifiedLine)
+
+        """
+        chunks, _ = self._get_chunks(text, use_line_cache=False)
+        for chunk in chunks:
+            for classified_line in self._classify_chunk(chunk):
+                yield classified_line
+        self._log_statistics(None)
+
+    def _get_chunks(self, text, use_line_cache=True):
+        """Split text in chunks with the IP addresses extracted from every line.
+
+        :param text: Text input
+        :type text: file-like | str | bytes | greynoise.api.reader.MappedLines
+        :param use_line_cache: Whether to use the line cache if enabled.
+        :type use_line_cache: bool
+        :return: Iterator that yields chunks and the line cache (if enabled).
+        :rtype: tuple(iterable(greynoise.api.chunker.Chunk), LineCache | None)
+
+        """
+        if isinstance(text, (str, bytes)):
+            text = text.splitlines(True)
+        self.statistics.clear()
+        extractor = EXTRACTORS[self.input_format](self.api, self.fields, self.ipv6)
+        line_cache = None
+        if self.line_cache_size and use_line_cache:
+            extractor = line_cache = LineCache(
+                extractor, self.line_cache_size, self.statistics
+            )
+        chunker = Chunker(extractor, self.chunk_bytes, self.chunk_ip_addresses)
+        return chunker.chunks(text), line_cache
+
+    def _log_statistics(self, line_cache):
+        """Log statistics once all lines have been processed.
+
+        :param line_cache: Cache used to store the output for each line.
+        :type line_cache: LineCache | None
 
         """
-        text_ip_addresses = set()
-        for input_line in text:
-            text_ip_addresses.update(self.api.IPV4_REGEX.findall(input_line))
+        if line_cache is not None:
+            LOGGER.debug(
+                "Lines filtered",
+                line_cache_hit_rate=self.line_cache_hit_rate,
+                **self.statistics
+            )
+        else:
+            LOGGER.debug("Lines filtered", **self.statistics)
+
+    def _lookup_chunk(self, chunk, binary, write_summary=None):
+        """Look up the IP addresses in a chunk.
+
+        :param chunk: Lines with the IP addresses already extracted from them.
+        :type chunk: greynoise.api.chunker.Chunk
+        :param binary: Whether lines are bytes-like objects.
+        :type binary: bool
+        :param write_summary: Callable passed the results for the IP addresses.
+        :type write_summary: callable | None
+        :return: IP addresses classified as noise and IP addresses in RIOT.
+        :rtype: tuple(set, set)
 
-        noise_ip_addresses = []
-        riot_ip_addresses = []
+        """
+        # Results are classified using the same type as the input lines,
+        # so IP addresses are decoded just once when passed to the API.
+        # IPv6 addresses written in different ways are looked up just once.
+        ip_address_keys = collections.defaultdict(list)
+        for ip_address in chunk.ip_addresses:
+            key = ip_address.decode("ascii") if binary else ip_address
+            if self.ipv6 and ":" in key:
+                key = normalize_ipv6(key)
+            ip_address_keys[key].append(ip_address)
+
+        noise_ip_addresses = set()
+        riot_ip_addresses = set()
 
-        for result in self.api.quick(text_ip_addresses):
+        results = self.api.quick(list(ip_address_keys))
+        for result in results:
+            ip_addresses = ip_address_keys.get(result["ip"], [result["ip"]])
             if result["noise"]:
-                noise_ip_addresses.append(result["ip"])
+                noise_ip_addresses.update(ip_addresses)
             if result["riot"]:
-                riot_ip_addresses.append(result["ip"])
+                riot_ip_addresses.update(ip_addresses)
+        if write_summary is not None:
+            write_summary(results)
 
-        def all_ip_addresses_noisy(line):
-            """Select lines that contain IP addresses and all of them are noisy.
+        return noise_ip_addresses, riot_ip_addresses
 
-            :param line: Line being processed.
-            :type line: str
-            :return: True if line contains IP addresses and all of them are noisy.
-            :rtype: bool
+    def _classify_chunk(self, chunk):
+        """Classify the IP addresses found in every line in a chunk.
 
-            """
-            line_ip_addresses = self.api.IPV4_REGEX.findall(line)
-            return line_ip_addresses and all(
-                line_ip_address in noise_ip_addresses
-                for line_ip_address in line_ip_addresses
+        :param chunk: Lines with the IP addresses already extracted from them.
+        :type chunk: greynoise.api.chunker.Chunk
+        :return: Record for each line
+        :rtype: list(ClassifiedLine)
+
+        """
+        binary = not isinstance(chunk.lines[0], str)
+        noise_ip_addresses, riot_ip_addresses = self._lookup_chunk(chunk, binary)
+
+        classified_lines = []
+        for input_line, ip_spans in zip(chunk.lines, chunk.ip_spans):
+            if ip_spans is None:
+                classified_lines.append(
+                    ClassifiedLine(input_line, None, list(self.ROUTES))
+                )
+                continue
+
+            line_ip_addresses = get_span_values(input_line, ip_spans)
+            ip_addresses = [
+                ClassifiedIPAddress(
+                    ip_address,
+                    start,
+                    end,
+                    ip_address in noise_ip_addresses,
+                    ip_address in riot_ip_addresses,
+                )
+                for ip_address, (start, end) in zip(line_ip_addresses, ip_spans)
+            ]
+            routes = get_line_routes(
+                line_ip_addresses, noise_ip_addresses, riot_ip_addresses
             )
+            classified_lines.append(ClassifiedLine(input_line, ip_addresses, routes))
+
+        self.statistics["lines"] += len(classified_lines)
+        return classified_lines
+
+    def _route_chunk(  # noqa: C901
+        self, chunk, routes, markup, line_cache=None, write_summary=None
+    ):
+        """Route every line in a chunk to the outputs it belongs to.
 
-        def all_ip_addresses_riot(line):
-            """Select lines that contain IP addresses and all of them are in RIOT.
+        Lines that don't contain data (such as CSV headers) are routed to all the
+        outputs. Only lines routed to at least one of the given routes are
+        marked up.
+
+        :param chunk: Lines with the IP addresses already extracted from them.
+        :type chunk: greynoise.api.chunker.Chunk
+        :param routes: Routes to get lines for (noise, riot or clean).
+        :type routes: list(str)
+        :param markup: Templates used to surround IP addresses for each tag.
+        :type markup: dict(str, str) | None
+        :param line_cache: Cache used to store the output for each line.
+        :type line_cache: LineCache | None
+        :param write_summary: Callable passed the results for the IP addresses.
+        :type write_summary: callable | None
+        :return: Lines for each one of the routes.
+        :rtype: dict(str, list(str) | list(bytes))
+
+        """
+        if markup is None:
+            markup = self.MARKUP
+        text = chunk.lines
+        binary = not isinstance(text[0], str)
+        if binary:
+            markup = {
+                tag: template.encode("utf-8") for tag, template in markup.items()
+            }
+
+        noise_ip_addresses, riot_ip_addresses = self._lookup_chunk(
+            chunk, binary, write_summary
+        )
+
+        def add_markup(line, ip_spans, line_ip_addresses):
+            """Add markup to surround IP address values with proper tag.
 
             :param line: Line being processed.
-            :type line: str
-            :return: True if line contains IP addresses and all of them are noisy.
-            :rtype: bool
+            :type line: str | bytes
+            :param ip_spans: Start and end offsets of the IP addresses in the line.
+            :type ip_spans: list(tuple(int, int))
+            :param line_ip_addresses: IP addresses in the line.
+            :type line_ip_addresses: list(str) | list(bytes)
+            :return: Line with markup
+            :rtype: str | bytes
 
             """
-            line_ip_addresses = self.api.IPV4_REGEX.findall(line)
-            return line_ip_addresses and all(
-                line_ip_address in riot_ip_addresses
-                for line_ip_address in line_ip_addresses
-            )
+            line_parts = []
+            position = 0
+            for ip_address, (start, end) in zip(line_ip_addresses, ip_spans):
+                if ip_address in noise_ip_addresses:
+                    tag = "noise"
+                elif ip_address in riot_ip_addresses:
+                    tag = "riot"
+                else:
+                    tag = "not-noise"
 
-        def add_markup(match):
-            """Add markup to surround IP address value with proper tag.
+                line_parts.append(line[position:start])
+                if binary:
+                    line_parts.append(markup[tag].replace(b"{}", ip_address))
+                else:
+                    line_parts.append(markup[tag].format(ip_address))
+                position = end
+            line_parts.append(line[position:])
 
-            :param match: IP address match
-            :type match: re.Match
-            :return: IP address with markup
-            :rtype: str
+            if binary:
+                return b"".join(line_parts)
+            return "".join(line_parts)
 
-            """
-            ip_address = match.group(0)
-            if ip_address in noise_ip_addresses:
-                tag = "noise"
-            elif ip_address in riot_ip_addresses:
-                tag = "riot"
+        # Lines are scanned just once while chunking, spans are used both
+        # to route lines and to add markup to them
+        routed_lines = {route: [] for route in routes}
+        for input_line, ip_spans in zip(text, chunk.ip_spans):
+            if ip_spans is None:
+                for lines in routed_lines.values():
+                    lines.append(input_line)
+                continue
+
+            if isinstance(ip_spans, CachedLine):
+                line_routes = ip_spans.routes
+                output_line = ip_spans.output
             else:
-                tag = "not-noise"
+                line_ip_addresses = get_span_values(input_line, ip_spans)
+                line_routes = [
+                    route
+                    for route in get_line_routes(
+                        line_ip_addresses, noise_ip_addresses, riot_ip_addresses
+                    )
+                    if route in routed_lines
+                ]
+                if not line_routes:
+                    output_line = None
+                elif ip_spans and markup:
+                    output_line = add_markup(input_line, ip_spans, line_ip_addresses)
+                else:
+                    # Lines without IP addresses (or any line when there are no
+                    # markup templates) are kept as they are in the input
+                    output_line = input_line
+                if line_cache is not None:
+                    line_cache.resolve(line_routes, output_line)
 
-            return "<{tag}>{ip_address}</{tag}>".format(ip_address=ip_address, tag=tag)
+            for route in line_routes:
+                routed_lines[route].append(output_line)
 
-        if noise_only:
-            line_matches = all_ip_addresses_noisy
-        elif riot_only:
-            line_matches = all_ip_addresses_riot
+        self.statistics["lines"] += len(text)
+        for route, lines in routed_lines.items():
+            self.statistics["{}_lines".format(route)] += len(lines)
+        return routed_lines
+
+
+class CachedLine(list):
+    """Line found in the line cache.
+
+    This is an empty list of IP address spans, so that the chunker doesn't look
+    up IP addresses again for repeated lines.
+
+    :ivar routes: Routes the line is written to.
+    :ivar output: Line with markup or None if the line is discarded.
+
+    """
+
+    def __init__(self):
+        super(CachedLine, self).__init__()
+        self.routes = []
+        self.output = None
+
+
+class LineCache(object):
+    """LRU cache with the output for each line already filtered.
+
+    Repeated lines are common in firewall and load balancer logs. Since the
+    output for a line depends only on its contents, a line found in the cache is
+    neither scanned for IP addresses nor marked up again.
+
+    The cache wraps the extractor, so that it's checked by the chunker before
+    extracting IP addresses from a line. Lines not found in the cache are added
+    right away and their output is set once they are filtered, in the same
+    order, so repeated lines are found in the cache even in the same chunk.
+
+    :param extractor: Extractor used to find IP addresses in lines not cached.
+    :type extractor: greynoise.api.extractor.Extractor
+    :param maxsize: Maximum number of lines in the cache.
+    :type maxsize: int
+    :param statistics: Counter updated with the cache hits and misses.
+    :type statistics: collections.Counter
+
+    """
+
+    def __init__(self, extractor, maxsize, statistics):
+        self.extractor = extractor
+        self.cache = cachetools.LRUCache(maxsize=maxsize)
+        self.pending = collections.deque()
+        self.statistics = statistics
+
+    def extract(self, line):
+        """Extract IP addresses from lines that are not in the cache.
+
+        :param line: Line being processed.
+        :type line: str | bytes
+        :return:
+            Cached line, IP address matches in the line or None if the line
+            is a header.
+        :rtype: CachedLine | list(re.Match) | None
+
+        """
+        try:
+            cached_line = self.cache[line]
+        except KeyError:
+            pass
         else:
+            self.statistics["line_cache_hits"] += 1
+            return cached_line
 
-            def line_matches(line):
-                """Match all lines that contain either text or non-noisy lines.
+        self.statistics["line_cache_misses"] += 1
+        ip_matches = self.extractor.extract(line)
+        if ip_matches is None:
+            # Header lines might change how the following lines are parsed
+            self.cache.clear()
+            return None
 
-                :param line: Line being processed.
-                :type line: str
-                :return: True if line matches as expected.
-                :rtype: bool
+        cached_line = CachedLine()
+        self.pending.append(cached_line)
+        if isinstance(line, memoryview):
+            # Don't keep references to memory mapped files
+            line = line.tobytes()
+        self.cache[line] = cached_line
+        return ip_matches
 
-                """
-                return not all_ip_addresses_noisy(line) and not all_ip_addresses_riot(
-                    line
-                )
+    def resolve(self, routes, output):
+        """Set the output for the oldest line not found in the cache.
 
-        filtered_lines = [
-            self.api.IPV4_REGEX.subn(add_markup, input_line)[0]
-            for input_line in text
-            if line_matches(input_line)
-        ]
-        return "".join(filtered_lines)
+        :param routes: Routes the line is written to.
+        :type routes: list(str)
+        :param output: Line with markup or None if the line is discarded.
+        :type output: str | bytes | None
+
+        """
+        if isinstance(output, memoryview):
+            output = output.tobytes()
+        cached_line = self.pending.popleft()
+        cached_line.routes = routes
+        cached_line.output = output
+
+
+class SummaryWriter(object):
+    """Write the classification of every IP address the first time it's found.
+
+    :param write: Callable used to write JSON lines.
+    :type write: callable
+
+    """
+
+    SUMMARY_KEYS = ("ip", "noise", "riot", "code")
+
+    def __init__(self, write):
+        self.write = write
+        self.ip_addresses = set()
+
+    def __call__(self, results):
+        """Write the results for the IP addresses not found before.
+
+        :param results: Results returned by the quick method.
+        :type results: list(dict)
+
+        """
+        records = []
+        for result in results:
+            if result["ip"] in self.ip_addresses:
+                continue
+            self.ip_addresses.add(result["ip"])
+            record = {key: result.get(key) for key in self.SUMMARY_KEYS}
+            records.append(json.dumps(record) + "\n")
+        if records:
+            self.write("".join(records))
+
+
+def get_span_values(line, spans):
+    """Get the values at some spans of a line.
+
+    :param line: Line with the values.
+    :type line: str | bytes | memoryview
+    :param spans: Start and end offsets of every value.
+    :type spans: list(tuple(int, int))
+    :return: Values (as bytes for memory mapped lines).
+    :rtype: list(str) | list(bytes)
+
+    """
+    if isinstance(line, memoryview):
+        return [line[start:end].tobytes() for start, end in spans]
+    return [line[start:end] for start, end in spans]
+
+
+def get_line_routes(line_ip_addresses, noise_ip_addresses, riot_ip_addresses):
+    """Get the routes for a line given the IP addresses found in it.
+
+    :param line_ip_addresses: IP addresses in the line.
+    :type line_ip_addresses: list
+    :param noise_ip_addresses: IP addresses classified as noise.
+    :type noise_ip_addresses: set
+    :param riot_ip_addresses: IP addresses in RIOT.
+    :type riot_ip_addresses: set
+    :return: Routes for the line (noise, riot or clean).
+    :rtype: list(str)
+
+    """
+    routes = []
+    if line_ip_addresses:
+        if noise_ip_addresses.issuperset(line_ip_addresses):
+            routes.append("noise")
+        if riot_ip_addresses.issuperset(line_ip_addresses):
+            routes.append("riot")
+    if not routes:
+        routes.append("clean")
+    return routes
+
+
+def get_writer(sink):
+    """Get callable used to write to a sink.
+
+    :param sink: File-like object or callable.
+    :type sink: file-like | callable
+    :return: Callable used to write lines.
+    :rtype: callable
+
+    """
+    return getattr(sink, "write", sink)
+
+
+def join_lines(chunk, lines):
+    """Join lines using the same type as the lines in the chunk.
+
+    :param chunk: Chunk the lines come from.
+    :type chunk: greynoise.api.chunker.Chunk
+    :param lines: Lines to join.
+    :type lines: list(str) | list(bytes)
+    :return: Joined lines
+    :rtype: str | bytes
+
+    """
+    if isinstance(chunk.lines[0], str):
+        return "".join(lines)
+    return b"".join(lines)
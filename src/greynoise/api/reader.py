@@ -0,0 +1,389 @@
+"""Reader module."""
+
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+import queue
+import stat
+import threading
+import time
+
+import structlog
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+LOGGER = structlog.get_logger()
+
+
+def open_zstandard(binary_input):
+    """Open zstandard decompression stream.
+
+    :param binary_input: Compressed input
+    :type binary_input: file-like
+    :return: Decompressed input
+    :rtype: file-like
+    :raises ValueError: when the zstandard package is not installed.
+
+    """
+    if zstandard is None:
+        raise ValueError(
+            "zstd compressed input found, "
+            "but the zstandard package is not installed"
+        )
+    # Files written by pzstd or concatenated together have many frames
+    return zstandard.ZstdDecompressor().stream_reader(
+        binary_input, read_across_frames=True
+    )
+
+
+# Magic bytes at the beginning of the input for each one of the compression formats
+COMPRESSION_FORMATS = (
+    (b"\x1f\x8b", "gzip", lambda binary_input: gzip.GzipFile(fileobj=binary_input)),
+    (b"BZh", "bz2", bz2.BZ2File),
+    (b"\xfd7zXZ\x00", "xz", lzma.LZMAFile),
+    (b"\x28\xb5\x2f\xfd", "zstd", open_zstandard),
+)
+HEADER_SIZE = max(len(magic) for magic, _, _ in COMPRESSION_FORMATS)
+
+
+class PrefixedInput(io.RawIOBase):
+    """Binary input with some bytes already read from it put back in front.
+
+    :param prefix: Bytes already read from the input.
+    :type prefix: bytes
+    :param binary_input: Rest of the input.
+    :type binary_input: file-like
+
+    """
+
+    def __init__(self, prefix, binary_input):
+        super(PrefixedInput, self).__init__()
+        self.prefix = prefix
+        self.binary_input = binary_input
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.prefix:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return size
+        data = self.binary_input.read1(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self):
+        super(PrefixedInput, self).close()
+        self.binary_input.close()
+
+
+class MappedLines(object):
+    """Iterate over the lines of a memory mapped file without copying them.
+
+    Every line is yielded as a read-only ``memoryview`` slice of the mapping, so
+    lines that are written out unchanged never have to be decoded or copied.
+
+    :param mapping: Memory map with the file contents.
+    :type mapping: mmap.mmap
+
+    """
+
+    def __init__(self, mapping):
+        self.mapping = mapping
+        self.view = memoryview(mapping)
+
+    @classmethod
+    def from_file(cls, input_file):
+        """Memory map an input file if it's a regular, non-empty file.
+
+        :param input_file: Input file
+        :type input_file: file-like
+        :return: Mapped lines or None if the input file can't be memory mapped.
+        :rtype: MappedLines | None
+
+        """
+        try:
+            fileno = input_file.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return None
+
+        file_stat = os.fstat(fileno)
+        if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_size == 0:
+            return None
+
+        mapping = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        if hasattr(mapping, "madvise"):
+            # Pages are read only once, let the kernel drop them early
+            mapping.madvise(mmap.MADV_SEQUENTIAL)
+        return cls(mapping)
+
+    def __iter__(self):
+        mapping = self.mapping
+        view = self.view
+        size = len(mapping)
+        start = 0
+        while start < size:
+            end = mapping.find(b"\n", start)
+            end = size if end == -1 else end + 1
+            yield view[start:end]
+            start = end
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.close()
+
+    def close(self):
+        """Release the memory map."""
+        self.view.release()
+        try:
+            self.mapping.close()
+        except BufferError:
+            # Lines yielded are still referenced (for example, from a traceback),
+            # the mapping is closed once they are garbage collected
+            LOGGER.debug("Memory map still in use, not closed")
+
+
+class DecompressedLines(object):
+    """Iterate over the lines of a compressed input.
+
+    Input is decompressed in a background thread, so decompression overlaps with
+    processing the lines already decompressed. Lines are yielded as ``bytes``.
+
+    :param stream: Decompressed input
+    :type stream: file-like
+    :param compression: Compression format name (None if not compressed)
+    :type compression: str | None
+
+    """
+
+    BLOCK_SIZE = 1024 * 1024
+    QUEUE_SIZE = 16
+
+    def __init__(self, stream, compression):
+        self.stream = stream
+        self.compression = compression
+
+    @classmethod
+    def from_file(cls, input_file):
+        """Detect compressed input using the magic bytes at its beginning.
+
+        Input is not consumed while detecting compression, so it can still be read
+        from the beginning when it's not compressed. The only exception is a
+        pipe that has only part of a magic value available (for example, only
+        the first bytes of an xz header): the header is then read until it's
+        complete and, if the input turns out not to be compressed, its lines
+        are yielded as they are (with no compression).
+
+        :param input_file: Input file
+        :type input_file: file-like
+        :return: Decompressed lines or None if the input is not compressed.
+        :rtype: DecompressedLines | None
+        :raises ValueError: when the compression format is not supported.
+
+        """
+        binary_input = getattr(input_file, "buffer", input_file)
+        try:
+            header = binary_input.peek(HEADER_SIZE)
+        except (AttributeError, OSError, ValueError):
+            return None
+
+        header = header[:HEADER_SIZE]
+        prefix = b""
+        if header and len(header) < HEADER_SIZE and cls._is_partial_magic(header):
+            # Peeking returns only the bytes already buffered, which might not
+            # be the whole header when reading from a pipe
+            while len(prefix) < HEADER_SIZE:
+                block = binary_input.read1(HEADER_SIZE - len(prefix))
+                if not block:
+                    break
+                prefix += block
+            header = prefix
+            binary_input = io.BufferedReader(PrefixedInput(prefix, binary_input))
+
+        for magic, compression, open_function in COMPRESSION_FORMATS:
+            if header.startswith(magic):
+                LOGGER.debug("Compressed input found", compression=compression)
+                return cls(open_function(binary_input), compression)
+        if prefix:
+            # Header bytes were consumed, so lines are read from here
+            return cls(binary_input, None)
+        return None
+
+    @staticmethod
+    def _is_partial_magic(header):
+        """Check whether an incomplete header might be a compression magic value.
+
+        :param header: First bytes of the input.
+        :type header: bytes
+        :return: Whether more bytes are needed to detect compression.
+        :rtype: bool
+
+        """
+        return any(
+            len(header) < len(magic) and magic.startswith(header)
+            for magic, _, _ in COMPRESSION_FORMATS
+        )
+
+    def __iter__(self):
+        blocks = queue.Queue(self.QUEUE_SIZE)
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._decompress, args=(blocks, stop), daemon=True
+        )
+        thread.start()
+
+        try:
+            partial_line = b""
+            while True:
+                block = blocks.get()
+                if isinstance(block, Exception):
+                    raise block
+                if not block:
+                    break
+
+                # Keep the last line until the next block is received
+                # since it might not be complete
+                last_newline = block.rfind(b"\n")
+                if last_newline == -1:
+                    partial_line += block
+                    continue
+                lines_end = last_newline + 1
+                lines = io.BytesIO(partial_line + block[:lines_end])
+                partial_line = block[lines_end:]
+                for line in lines:
+                    yield line
+
+            if partial_line:
+                yield partial_line
+        finally:
+            stop.set()
+            thread.join()
+
+    def _decompress(self, blocks, stop):
+        """Decompress input in blocks until it's consumed or iteration stops.
+
+        :param blocks: Queue used to pass decompressed blocks.
+        :type blocks: queue.Queue
+        :param stop: Event set when no more blocks are needed.
+        :type stop: threading.Event
+
+        """
+        try:
+            while True:
+                block = self.stream.read(self.BLOCK_SIZE)
+                if not self._put(blocks, block, stop) or not block:
+                    return
+        except Exception as exception:
+            self._put(blocks, exception, stop)
+
+    def _put(self, blocks, item, stop):
+        """Put item in the queue unless iteration stops.
+
+        :return: Whether the item was put in the queue.
+        :rtype: bool
+
+        """
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.close()
+
+    def close(self):
+        """Close decompression stream."""
+        self.stream.close()
+
+
+class TimedLines(object):
+    """Iterate over lines read in a background thread with a read timeout.
+
+    Every line is yielded along with the wall time when it was read. When no
+    line is read before the timeout, ``None`` is yielded instead of a line, so
+    callers can act on time passing even while the input is quiet. The thread
+    isn't waited for when iteration stops, since it might be blocked reading.
+
+    :param lines: Lines to read.
+    :type lines: iterable(str) | iterable(bytes)
+    :param get_timeout:
+        Called before waiting for every line to get the timeout in seconds
+        (None to wait until a line is read).
+    :type get_timeout: callable
+
+    """
+
+    QUEUE_SIZE = 1024
+
+    def __init__(self, lines, get_timeout):
+        self.lines = lines
+        self.get_timeout = get_timeout
+
+    def __iter__(self):
+        items = queue.Queue(self.QUEUE_SIZE)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._read, args=(items, stop), daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                try:
+                    item = items.get(timeout=self.get_timeout())
+                except queue.Empty:
+                    yield None, time.time()
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                if item is None:
+                    return
+                yield item
+        finally:
+            stop.set()
+
+    def _read(self, items, stop):
+        """Read lines until they're consumed or iteration stops.
+
+        :param items: Queue used to pass lines and the time they were read.
+        :type items: queue.Queue
+        :param stop: Event set when no more lines are needed.
+        :type stop: threading.Event
+
+        """
+        try:
+            for line in self.lines:
+                if not self._put(items, (line, time.time()), stop):
+                    return
+            self._put(items, None, stop)
+        except Exception as exception:
+            self._put(items, exception, stop)
+
+    def _put(self, items, item, stop):
+        """Put item in the queue unless iteration stops.
+
+        :return: Whether the item was put in the queue.
+        :rtype: bool
+
+        """
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -0,0 +1,245 @@
+"""IP address sampling module."""
+
+import collections
+import hashlib
+import math
+
+# Number of standard errors for 95% confidence intervals
+CONFIDENCE_Z = 1.96
+
+
+class Sampler(object):
+    """Sample of unique IP addresses used to estimate ratios for all of them.
+
+    Every IP address is selected (or not) depending only on a hash of it, so the
+    same IP address is always selected and the sample doesn't depend on the
+    order or the chunks in which IP addresses are found (except for the minimum
+    number of IP addresses selected from every group).
+
+    When stratified, IPv4 addresses are grouped by their /16 network (IPv6
+    addresses are a group of their own) and at least ``min_stratum_size`` IP
+    addresses are selected from every group, so small networks are always
+    represented. Ratios are then estimated for every group and weighted by the
+    number of unique IP addresses found in it, and counts are scaled separately
+    for every group (see :meth:`stratum_scale`).
+
+    Confidence intervals are Wilson score intervals for the effective sample
+    size of the design, so they never have zero width unless every IP address
+    was sampled. Groups with a single IP address sampled are pooled together to
+    estimate the variance, since it can't be estimated from one IP address.
+
+    :param rate: Fraction of the unique IP addresses selected (0 to 1).
+    :type rate: float
+    :param stratify: Whether to sample every /16 network separately.
+    :type stratify: bool
+    :param min_stratum_size: Minimum number of IP addresses sampled per network.
+    :type min_stratum_size: int
+
+    """
+
+    def __init__(self, rate, stratify=False, min_stratum_size=1):
+        if not 0 < rate <= 1:
+            raise ValueError("Sample rate must be between 0 and 1")
+        self.rate = rate
+        self.stratify = stratify
+        self.min_stratum_size = min_stratum_size
+        self._threshold = int(rate * 2**64)
+        # Unique IP addresses found, IP addresses sampled and noise and RIOT IP
+        # addresses in the sample for every stratum
+        self.population = collections.Counter()
+        self.sample_sizes = collections.Counter()
+        self.noise_counts = collections.Counter()
+        self.riot_counts = collections.Counter()
+        # Totals for all the strata
+        self.population_size = 0
+        self.sample_size = 0
+
+    @property
+    def scale(self):
+        """Factor used to scale counts from the sample to all IP addresses."""
+        population_size, sample_size = self.population_size, self.sample_size
+        if not sample_size:
+            return 1.0
+        return float(population_size) / sample_size
+
+    def stratum_scale(self, stratum):
+        """Get factor used to scale counts from the sample of a stratum.
+
+        :param stratum: Stratum as returned by :meth:`get_stratum`.
+        :type stratum: str | None
+        :return: Ratio between the IP addresses found and sampled in the stratum.
+        :rtype: float
+
+        """
+        sample_size = self.sample_sizes[stratum]
+        if not sample_size:
+            return 1.0
+        return float(self.population[stratum]) / sample_size
+
+    def sample(self, ip_addresses):
+        """Select IP addresses to look up.
+
+        :param ip_addresses: Unique IP addresses not seen before.
+        :type ip_addresses: iterable(str)
+        :return: IP addresses selected.
+        :rtype: set(str)
+
+        """
+        sampled_ip_addresses = set()
+        # Sorted by hash, so that IP addresses selected to fill small strata are
+        # random too (and the same ones every time)
+        hashed_ip_addresses = sorted(
+            (self._hash(ip_address), ip_address) for ip_address in ip_addresses
+        )
+        for ip_address_hash, ip_address in hashed_ip_addresses:
+            stratum = self.get_stratum(ip_address)
+            self.population[stratum] += 1
+            self.population_size += 1
+            if (
+                ip_address_hash < self._threshold
+                or self.stratify
+                and self.sample_sizes[stratum] < self.min_stratum_size
+            ):
+                self.sample_sizes[stratum] += 1
+                self.sample_size += 1
+                sampled_ip_addresses.add(ip_address)
+        return sampled_ip_addresses
+
+    def add_results(self, results):
+        """Count noise and RIOT IP addresses in the sample.
+
+        :param results: Quick check results for the sampled IP addresses.
+        :type results: greynoise.api.table.QuickResultTable
+
+        """
+        for index in range(len(results)):
+            stratum = self.get_stratum(results.ip_address(index))
+            self.noise_counts[stratum] += results.noise[index]
+            self.riot_counts[stratum] += results.riot[index]
+
+    def summary(self):
+        """Estimate summary for all the unique IP addresses found.
+
+        :return:
+            Estimated noise and RIOT IP address counts and ratios with their 95%
+            confidence intervals.
+        :rtype: dict
+
+        """
+        ip_count = self.population_size
+        noise_ip_ratio, noise_ip_ratio_interval = self._estimate(self.noise_counts)
+        riot_ip_ratio, riot_ip_ratio_interval = self._estimate(self.riot_counts)
+        noise_ip_count = int(round(noise_ip_ratio * ip_count))
+        riot_ip_count = int(round(riot_ip_ratio * ip_count))
+        return {
+            "ip_count": ip_count,
+            "noise_ip_count": noise_ip_count,
+            "not_noise_ip_count": ip_count - noise_ip_count - riot_ip_count,
+            "riot_ip_count": riot_ip_count,
+            "noise_ip_ratio": noise_ip_ratio,
+            "riot_ip_ratio": riot_ip_ratio,
+            "noise_ip_ratio_interval": noise_ip_ratio_interval,
+            "riot_ip_ratio_interval": riot_ip_ratio_interval,
+            "sampled_ip_count": self.sample_size,
+            "sample_rate": self.rate,
+        }
+
+    def _estimate(self, counts):
+        """Estimate ratio of IP addresses with a confidence interval.
+
+        :param counts: Matching IP addresses in the sample for every stratum.
+        :type counts: collections.Counter
+        :return: Estimated ratio and lower and upper bounds.
+        :rtype: tuple(float, list(float))
+
+        """
+        if not self.sample_size:
+            # Nothing is known about the ratio without a sample
+            return 0.0, [0.0, 1.0]
+
+        ratio = 0.0
+        variance = 0.0
+        # Variance for a ratio of 0.5 in every stratum, used when the ratio
+        # can't be told apart from 0 or 1 within each stratum
+        unit_variance = 0.0
+        for stratum_size, sample_size, count in self._get_strata(counts):
+            weight = float(stratum_size) / self.population_size
+            stratum_ratio = float(count) / sample_size
+            ratio += weight * stratum_ratio
+            # Finite population correction, since IP addresses are unique
+            factor = weight**2 * (1 - float(sample_size) / stratum_size) / sample_size
+            variance += factor * stratum_ratio * (1 - stratum_ratio)
+            unit_variance += factor
+
+        if not unit_variance:
+            # Every IP address was sampled, so the ratio is exact
+            return ratio, [ratio, ratio]
+
+        # Size of a simple random sample with the same variance
+        if variance:
+            sample_size = ratio * (1 - ratio) / variance
+        else:
+            sample_size = 1 / unit_variance
+        z2 = CONFIDENCE_Z**2
+        denominator = 1 + z2 / sample_size
+        center = (ratio + z2 / (2 * sample_size)) / denominator
+        margin = (
+            CONFIDENCE_Z
+            * math.sqrt(ratio * (1 - ratio) / sample_size + z2 / (4 * sample_size**2))
+            / denominator
+        )
+        return ratio, [max(center - margin, 0.0), min(center + margin, 1.0)]
+
+    def _get_strata(self, counts):
+        """Get sizes and matching IP addresses for every stratum sampled.
+
+        Strata with a single IP address sampled (unless that's all of them) are
+        pooled into one stratum.
+
+        :param counts: Matching IP addresses in the sample for every stratum.
+        :type counts: collections.Counter
+        :return:
+            Iterator that yields the number of IP addresses found, sampled and
+            matching for every stratum.
+        :rtype: iterable(tuple(int, int, int))
+
+        """
+        pooled_stratum_size = 0
+        pooled_sample_size = 0
+        pooled_count = 0
+        for stratum, sample_size in self.sample_sizes.items():
+            stratum_size = self.population[stratum]
+            if sample_size < 2 and sample_size < stratum_size:
+                pooled_stratum_size += stratum_size
+                pooled_sample_size += sample_size
+                pooled_count += counts[stratum]
+            elif sample_size:
+                yield stratum_size, sample_size, counts[stratum]
+        if pooled_sample_size:
+            yield pooled_stratum_size, pooled_sample_size, pooled_count
+
+    def get_stratum(self, ip_address):
+        """Get stratum for an IP address.
+
+        :param ip_address: IP address.
+        :type ip_address: str
+        :return: /16 network for IPv4 addresses (if stratified).
+        :rtype: str | None
+
+        """
+        if not self.stratify or ":" in ip_address:
+            return None
+        return "{}.0.0/16".format(ip_address.rsplit(".", 2)[0])
+
+    @staticmethod
+    def _hash(ip_address):
+        """Hash IP address consistently across processes.
+
+        :param ip_address: IP address.
+        :type ip_address: str
+        :return: Unsigned 64-bit hash.
+        :rtype: int
+
+        """
+        digest = hashlib.sha1(ip_address.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
@@ -0,0 +1,261 @@
+"""Approximate counting module."""
+
+import array
+import heapq
+import math
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+class CountMinSketch(object):
+    """Count-min sketch to estimate counts in constant memory.
+
+    Estimates are never lower than the true counts and, with probability
+    ``1 - delta``, they are at most ``epsilon * total`` higher, where
+    ``epsilon = e / width`` and ``delta = e ** -depth``.
+
+    :param width: Number of counters in every row.
+    :type width: int
+    :param depth: Number of rows (each one with its own hash function).
+    :type depth: int
+
+    """
+
+    def __init__(self, width=2719, depth=5):
+        if width < 1 or depth < 1:
+            raise ValueError("Sketch width and depth must be positive")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.rows = [array.array("q", bytes(8 * width)) for _ in range(depth)]
+
+    @property
+    def epsilon(self):
+        """Maximum error relative to the total count."""
+        return math.e / self.width
+
+    @property
+    def delta(self):
+        """Probability of an estimate going over the maximum error."""
+        return math.exp(-self.depth)
+
+    def add(self, key, count=1):
+        """Add count for a key.
+
+        :param key: Hashable key.
+        :type key: object
+        :param count: Count to add.
+        :type count: int
+
+        """
+        width = self.width
+        for seed, row in enumerate(self.rows):
+            row[hash((seed, key)) % width] += count
+        self.total += count
+
+    def estimate(self, key):
+        """Estimate count for a key.
+
+        :param key: Hashable key.
+        :type key: object
+        :return: Estimated count.
+        :rtype: int
+
+        """
+        width = self.width
+        return min(row[hash((seed, key)) % width] for seed, row in enumerate(self.rows))
+
+
+class SpaceSaving(object):
+    """Space-saving summary of the most frequent keys.
+
+    At most ``capacity`` keys are tracked. When a new key is added and the
+    summary is full, the key with the lowest count is replaced and its count is
+    inherited by the new key as its error. Every key with a true count over
+    ``total / capacity`` is tracked, and tracked counts are never lower than the
+    true counts and at most ``error`` (which is never over ``total / capacity``)
+    higher.
+
+    :param capacity: Maximum number of keys tracked.
+    :type capacity: int
+
+    """
+
+    def __init__(self, capacity=1000):
+        if capacity < 1:
+            raise ValueError("Capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        # Heap of (count, key) entries, some of them outdated (updated lazily)
+        self._heap = []
+
+    def add(self, key, count=1):
+        """Add count for a key.
+
+        :param key: Hashable key.
+        :type key: object
+        :param count: Count to add.
+        :type count: int
+
+        """
+        self.total += count
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+        elif len(counts) < self.capacity:
+            counts[key] = count
+            self.errors[key] = 0
+        else:
+            min_key, min_count = self._pop_min()
+            del counts[min_key]
+            del self.errors[min_key]
+            counts[key] = min_count + count
+            self.errors[key] = min_count
+        heapq.heappush(self._heap, (counts[key], key))
+
+        # Drop outdated entries once they're most of the heap
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, key) for key, count in counts.items()]
+            heapq.heapify(self._heap)
+
+    def items(self):
+        """Get tracked keys.
+
+        :return: Key, count (upper bound) and error for every tracked key.
+        :rtype: list(tuple(object, int, int))
+
+        """
+        return [(key, count, self.errors[key]) for key, count in self.counts.items()]
+
+    def _pop_min(self):
+        """Remove the entry with the lowest count from the heap.
+
+        :return: Key and count.
+        :rtype: tuple(object, int)
+
+        """
+        heap = self._heap
+        counts = self.counts
+        while True:
+            count, key = heapq.heappop(heap)
+            if counts.get(key) == count:
+                return key, count
+
+
+class SectionSketch(object):
+    """Approximate counts for the elements of a stats section.
+
+    Heavy hitters are tracked with a :class:`SpaceSaving` summary and their
+    counts are tightened with a :class:`CountMinSketch`, so memory doesn't
+    depend on the number of distinct elements. For every element, the true
+    count is between ``count - max_error`` and ``count``.
+
+    :param capacity: Maximum number of elements tracked.
+    :type capacity: int
+    :param width: Number of counters in every count-min sketch row.
+    :type width: int
+    :param depth: Number of count-min sketch rows.
+    :type depth: int
+
+    """
+
+    def __init__(self, capacity=1000, width=2719, depth=5):
+        self.space_saving = SpaceSaving(capacity)
+        self.count_min = CountMinSketch(width, depth)
+
+    def add(self, key, count=1):
+        """Add count for an element.
+
+        :param key: Element key.
+        :type key: object
+        :param count: Count to add.
+        :type count: int
+
+        """
+        self.space_saving.add(key, count)
+        self.count_min.add(key, count)
+
+    def items(self):
+        """Get tracked elements.
+
+        :return: Key, estimated count and maximum error for every element.
+        :rtype: list(tuple(object, int, int))
+
+        """
+        estimate = self.count_min.estimate
+        items = []
+        for key, count, error in self.space_saving.items():
+            upper_bound = min(count, estimate(key))
+            lower_bound = count - error
+            items.append((key, upper_bound, upper_bound - lower_bound))
+        return items
+
+
+class HyperLogLog(object):
+    """HyperLogLog sketch to estimate the number of distinct values.
+
+    Values (strings or bytes) are hashed with the built-in ``hash`` function (so
+    sketches are only consistent within the same process) and the sketch takes
+    ``2 ** precision`` bytes. The relative standard error is
+    ``1.04 / sqrt(2 ** precision)`` (0.81% with the default precision).
+
+    :param precision: Number of hash bits used to select a register (4 to 18).
+    :type precision: int
+
+    """
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError("Precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self._index_shift = 64 - precision
+        self._rank_mask = (1 << (64 - precision)) - 1
+
+    @property
+    def error(self):
+        """Relative standard error of the estimates."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, value):
+        """Add value to the sketch.
+
+        :param value: Hashable value.
+        :type value: object
+
+        """
+        value_hash = hash(value) & MASK_64
+        index = value_hash >> self._index_shift
+        # Position of the first set bit in the remaining bits
+        rank = self._index_shift - (value_hash & self._rank_mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        """Add values to the sketch.
+
+        :param values: Hashable values.
+        :type values: iterable(object)
+
+        """
+        for value in values:
+            self.add(value)
+
+    def count(self):
+        """Estimate number of distinct values added.
+
+        :return: Estimated number of distinct values.
+        :rtype: int
+
+        """
+        registers = self.registers
+        size = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0**-register for register in registers)
+        zero_count = registers.count(0)
+        if estimate <= 2.5 * size and zero_count:
+            # Linear counting is more accurate for small cardinalities
+            estimate = size * math.log(size / zero_count)
+        return int(round(estimate))
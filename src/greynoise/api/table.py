@@ -0,0 +1,264 @@
+"""Quick check result table module."""
+
+import array
+import itertools
+import socket
+from socket import AF_INET
+
+from greynoise.api.ipset import IPV4_TYPECODE
+
+# Translation table used to invert masks built from byte columns
+INVERT_MASK = bytes([1, 0]) + bytes(254)
+
+
+class QuickResultTable(object):
+    """Columnar table of quick check results.
+
+    Instead of keeping a dictionary for every IP address, IPv4 addresses are
+    packed as unsigned 32-bit integers (IPv6 and invalid addresses, which are
+    rare, are kept aside as strings), noise and riot flags are kept as one byte
+    per row and codes are interned, so every row takes a few bytes. Code messages
+    are looked up once for every distinct code.
+
+    Rows are filtered and counted with operations over whole columns and they
+    are only converted to dictionaries on demand (when indexing or iterating).
+
+    :param code_messages: Message for every known code.
+    :type code_messages: dict(str, str) | None
+    :param unknown_code_message: Template used for codes without message.
+    :type unknown_code_message: str
+
+    """
+
+    IP_TYPECODE = IPV4_TYPECODE
+
+    def __init__(
+        self, code_messages=None, unknown_code_message="Code message unknown: {}"
+    ):
+        self.code_messages = code_messages or {}
+        self.unknown_code_message = unknown_code_message
+        self.ip_addresses = array.array(self.IP_TYPECODE)
+        self.other_ip_addresses = {}
+        self.noise = bytearray()
+        self.riot = bytearray()
+        self.code_indexes = bytearray()
+        self.codes = []
+        self._code_messages = []
+        self._code_index = {}
+
+    @classmethod
+    def from_results(
+        cls,
+        results,
+        code_messages=None,
+        unknown_code_message="Code message unknown: {}",
+    ):
+        """Create table from quick check results.
+
+        :param results: Quick check results
+        :type results: iterable(dict)
+        :param code_messages: Message for every known code.
+        :type code_messages: dict(str, str) | None
+        :param unknown_code_message: Template used for codes without message.
+        :type unknown_code_message: str
+        :return: Table with all the results
+        :rtype: QuickResultTable
+
+        """
+        table = cls(code_messages, unknown_code_message)
+        table.extend(results)
+        return table
+
+    def __len__(self):
+        return len(self.noise)
+
+    def __getitem__(self, index):
+        """Get a row as a dictionary.
+
+        :param index: Row index
+        :type index: int
+        :return: Quick check result
+        :rtype: dict
+
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Row index out of range")
+        code_index = self.code_indexes[index]
+        return {
+            "ip": self.ip_address(index),
+            "noise": bool(self.noise[index]),
+            "riot": bool(self.riot[index]),
+            "code": self.codes[code_index],
+            "code_message": self._code_messages[code_index],
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def ip_address(self, index):
+        """Get the IP address in a row.
+
+        :param index: Row index
+        :type index: int
+        :return: IP address
+        :rtype: str
+
+        """
+        if index in self.other_ip_addresses:
+            return self.other_ip_addresses[index]
+        return socket.inet_ntop(AF_INET, self.ip_addresses[index].to_bytes(4, "big"))
+
+    def append(self, result):
+        """Add a quick check result.
+
+        :param result: Quick check result
+        :type result: dict
+
+        """
+        self.extend([result])
+
+    def extend(self, results):
+        """Add quick check results.
+
+        :param results: Quick check results
+        :type results: iterable(dict)
+
+        """
+        # Look up bound methods once for the whole loop
+        append_ip_address = self.ip_addresses.append
+        append_noise = self.noise.append
+        append_riot = self.riot.append
+        append_code_index = self.code_indexes.append
+        code_index = self._code_index
+        inet_pton = socket.inet_pton
+        from_bytes = int.from_bytes
+
+        for result in results:
+            ip_address = result["ip"]
+            try:
+                append_ip_address(from_bytes(inet_pton(AF_INET, ip_address), "big"))
+            except OSError:
+                self.other_ip_addresses[len(self.noise)] = ip_address
+                append_ip_address(0)
+            append_noise(1 if result.get("noise") else 0)
+            append_riot(1 if result.get("riot") else 0)
+
+            code = result.get("code")
+            if code not in code_index:
+                self._intern_code(code)
+            append_code_index(code_index[code])
+
+    def count(self, noise=None, riot=None, code=None):
+        """Count rows that match all the given values.
+
+        :param noise: Noise value to match (any if None).
+        :type noise: bool | None
+        :param riot: RIOT value to match (any if None).
+        :type riot: bool | None
+        :param code: Code or codes to match (any if None).
+        :type code: str | iterable(str) | None
+        :return: Number of rows that match
+        :rtype: int
+
+        """
+        if noise is None and riot is None and code is None:
+            return len(self)
+        return self._get_mask(noise, riot, code).count(1)
+
+    def filter(self, noise=None, riot=None, code=None):
+        """Get rows that match all the given values.
+
+        :param noise: Noise value to match (any if None).
+        :type noise: bool | None
+        :param riot: RIOT value to match (any if None).
+        :type riot: bool | None
+        :param code: Code or codes to match (any if None).
+        :type code: str | iterable(str) | None
+        :return: Table with the rows that match
+        :rtype: QuickResultTable
+
+        """
+        mask = self._get_mask(noise, riot, code)
+        table = QuickResultTable(self.code_messages, self.unknown_code_message)
+        table.codes = list(self.codes)
+        table._code_messages = list(self._code_messages)
+        table._code_index = dict(self._code_index)
+
+        compress = itertools.compress
+        table.ip_addresses = array.array(
+            self.IP_TYPECODE, compress(self.ip_addresses, mask)
+        )
+        table.noise = bytearray(compress(self.noise, mask))
+        table.riot = bytearray(compress(self.riot, mask))
+        table.code_indexes = bytearray(compress(self.code_indexes, mask))
+        if self.other_ip_addresses:
+            for new_index, index in enumerate(compress(range(len(self)), mask)):
+                if index in self.other_ip_addresses:
+                    table.other_ip_addresses[new_index] = self.other_ip_addresses[index]
+        return table
+
+    def code_counts(self):
+        """Count rows for every code.
+
+        :return: Number of rows for every code
+        :rtype: dict(str, int)
+
+        """
+        return {
+            code: self.code_indexes.count(code_index)
+            for code_index, code in enumerate(self.codes)
+        }
+
+    def _intern_code(self, code):
+        """Add a code and look up its message.
+
+        :param code: Quick check result code
+        :type code: str
+
+        """
+        if len(self.codes) == 256:
+            raise ValueError("Too many distinct codes: {!r}".format(code))
+        self._code_index[code] = len(self.codes)
+        self.codes.append(code)
+        self._code_messages.append(
+            self.code_messages.get(code, self.unknown_code_message.format(code))
+        )
+
+    def _get_mask(self, noise, riot, code):
+        """Get a mask with a byte set for every row that matches all values.
+
+        Masks for each column are built and combined as a whole (translating
+        bytes and using integer bitwise operations) rather than row by row.
+
+        :param noise: Noise value to match (any if None).
+        :type noise: bool | None
+        :param riot: RIOT value to match (any if None).
+        :type riot: bool | None
+        :param code: Code or codes to match (any if None).
+        :type code: str | iterable(str) | None
+        :return: Mask with one byte for every row (1 if it matches or 0)
+        :rtype: bytes
+
+        """
+        masks = []
+        for column, value in ((self.noise, noise), (self.riot, riot)):
+            if value is not None:
+                masks.append(bytes(column) if value else column.translate(INVERT_MASK))
+        if code is not None:
+            codes = {code} if isinstance(code, str) else set(code)
+            code_mask = bytes(
+                1 if index < len(self.codes) and self.codes[index] in codes else 0
+                for index in range(256)
+            )
+            masks.append(self.code_indexes.translate(code_mask))
+
+        if not masks:
+            return b"\x01" * len(self)
+
+        mask = int.from_bytes(masks[0], "little")
+        for other_mask in masks[1:]:
+            mask &= int.from_bytes(other_mask, "little")
+        return mask.to_bytes(len(self), "little")
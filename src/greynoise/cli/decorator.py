@@ -4,6 +4,8 @@ Decorators used to add common functionality to subcommands.
 
 """
 import functools
+import json
+import types
 
 import click
 import structlog
@@ -21,6 +23,10 @@ LOGGER = structlog.get_logger()
 def echo_result(function):
     """Decorator that prints subcommand results correctly formatted.
 
+    Subcommands may also return a generator to stream results. In that case, each
+    result is printed as soon as it's available (as a JSON line for the json
+    output format).
+
     :param function: Subcommand that returns a result from the API.
     :type function: callable
     :returns: Wrapped function that prints subcommand results
@@ -38,15 +44,61 @@ def echo_result(function):
         if isinstance(formatter, dict):
             # For the text formatter, there's a separate formatter for each subcommand
             formatter = formatter[context.command.name]
+        output_file = params.get("output_file", click.open_file("-", mode="w"))
+
+        if isinstance(result, types.GeneratorType):
+            for item in result:
+                if output_format == "json":
+                    output = json.dumps(item, sort_keys=True)
+                else:
+                    output = formatter([item], params.get("verbose", False))
+                click.echo(output.strip("\n"), file=output_file)
+            return
 
         output = formatter(result, params.get("verbose", False)).strip("\n")
-        click.echo(
-            output, file=params.get("output_file", click.open_file("-", mode="w"))
-        )
+        click.echo(output, file=output_file)
 
     return wrapper
 
 
+def exit_with_api_error(exception):
+    """Print API client exception and exit.
+
+    :param exception: Exception raised by the API client.
+    :type exception: greynoise.exceptions.RequestFailure | RequestException
+
+    """
+    if isinstance(exception, RequestFailure):
+        body = exception.args[1]
+        if "message" in body:
+            error_message = "API error: {}".format(body["message"])
+        elif "error" in body:
+            error_message = "API error: {}".format(body["error"])
+        else:
+            error_message = "API error: {}".format(body)
+    else:
+        error_message = "API error: {}".format(exception)
+    LOGGER.error(error_message)
+    click.echo(error_message)
+    click.get_current_context().exit(-1)
+
+
+def handle_stream_exceptions(results):
+    """Print error and exit on API client exception while streaming results.
+
+    :param results: Results streamed by a subcommand.
+    :type results: generator
+    :returns: The same results.
+    :rtype: generator
+
+    """
+    try:
+        for result in results:
+            yield result
+    except (RequestFailure, RequestException) as exception:
+        exit_with_api_error(exception)
+
+
 def handle_exceptions(function):
     """Print error and exit on API client exception.
 
@@ -60,23 +112,14 @@ def handle_exceptions(function):
     @functools.wraps(function)
     def wrapper(*args, **kwargs):
         try:
-            return function(*args, **kwargs)
-        except RequestFailure as exception:
-            body = exception.args[1]
-            if "message" in body:
-                error_message = "API error: {}".format(body["message"])
-            elif "error" in body:
-                error_message = "API error: {}".format(body["error"])
-            else:
-                error_message = "API error: {}".format(body)
-            LOGGER.error(error_message)
-            click.echo(error_message)
-            click.get_current_context().exit(-1)
-        except RequestException as exception:
-            error_message = "API error: {}".format(exception)
-            LOGGER.error(error_message)
-            click.echo(error_message)
-            click.get_current_context().exit(-1)
+            result = function(*args, **kwargs)
+        except (RequestFailure, RequestException) as exception:
+            exit_with_api_error(exception)
+
+        if isinstance(result, types.GeneratorType):
+            # Streamed results are only requested while they're being printed
+            return handle_stream_exceptions(result)
+        return result
 
     return wrapper
 
@@ -12,6 +12,9 @@ import colorama
 from dict2xml import dict2xml
 from jinja2 import Environment, PackageLoader, select_autoescape
 
+from greynoise.api.filter import Filter
+from greynoise.api.table import QuickResultTable
+
 JINJA2_ENV = Environment(
     loader=PackageLoader("greynoise.cli"),
     autoescape=select_autoescape(disabled_extensions=["txt.j2"]),
@@ -34,6 +37,19 @@ ANSI_MARKUP = ansimarkup.AnsiMarkup(
     }
 )
 
+# Escape sequences used to surround IP addresses when filtering text
+# without having to parse the ansi markup for the whole output
+FILTER_ANSI_MARKUP = {
+    tag: ANSI_MARKUP(template) for tag, template in Filter.MARKUP.items()
+}
+
+# Markup templates for each one of the filter output modes
+FILTER_MARKUP = {
+    "ansi": FILTER_ANSI_MARKUP,
+    "plain": {},
+    "tagged": Filter.MARKUP,
+}
+
 
 def colored_output(function):
     """Decorator that converts ansi markup into ansi escape sequences.
@@ -55,6 +71,8 @@ def colored_output(function):
 
 def json_formatter(result, _verbose):
     """Format result as json."""
+    if isinstance(result, QuickResultTable):
+        result = list(result)
     if isinstance(result, list) and "data" in result[0]:
         res = [json.dumps(record) for record in result[0]["data"]]
         output = "\n".join(res)
@@ -66,6 +84,8 @@ def json_formatter(result, _verbose):
 
 def xml_formatter(result, _verbose):
     """Format result as xml."""
+    if isinstance(result, QuickResultTable):
+        result = list(result)
     xml_formatted = ""
     if type(result) is list:
         xml_formatted = dict2xml({"item": result}, wrap="root", indent="\t")
@@ -142,9 +162,20 @@ def gnql_stats_formatter(results, verbose):
 @colored_output
 def analyze_formatter(result, verbose):
     """Conver analyze result into human-readable text."""
-    template = JINJA2_ENV.get_template("analyze.txt.j2")
+    # Results for every window are streamed in a list
+    results = result if isinstance(result, list) else [result]
     max_width, _ = shutil.get_terminal_size()
-    return template.render(result=result, verbose=verbose, max_width=max_width)
+    outputs = []
+    for result in results:
+        if "requests" in result:
+            # Cost estimated in a dry run
+            template = JINJA2_ENV.get_template("estimate.txt.j2")
+        else:
+            template = JINJA2_ENV.get_template("analyze.txt.j2")
+        outputs.append(
+            template.render(result=result, verbose=verbose, max_width=max_width)
+        )
+    return "\n".join(outputs)
 
 
 @colored_output
@@ -4,6 +4,7 @@ import sys
 
 import click
 
+from greynoise.api.reader import DecompressedLines, MappedLines
 from greynoise.util import validate_ip
 
 
@@ -27,7 +28,14 @@ def get_ip_addresses(context, input_file, ip_address):
 
     ip_addresses = []
     if input_file is not None:
-        lines = [line.strip() for line in input_file]
+        compressed_lines = get_compressed_lines(context, input_file)
+        if compressed_lines is None:
+            lines = [line.strip() for line in input_file]
+        else:
+            with compressed_lines:
+                lines = [
+                    line.decode("utf-8", "replace").strip() for line in compressed_lines
+                ]
         ip_addresses.extend([line for line in lines if validate_ip(line, strict=False)])
     ip_addresses.extend(list(ip_address))
 
@@ -81,3 +89,106 @@ def get_queries(context, input_file, query):
         context.exit(-1)
 
     return queries
+
+
+def get_binary_output(output_file):
+    """Get binary stream to write bytes to an output file opened in text mode.
+
+    :param output_file: Output file
+    :type output_file: click.File
+    :return: Binary stream that writes to the same output
+    :rtype: file-like
+
+    """
+    # Make sure anything already written in text mode is not reordered
+    output_file.flush()
+    return output_file.buffer
+
+
+def get_binary_input(input_file):
+    """Get binary stream to read bytes from an input file opened in text mode.
+
+    :param input_file: Input file
+    :type input_file: click.File
+    :return: Binary stream that reads from the same input
+    :rtype: file-like
+
+    """
+    return getattr(input_file, "buffer", input_file)
+
+
+def get_compressed_lines(context, input_file):
+    """Get decompressed lines if the input file is compressed.
+
+    :param context: Subcommand context
+    :type context: click.Context
+    :param input_file: Input file
+    :type input_file: click.File
+    :return: Decompressed lines or None if the input file is not compressed.
+    :rtype: greynoise.api.reader.DecompressedLines | None
+    :raises click.BadParameter: when the compression format is not supported.
+
+    """
+    try:
+        return DecompressedLines.from_file(input_file)
+    except ValueError as exception:
+        raise click.BadParameter(
+            str(exception), ctx=context, param_hint="'-i' / '--input'"
+        )
+
+
+def get_input_lines(context, input_file, binary=False):
+    """Get lines from an input file, reading them as bytes whenever it's possible.
+
+    Compressed input is decompressed in a background thread and regular files are
+    memory mapped. Any other input is read as bytes only when binary is set,
+    otherwise the input file is returned as it is.
+
+    :param context: Subcommand context
+    :type context: click.Context
+    :param input_file: Input file
+    :type input_file: click.File
+    :param binary: Whether to read bytes from any kind of input.
+    :type binary: bool
+    :return: Input lines
+    :rtype: file-like | greynoise.api.reader.MappedLines |
+        greynoise.api.reader.DecompressedLines
+
+    """
+    input_lines = get_compressed_lines(context, input_file)
+    if input_lines is None:
+        input_lines = MappedLines.from_file(input_file)
+    if input_lines is None:
+        input_lines = get_binary_input(input_file) if binary else input_file
+    return input_lines
+
+
+def close_input_lines(input_lines):
+    """Close input lines opened by :func:`get_input_lines`.
+
+    :param input_lines: Input lines
+    :type input_lines: file-like | greynoise.api.reader.MappedLines |
+        greynoise.api.reader.DecompressedLines
+
+    """
+    if isinstance(input_lines, (DecompressedLines, MappedLines)):
+        input_lines.close()
+
+
+def stream_and_close_input_lines(results, input_lines):
+    """Stream results and close input lines once they're all consumed.
+
+    :param results: Results computed from the input lines.
+    :type results: iterable
+    :param input_lines: Input lines opened by :func:`get_input_lines`.
+    :type input_lines: file-like | greynoise.api.reader.MappedLines |
+        greynoise.api.reader.DecompressedLines
+    :return: The same results.
+    :rtype: generator
+
+    """
+    try:
+        for result in results:
+            yield result
+    finally:
+        close_input_lines(input_lines)
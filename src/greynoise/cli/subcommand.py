@@ -1,11 +1,15 @@
 """CLI subcommands."""
 
+import csv
+import json
 import platform
 import sys
 
 import click
 
 from greynoise.__version__ import __version__
+from greynoise.api.enricher import Enricher
+from greynoise.api.extractor import EXTRACTORS
 from greynoise.cli.decorator import (
     echo_result,
     gnql_command,
@@ -14,8 +18,15 @@ from greynoise.cli.decorator import (
     not_implemented_command,
     pass_api_client,
 )
-from greynoise.cli.formatter import ANSI_MARKUP
-from greynoise.cli.helper import get_ip_addresses, get_queries
+from greynoise.cli.formatter import FILTER_MARKUP
+from greynoise.cli.helper import (
+    close_input_lines,
+    get_binary_output,
+    get_input_lines,
+    get_ip_addresses,
+    get_queries,
+    stream_and_close_input_lines,
+)
 from greynoise.cli.parameter import ip_addresses_parameter
 from greynoise.util import CONFIG_FILE, DEFAULT_CONFIG, save_config
 
@@ -44,15 +55,174 @@ def alerts():
     default="txt",
     help="Output format",
 )
+@click.option(
+    "-b", "--binary", is_flag=True, help="Process input as bytes without decoding it"
+)
+@click.option(
+    "--format-in",
+    "input_format",
+    type=click.Choice(sorted(EXTRACTORS)),
+    default="text",
+    help="Input format",
+)
+@click.option(
+    "--field",
+    "fields",
+    multiple=True,
+    help="Field or column to extract IP addresses from (structured input formats)",
+)
+@click.option(
+    "--chunk-bytes",
+    type=click.IntRange(min=1),
+    help="Maximum size in bytes of the chunks of lines processed at once",
+)
+@click.option(
+    "--chunk-ips",
+    "chunk_ip_addresses",
+    type=click.IntRange(min=1),
+    help="Maximum number of unique IP addresses in every chunk",
+)
+@click.option(
+    "--ipv6", is_flag=True, help="Extract IPv6 addresses in addition to IPv4 ones"
+)
+@click.option(
+    "--batch-stats",
+    is_flag=True,
+    help="Get stats for many IP addresses in every GNQL query",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of concurrent stats queries",
+)
+@click.option(
+    "--compact-ips",
+    "compact_ip_addresses",
+    is_flag=True,
+    help="Keep track of unique IP addresses in a compact set to save memory",
+)
+@click.option(
+    "--checkpoint",
+    "checkpoint_path",
+    type=click.Path(dir_okay=False),
+    help="File where the analysis state is saved periodically",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue from the state saved in the checkpoint file",
+)
+@click.option(
+    "--top",
+    "top_k",
+    type=click.IntRange(min=1),
+    help="Number of elements shown for every stats section",
+)
+@click.option(
+    "--approximate",
+    is_flag=True,
+    help="Count elements in stats sections approximately in constant memory",
+)
+@click.option(
+    "--sample",
+    "sample_rate",
+    type=click.FloatRange(min=0, max=1, min_open=True),
+    help="Fraction of the unique IP addresses looked up (e.g. 0.01)",
+)
+@click.option(
+    "--stratify",
+    is_flag=True,
+    help="Sample every /16 network separately",
+)
+@click.option(
+    "--window",
+    "window_size",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Write results for every window of this number of lines or seconds",
+)
+@click.option(
+    "--slide",
+    "window_slide",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Lines or seconds between windows (defaults to the window size)",
+)
+@click.option(
+    "--window-unit",
+    type=click.Choice(["lines", "seconds"]),
+    default="lines",
+    show_default=True,
+    help="Unit for the window size and slide",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Estimate unique IP addresses, requests and time without looking them up",
+)
+@click.option(
+    "--rate-limit",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Requests per second allowed by the API (used by --dry-run)",
+)
 @click.option("-v", "--verbose", count=True, help="Verbose output")
 @pass_api_client
 @echo_result
 @click.pass_context
 @handle_exceptions
-def analyze(
-    context, api_client, api_key, input_file, output_file, output_format, verbose
+def analyze(  # noqa: C901
+    context,
+    api_client,
+    api_key,
+    input_file,
+    output_file,
+    output_format,
+    binary,
+    input_format,
+    fields,
+    chunk_bytes,
+    chunk_ip_addresses,
+    ipv6,
+    batch_stats,
+    workers,
+    compact_ip_addresses,
+    checkpoint_path,
+    resume,
+    top_k,
+    approximate,
+    sample_rate,
+    stratify,
+    window_size,
+    window_slide,
+    window_unit,
+    dry_run,
+    rate_limit,
+    verbose,
 ):
-    """Analyze the IP addresses in a log file, stdin, etc."""
+    """Analyze the IP addresses in a log file, stdin, etc.
+
+    Input compressed with gzip, bz2, xz or zstd is decompressed transparently.
+
+    With --window, results are written for every window of lines (or seconds)
+    as soon as it's closed, which is useful for input that never ends.
+
+    """
+    if resume and checkpoint_path is None:
+        raise click.UsageError("--resume requires --checkpoint")
+    if approximate and checkpoint_path is not None:
+        raise click.UsageError("--approximate can't be used with --checkpoint")
+    if sample_rate is not None and checkpoint_path is not None:
+        raise click.UsageError("--sample can't be used with --checkpoint")
+    if stratify and sample_rate is None:
+        raise click.UsageError("--stratify requires --sample")
+    if stratify and approximate:
+        raise click.UsageError("--approximate can't be used with --stratify")
+    if window_size is not None and (
+        checkpoint_path is not None or dry_run or output_format == "xml"
+    ):
+        raise click.UsageError(
+            "--window can't be used with --checkpoint, --dry-run or xml output"
+        )
     if input_file is None:
         if sys.stdin.isatty():
             output = [
@@ -69,10 +239,153 @@ def analyze(
     if output_file is None:
         output_file = click.open_file("-", mode="w")
 
-    result = api_client.analyze(input_file)
+    input_lines = get_input_lines(context, input_file, binary)
+    if dry_run:
+        try:
+            return api_client.estimate(
+                input_lines,
+                command="analyze",
+                input_format=input_format,
+                fields=list(fields) or None,
+                chunk_bytes=chunk_bytes,
+                chunk_ip_addresses=chunk_ip_addresses,
+                ipv6=ipv6,
+                batch_stats=batch_stats,
+                max_workers=workers,
+                requests_per_second=rate_limit,
+            )
+        finally:
+            close_input_lines(input_lines)
+    if window_size is not None:
+        try:
+            windows = api_client.analyze_windows(
+                input_lines,
+                window_size,
+                window_slide=window_slide,
+                window_unit=window_unit,
+                input_format=input_format,
+                fields=list(fields) or None,
+                ipv6=ipv6,
+                batch_stats=batch_stats,
+                max_workers=workers,
+                top_k=top_k,
+                approximate=approximate,
+                sample_rate=sample_rate,
+                stratify=stratify,
+            )
+        except ValueError as exception:
+            close_input_lines(input_lines)
+            raise click.UsageError(str(exception))
+        return stream_and_close_input_lines(windows, input_lines)
+
+    try:
+        result = api_client.analyze(
+            input_lines,
+            input_format=input_format,
+            fields=list(fields) or None,
+            chunk_bytes=chunk_bytes,
+            chunk_ip_addresses=chunk_ip_addresses,
+            ipv6=ipv6,
+            batch_stats=batch_stats,
+            max_workers=workers,
+            compact_ip_addresses=compact_ip_addresses,
+            checkpoint_path=checkpoint_path,
+            resume=resume,
+            top_k=top_k,
+            approximate=approximate,
+            sample_rate=sample_rate,
+            stratify=stratify,
+        )
+    finally:
+        close_input_lines(input_lines)
     return result
 
 
+@click.command()
+@click.option("-k", "--api-key", help="Key to include in API requests")
+@click.option("-i", "--input", "input_file", type=click.File(), help="Input file")
+@click.option(
+    "-o", "--output", "output_file", type=click.File(mode="w"), help="Output file"
+)
+@click.option(
+    "--format-in",
+    "input_format",
+    type=click.Choice(Enricher.INPUT_FORMATS),
+    default="jsonl",
+    help="Input format",
+)
+@click.option(
+    "--field", "fields", multiple=True, help="Field or column with IP addresses"
+)
+@click.option(
+    "--context",
+    "with_context",
+    is_flag=True,
+    help="Annotate noise IP addresses with their classification",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=4,
+    help="Number of concurrent lookups",
+)
+@pass_api_client
+@click.pass_context
+@handle_exceptions
+def enrich(
+    context,
+    api_client,
+    api_key,
+    input_file,
+    output_file,
+    input_format,
+    fields,
+    with_context,
+    workers,
+):
+    """Annotate JSON lines or CSV records with noise and RIOT information."""
+    if input_file is None:
+        if sys.stdin.isatty():
+            output = [
+                context.command.get_usage(context),
+                (
+                    "Error: at least one text file must be passed "
+                    "either through the -i/--input_file option or through a shell pipe."
+                ),
+            ]
+            click.echo("\n\n".join(output))
+            context.exit(-1)
+        else:
+            input_file = click.open_file("-")
+    if output_file is None:
+        output_file = click.open_file("-", mode="w")
+
+    input_lines = get_input_lines(context, input_file)
+    try:
+        records = api_client.enrich(
+            input_lines,
+            input_format=input_format,
+            fields=list(fields) or None,
+            context=with_context,
+            max_workers=workers,
+        )
+        if input_format == "csv":
+            writer = None
+            for record in records:
+                if writer is None:
+                    writer = csv.DictWriter(
+                        output_file, fieldnames=list(record), lineterminator="\n"
+                    )
+                    writer.writeheader()
+                writer.writerow(record)
+        else:
+            for record in records:
+                output_file.write(json.dumps(record) + "\n")
+    finally:
+        close_input_lines(input_lines)
+
+
 @not_implemented_command
 def feedback():
     """Send feedback directly to the GreyNoise team."""
@@ -90,13 +403,119 @@ def feedback():
 @click.option(
     "--riot-only", is_flag=True, help="Select lines containing RIOT addresses"
 )
+@click.option(
+    "-b", "--binary", is_flag=True, help="Process input as bytes without decoding it"
+)
+@click.option(
+    "--format-in",
+    "input_format",
+    type=click.Choice(sorted(EXTRACTORS)),
+    default="text",
+    help="Input format",
+)
+@click.option(
+    "--field",
+    "fields",
+    multiple=True,
+    help="Field or column to extract IP addresses from (structured input formats)",
+)
+@click.option(
+    "--chunk-bytes",
+    type=click.IntRange(min=1),
+    help="Maximum size in bytes of the chunks of lines processed at once",
+)
+@click.option(
+    "--chunk-ips",
+    "chunk_ip_addresses",
+    type=click.IntRange(min=1),
+    help="Maximum number of unique IP addresses in every chunk",
+)
+@click.option(
+    "--ipv6", is_flag=True, help="Extract IPv6 addresses in addition to IPv4 ones"
+)
+@click.option(
+    "--line-cache",
+    "line_cache_size",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Number of repeated lines to cache (disabled by default)",
+)
+@click.option(
+    "--noise-output",
+    type=click.File(mode="w"),
+    help="Write lines with only noise IP addresses to this file",
+)
+@click.option(
+    "--riot-output",
+    type=click.File(mode="w"),
+    help="Write lines with only RIOT IP addresses to this file",
+)
+@click.option(
+    "--clean-output",
+    type=click.File(mode="w"),
+    help="Write any other line to this file",
+)
+@click.option(
+    "--summary",
+    "summary_file",
+    type=click.File(mode="w"),
+    help="Write the classification of every IP address as JSON lines to this file",
+)
+@click.option(
+    "--output-mode",
+    type=click.Choice(["auto", "ansi", "plain", "tagged"]),
+    default="auto",
+    help=(
+        "IP address markup: colors (ansi), none (plain) or tags (tagged). "
+        "By default, colors are used only when writing to a terminal"
+    ),
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Estimate unique IP addresses, requests and time without looking them up",
+)
+@click.option(
+    "--rate-limit",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Requests per second allowed by the API (used by --dry-run)",
+)
 @pass_api_client
 @click.pass_context
 @handle_exceptions
-def filter(
-    context, api_client, api_key, input_file, output_file, noise_only, riot_only
+def filter(  # noqa: C901
+    context,
+    api_client,
+    api_key,
+    input_file,
+    output_file,
+    noise_only,
+    riot_only,
+    binary,
+    input_format,
+    fields,
+    chunk_bytes,
+    chunk_ip_addresses,
+    ipv6,
+    line_cache_size,
+    noise_output,
+    riot_output,
+    clean_output,
+    summary_file,
+    output_mode,
+    dry_run,
+    rate_limit,
 ):
-    """Filter the noise from a log file, stdin, etc."""
+    """Filter the noise from a log file, stdin, etc.
+
+    Input compressed with gzip, bz2, xz or zstd is decompressed transparently.
+
+    Noise, RIOT and clean lines can be written to different files in a single
+    pass using the --noise-output, --riot-output and --clean-output options.
+
+    With --dry-run, nothing is looked up and the estimated cost is written as JSON.
+
+    """
     if input_file is None:
         if sys.stdin.isatty():
             output = [
@@ -113,10 +532,70 @@ def filter(
     if output_file is None:
         output_file = click.open_file("-", mode="w")
 
-    for chunk in api_client.filter(
-        input_file, noise_only=noise_only, riot_only=riot_only
-    ):
-        output_file.write(ANSI_MARKUP(chunk))
+    sinks = {
+        route: sink
+        for route, sink in (
+            ("noise", noise_output),
+            ("riot", riot_output),
+            ("clean", clean_output),
+        )
+        if sink is not None
+    }
+    if sinks and (noise_only or riot_only):
+        raise click.UsageError(
+            "--noise-only and --riot-only can't be used with "
+            "--noise-output, --riot-output or --clean-output"
+        )
+
+    if output_mode == "auto":
+        terminal = all(sink.isatty() for sink in sinks.values() or [output_file])
+        output_mode = "ansi" if terminal else "plain"
+
+    input_lines = get_input_lines(context, input_file, binary)
+    if dry_run:
+        try:
+            estimate = api_client.estimate(
+                input_lines,
+                command="filter",
+                input_format=input_format,
+                fields=list(fields) or None,
+                chunk_bytes=chunk_bytes,
+                chunk_ip_addresses=chunk_ip_addresses,
+                ipv6=ipv6,
+                requests_per_second=rate_limit,
+            )
+        finally:
+            close_input_lines(input_lines)
+        output_file.write(json.dumps(estimate, indent=4, sort_keys=True) + "\n")
+        return
+
+    if input_lines is not input_file:
+        # Input is processed as bytes, so lines are written to the output
+        # without being decoded
+        output_file = get_binary_output(output_file)
+        sinks = {route: get_binary_output(sink) for route, sink in sinks.items()}
+    options = {
+        "markup": FILTER_MARKUP[output_mode],
+        "input_format": input_format,
+        "fields": list(fields) or None,
+        "chunk_bytes": chunk_bytes,
+        "chunk_ip_addresses": chunk_ip_addresses,
+        "line_cache_size": line_cache_size,
+        "ipv6": ipv6,
+    }
+    try:
+        if sinks or summary_file is not None:
+            if not sinks:
+                route = "noise" if noise_only else "riot" if riot_only else "clean"
+                sinks = {route: output_file}
+            api_client.split(input_lines, sinks, summary=summary_file, **options)
+        else:
+            for chunk in api_client.filter(
+                input_lines, noise_only=noise_only, riot_only=riot_only, **options
+            ):
+                output_file.write(chunk)
+    finally:
+        close_input_lines(input_lines)
 
 
 @click.command(name="help")
@@ -203,6 +682,23 @@ def query(
     return results
 
 
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of concurrent lookups when streaming",
+)
+@click.option(
+    "--completion-order",
+    is_flag=True,
+    help="Write streamed results in the order in which they're looked up",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Write results as each chunk is looked up (JSON lines for json format)",
+)
 @ip_lookup_command
 def quick(
     context,
@@ -213,13 +709,28 @@ def quick(
     output_format,
     ip_address,
     offering,
+    stream,
+    completion_order,
+    workers,
 ):
     """Quickly check whether or not one or many IPs are "noise"."""
+    if stream and output_format == "xml":
+        raise click.UsageError("--stream can't be used with the xml output format")
+    if not stream and (completion_order or workers > 1):
+        raise click.UsageError("--completion-order and --workers require --stream")
+
     ip_addresses = get_ip_addresses(context, input_file, ip_address)
-    results = []
-    if ip_addresses:
-        results.extend(api_client.quick(ip_addresses=ip_addresses))
-    return results
+    if stream:
+        return api_client.quick_iter(
+            ip_addresses=ip_addresses,
+            ordered=not completion_order,
+            max_workers=workers,
+        )
+
+    if not ip_addresses:
+        return []
+    # Results are rendered from a columnar table that takes a few bytes per row
+    return api_client.quick(ip_addresses=ip_addresses, as_table=True)
 
 
 @click.command()
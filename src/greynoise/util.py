@@ -2,6 +2,7 @@
 import ipaddress
 import logging
 import os
+import re
 import sys
 
 import structlog
@@ -10,6 +11,24 @@ from six.moves.configparser import ConfigParser
 CONFIG_FILE = os.path.expanduser(os.path.join("~", ".config", "greynoise", "config"))
 LOGGER = structlog.get_logger()
 
+# Dotted-quad IPv4 addresses without leading zeros (the only form accepted by
+# ipaddress), captured up to the first octet.
+IPV4_DOTTED_QUAD_REGEX = re.compile(
+    r"({octet})(?:\.{octet}){{3}}".format(
+        octet=r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+    )
+)
+
+# First octets of every IPv4 special-purpose network (private, shared, loopback,
+# link-local, documentation, benchmarking, multicast and reserved addresses).
+# Any other address is always global, so it doesn't need to be parsed.
+SPECIAL_PURPOSE_IPV4_FIRST_OCTETS = frozenset(
+    [0, 10, 100, 127, 169, 172, 192, 198, 203] + list(range(224, 256))
+)
+
+# Quoted strings (kept as they are) or runs of whitespace (collapsed)
+GNQL_WHITESPACE_REGEX = re.compile(r'("[^"]*")|\s+')
+
 DEFAULT_CONFIG = {
     "api_key": "",
     "api_server": "https://api.greynoise.io",
@@ -158,11 +177,8 @@ def validate_ip(ip_address, strict=True):
     :raises ValueError: When validation fails and strict is set to True.
 
     """
-    is_valid = False
-
     try:
-        ipaddress.ip_address(ip_address)
-        is_valid = True
+        is_routable = ipaddress.ip_address(ip_address).is_global
     except ValueError:
         error_message = "Invalid IP address: {!r}".format(ip_address)
         LOGGER.warning(error_message, ip_address=ip_address)
@@ -170,13 +186,52 @@ def validate_ip(ip_address, strict=True):
             raise ValueError(error_message)
         return False
 
-    if is_valid:
-        is_routable = ipaddress.ip_address(ip_address).is_global
-        if is_routable:
+    if is_routable:
+        return True
+    else:
+        error_message = "Non-Routable IP address: {!r}".format(ip_address)
+        LOGGER.warning(error_message, ip_address=ip_address)
+        if strict:
+            raise ValueError(error_message)
+        return False
+
+
+def is_routable_ip(ip_address):
+    """Check if the IP address is valid and routable without logging anything.
+
+    This is the cheap version of :func:`validate_ip` used for bulk inputs: most
+    IPv4 addresses are checked with a regular expression and a set look-up and
+    only the ones that might not be global are parsed.
+
+    :param ip_address: IP address value to validate.
+    :type ip_address: str
+    :return: Whether the IP address is valid and routable.
+    :rtype: bool
+
+    """
+    if isinstance(ip_address, str):
+        match = IPV4_DOTTED_QUAD_REGEX.fullmatch(ip_address)
+        if match and int(match.group(1)) not in SPECIAL_PURPOSE_IPV4_FIRST_OCTETS:
             return True
-        else:
-            error_message = "Non-Routable IP address: {!r}".format(ip_address)
-            LOGGER.warning(error_message, ip_address=ip_address)
-            if strict:
-                raise ValueError(error_message)
-            return False
+
+    try:
+        return ipaddress.ip_address(ip_address).is_global
+    except ValueError:
+        return False
+
+
+def normalize_query(query):
+    """Normalize GNQL query so that equivalent queries are the same string.
+
+    Leading and trailing whitespace is removed and whitespace between terms is
+    collapsed to a single space (quoted strings are not modified).
+
+    :param query: GNQL query.
+    :type query: str
+    :return: Normalized GNQL query.
+    :rtype: str
+
+    """
+    return GNQL_WHITESPACE_REGEX.sub(
+        lambda match: match.group(1) or " ", query.strip()
+    )
@@ -1,6 +1,7 @@
 # coding=utf-8
 """CLI subcommands test cases."""
 
+import gzip
 import json
 import textwrap
 from collections import OrderedDict
@@ -13,7 +14,11 @@ from requests.exceptions import RequestException
 from six import StringIO
 
 from greynoise.__version__ import __version__
+from greynoise.api import GreyNoise
+from greynoise.api.reader import MappedLines
+from greynoise.api.table import QuickResultTable
 from greynoise.cli import main, subcommand
+from greynoise.cli.formatter import FILTER_ANSI_MARKUP, FILTER_MARKUP
 from greynoise.exceptions import RequestFailure
 from greynoise.util import CONFIG_FILE, DEFAULT_CONFIG
 
@@ -134,7 +139,309 @@ class TestAnalyze(object):
         result = runner.invoke(subcommand.analyze, ["-i", input_text])
         assert result.exit_code == 0
         assert result.output == self.DEFAULT_OUTPUT
-        api_client.analyze.assert_called_with(input_text)
+        api_client.analyze.assert_called_with(
+            input_text,
+            input_format="text",
+            fields=None,
+            chunk_bytes=None,
+            chunk_ip_addresses=None,
+            ipv6=False,
+            batch_stats=False,
+            max_workers=1,
+            compact_ip_addresses=False,
+            checkpoint_path=None,
+            resume=False,
+            top_k=None,
+            approximate=False,
+            sample_rate=None,
+            stratify=False,
+        )
+
+    def test_chunk_options(self, api_client):
+        """Chunk budgets are passed to the API client."""
+        runner = CliRunner()
+
+        api_client.analyze.return_value = self.DEFAULT_API_RESPONSE
+
+        result = runner.invoke(
+            subcommand.analyze,
+            ["--chunk-bytes", "1024", "--chunk-ips", "500"],
+            input="<input_text>",
+        )
+        assert result.exit_code == 0
+        assert api_client.analyze.call_args[1]["chunk_bytes"] == 1024
+        assert api_client.analyze.call_args[1]["chunk_ip_addresses"] == 500
+
+    def test_ipv6(self, api_client):
+        """IPv6 extraction is enabled."""
+        runner = CliRunner()
+
+        api_client.analyze.return_value = self.DEFAULT_API_RESPONSE
+
+        result = runner.invoke(subcommand.analyze, ["--ipv6"], input="<input_text>")
+        assert result.exit_code == 0
+        assert api_client.analyze.call_args[1]["ipv6"] is True
+
+    def test_batch_stats(self, api_client):
+        """Batched stats queries are enabled."""
+        runner = CliRunner()
+
+        api_client.analyze.return_value = self.DEFAULT_API_RESPONSE
+
+        result = runner.invoke(
+            subcommand.analyze, ["--batch-stats"], input="<input_text>"
+        )
+        assert result.exit_code == 0
+        assert api_client.analyze.call_args[1]["batch_stats"] is True
+
+    def test_workers(self, api_client):
+        """Number of concurrent stats queries is passed to the API client."""
+        runner = CliRunner()
+
+        api_client.analyze.return_value = self.DEFAULT_API_RESPONSE
+
+        result = runner.invoke(subcommand.analyze, ["-w", "8"], input="<input_text>")
+        assert result.exit_code == 0
+        assert api_client.analyze.call_args[1]["max_workers"] == 8
+
+    def test_compact_ips(self, api_client):
+        """Compact IP address set option is passed to the API client."""
+        runner = CliRunner()
+
+        api_client.analyze.return_value = self.DEFAULT_API_RESPONSE
+
+        result = runner.invoke(
+            subcommand.analyze, ["--compact-ips"], input="<input_text>"
+        )
+        assert result.exit_code == 0
+        assert api_client.analyze.call_args[1]["compact_ip_addresses"] is True
+
+    def test_resume(self, api_client, tmp_path):
+        """Checkpoint file and resume option are passed to the API client."""
+        runner = CliRunner()
+
+        api_client.analyze.return_value = self.DEFAULT_API_RESPONSE
+        checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+
+        result = runner.invoke(
+            subcommand.analyze,
+            ["--checkpoint", checkpoint_path, "--resume"],
+            input="<input_text>",
+        )
+        assert result.exit_code == 0
+        assert api_client.analyze.call_args[1]["checkpoint_path"] == checkpoint_path
+        assert api_client.analyze.call_args[1]["resume"] is True
+
+    def test_resume_usage_error(self, api_client):
+        """A checkpoint file is required to resume."""
+        runner = CliRunner()
+
+        result = runner.invoke(subcommand.analyze, ["--resume"], input="<input_text>")
+        assert result.exit_code == 2
+        assert "--resume requires --checkpoint" in result.output
+        api_client.analyze.assert_not_called()
+
+    def test_top_approximate(self, api_client):
+        """Top elements and approximate options are passed to the API client."""
+        runner = CliRunner()
+
+        api_client.analyze.return_value = self.DEFAULT_API_RESPONSE
+
+        result = runner.invoke(
+            subcommand.analyze, ["--top", "10", "--approximate"], input="<input_text>"
+        )
+        assert result.exit_code == 0
+        assert api_client.analyze.call_args[1]["top_k"] == 10
+        assert api_client.analyze.call_args[1]["approximate"] is True
+
+    def test_sample(self, api_client):
+        """Sample options are passed to the API client and intervals shown."""
+        runner = CliRunner()
+
+        api_response = dict(self.DEFAULT_API_RESPONSE)
+        api_response["summary"] = dict(
+            api_response["summary"],
+            ip_count=1000,
+            sampled_ip_count=100,
+            sample_rate=0.1,
+            noise_ip_ratio=0.5,
+            noise_ip_ratio_interval=[0.4, 0.6],
+            riot_ip_ratio_interval=[0, 0],
+        )
+        api_client.analyze.return_value = api_response
+
+        result = runner.invoke(
+            subcommand.analyze, ["--sample", "0.1", "--stratify"], input="<input_text>"
+        )
+        assert result.exit_code == 0
+        assert "- Sampled IP count: 100 (10.00%)" in result.output
+        assert "- Noise IP ratio: 0.50 (95% CI: 0.40 - 0.60)" in result.output
+        assert api_client.analyze.call_args[1]["sample_rate"] == 0.1
+        assert api_client.analyze.call_args[1]["stratify"] is True
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            ["--stratify"],
+            ["--sample", "0.1", "--checkpoint", "checkpoint.jsonl"],
+            ["--sample", "0.1", "--stratify", "--approximate"],
+        ],
+    )
+    def test_sample_usage_error(self, api_client, args):
+        """Stratify requires exact stats from a sample that isn't checkpointed."""
+        runner = CliRunner()
+
+        result = runner.invoke(subcommand.analyze, args, input="<input_text>")
+        assert result.exit_code == 2
+        api_client.analyze.assert_not_called()
+
+    def test_window(self, api_client):
+        """Results are written for every window."""
+        runner = CliRunner()
+
+        def analyze_windows(*args, **kwargs):
+            for start_line in (0, 10):
+                yield dict(
+                    self.DEFAULT_API_RESPONSE,
+                    window={
+                        "start_line": start_line,
+                        "line_count": 10,
+                        "start_time": "2020-01-01T00:00:00Z",
+                        "end_time": "2020-01-01T00:01:00Z",
+                        "partial": start_line == 0,
+                    },
+                )
+
+        api_client.analyze_windows.side_effect = analyze_windows
+
+        result = runner.invoke(
+            subcommand.analyze,
+            ["--window", "20", "--slide", "10"],
+            input="<input_text>",
+        )
+        assert result.exit_code == 0
+        assert result.output.count("Analyze") == 2
+        assert (
+            "- Window: lines 1-10 (2020-01-01T00:00:00Z - 2020-01-01T00:01:00Z)"
+            " (partial)" in result.output
+        )
+        assert (
+            "- Window: lines 11-20 (2020-01-01T00:00:00Z - 2020-01-01T00:01:00Z)\n"
+            in result.output
+        )
+        assert api_client.analyze_windows.call_args[0][1:] == (20,)
+        assert api_client.analyze_windows.call_args[1]["window_slide"] == 10
+        assert api_client.analyze_windows.call_args[1]["window_unit"] == "lines"
+        api_client.analyze.assert_not_called()
+
+    def test_window_json(self, api_client):
+        """Results for every window are written as JSON lines."""
+        runner = CliRunner()
+
+        api_client.analyze_windows.return_value = (
+            dict(self.DEFAULT_API_RESPONSE, window={"start_line": start_line})
+            for start_line in (0, 10)
+        )
+
+        result = runner.invoke(
+            subcommand.analyze,
+            ["--window", "10", "--window-unit", "seconds", "-f", "json"],
+            input="<input_text>",
+        )
+        assert result.exit_code == 0
+        assert [
+            json.loads(line)["window"]["start_line"]
+            for line in result.output.splitlines()
+        ] == [0, 10]
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            ["--window", "10", "--dry-run"],
+            ["--window", "10", "--checkpoint", "checkpoint.jsonl"],
+            ["--window", "10", "-f", "xml"],
+        ],
+    )
+    def test_window_usage_error(self, api_client, args):
+        """Windows can't be estimated, checkpointed or written as XML."""
+        runner = CliRunner()
+
+        result = runner.invoke(subcommand.analyze, args, input="<input_text>")
+        assert result.exit_code == 2
+        api_client.analyze_windows.assert_not_called()
+
+    def test_invalid_window(self, api_client):
+        """Invalid windows are reported as usage errors."""
+        runner = CliRunner()
+
+        api_client.analyze_windows.side_effect = ValueError("<message>")
+
+        result = runner.invoke(
+            subcommand.analyze, ["--window", "10", "--slide", "3"], input="<input_text>"
+        )
+        assert result.exit_code == 2
+        assert "<message>" in result.output
+
+    def test_approximate_usage_error(self, api_client, tmp_path):
+        """Approximate stats can't be saved in checkpoints."""
+        runner = CliRunner()
+
+        result = runner.invoke(
+            subcommand.analyze,
+            ["--approximate", "--checkpoint", str(tmp_path / "checkpoint.jsonl")],
+            input="<input_text>",
+        )
+        assert result.exit_code == 2
+        api_client.analyze.assert_not_called()
+
+    def test_dry_run(self, api_client):
+        """Estimate API cost without analyzing."""
+        runner = CliRunner()
+
+        api_client.estimate.return_value = {
+            "line_count": 10,
+            "ip_count": 5,
+            "ip_count_error": 0.0081,
+            "requests": {"experimental/gnql/stats": 5, "noise/multi/quick": 1},
+            "scan_time": 0.01,
+            "projected_time": 3.01,
+        }
+
+        result = runner.invoke(
+            subcommand.analyze,
+            ["--dry-run", "--rate-limit", "2"],
+            input="<input_text>",
+        )
+        assert result.exit_code == 0
+        assert "- IP count: ~5 (±0.8%)" in result.output
+        assert "- experimental/gnql/stats: 5" in result.output
+        assert api_client.estimate.call_args[1]["command"] == "analyze"
+        assert api_client.estimate.call_args[1]["requests_per_second"] == 2
+        api_client.analyze.assert_not_called()
+
+    def test_invalid_chunk_bytes(self, api_client):
+        """Chunk size must be positive."""
+        runner = CliRunner()
+
+        result = runner.invoke(
+            subcommand.analyze, ["--chunk-bytes", "0"], input="<input_text>"
+        )
+        assert result.exit_code == 2
+        api_client.analyze.assert_not_called()
+
+    @pytest.mark.parametrize("text", [b"<input_text>"])
+    def test_mapped_input_file(self, api_client, tmp_path, text):
+        """Analyze text from a regular file through a memory map."""
+        runner = CliRunner()
+
+        input_path = tmp_path / "input.txt"
+        input_path.write_bytes(text)
+        api_client.analyze.return_value = self.DEFAULT_API_RESPONSE
+
+        result = runner.invoke(subcommand.analyze, ["-i", str(input_path)])
+        assert result.exit_code == 0
+        assert result.output == self.DEFAULT_OUTPUT
+        assert isinstance(api_client.analyze.call_args[0][0], MappedLines)
 
     @pytest.mark.parametrize("text", ["<input_text>"])
     def test_stdin_input(self, api_client, text):
@@ -148,6 +455,18 @@ class TestAnalyze(object):
         assert result.output == self.DEFAULT_OUTPUT
         assert api_client.analyze.call_args[0][0].read() == text
 
+    @pytest.mark.parametrize("text", [b"<input_text>\xff"])
+    def test_binary_stdin_input(self, api_client, text):
+        """Analyze bytes from stdin without decoding them."""
+        runner = CliRunner()
+
+        api_client.analyze.return_value = self.DEFAULT_API_RESPONSE
+
+        result = runner.invoke(subcommand.analyze, ["--binary"], input=text)
+        assert result.exit_code == 0
+        assert result.output == self.DEFAULT_OUTPUT
+        assert api_client.analyze.call_args[0][0].read() == text
+
     @pytest.mark.parametrize("text", ["<input_text>"])
     def test_explicit_stdin_input(self, api_client, text):
         """Analyze text with IP addresses from stdin passed explicitly."""
@@ -185,6 +504,67 @@ class TestAnalyze(object):
             assert "Error: API key not found" in result.output
 
 
+class TestEnrich(object):
+    """Enrich subcommand test cases."""
+
+    def test_jsonl(self, api_client):
+        """Annotated JSON records are written as JSON lines."""
+        runner = CliRunner()
+
+        api_client.enrich.return_value = iter(
+            [{"src_ip": "8.8.8.8", "greynoise": {}}, {"src_ip": "8.8.4.4"}]
+        )
+
+        result = runner.invoke(subcommand.enrich, ["--field", "src_ip"], input="<text>")
+        assert result.exit_code == 0
+        assert result.output == (
+            '{"src_ip": "8.8.8.8", "greynoise": {}}\n{"src_ip": "8.8.4.4"}\n'
+        )
+        assert api_client.enrich.call_args[0][0].read() == "<text>"
+        assert api_client.enrich.call_args[1] == {
+            "input_format": "jsonl",
+            "fields": ["src_ip"],
+            "context": False,
+            "max_workers": 4,
+        }
+
+    def test_csv(self, api_client):
+        """Annotated CSV records are written with a header."""
+        runner = CliRunner()
+
+        api_client.enrich.return_value = iter(
+            [
+                OrderedDict([("src_ip", "8.8.8.8"), ("src_ip_noise", True)]),
+                OrderedDict([("src_ip", "8.8.4.4"), ("src_ip_noise", False)]),
+            ]
+        )
+
+        result = runner.invoke(
+            subcommand.enrich,
+            ["--format-in", "csv", "--context", "-w", "2"],
+            input="<text>",
+        )
+        assert result.exit_code == 0
+        assert result.output == (
+            "src_ip,src_ip_noise\n8.8.8.8,True\n8.8.4.4,False\n"
+        )
+        assert api_client.enrich.call_args[1] == {
+            "input_format": "csv",
+            "fields": None,
+            "context": True,
+            "max_workers": 2,
+        }
+
+    @pytest.mark.parametrize("workers", ["0", "-1"])
+    def test_invalid_workers(self, api_client, workers):
+        """Number of workers must be positive."""
+        runner = CliRunner()
+
+        result = runner.invoke(subcommand.enrich, ["-w", workers], input="<text>")
+        assert result.exit_code == 2
+        api_client.enrich.assert_not_called()
+
+
 class TestFeedback(object):
     """Feedback subcommand test cases."""
 
@@ -243,9 +623,50 @@ class TestFilter(object):
         assert result.exit_code == 0
         assert result.output == "".join(expected_output)
         api_client.filter.assert_called_with(
-            input_text, noise_only=False, riot_only=False
+            input_text,
+            noise_only=False,
+            riot_only=False,
+            markup={},
+            input_format="text",
+            fields=None,
+            chunk_bytes=None,
+            chunk_ip_addresses=None,
+            line_cache_size=0,
+            ipv6=False,
         )
 
+    @pytest.mark.parametrize(
+        "text, expected_output",
+        [
+            (b"<input_text>", (b"<output_text>",)),
+            (b"<input_text>", (b"<chunk_1>\n", b"\xff<chunk_2>\n")),
+        ],
+    )
+    def test_mapped_input_file(self, api_client, tmp_path, text, expected_output):
+        """Filter text from a regular file through a memory map."""
+        runner = CliRunner()
+
+        input_path = tmp_path / "input.txt"
+        input_path.write_bytes(text)
+        api_client.filter.return_value = expected_output
+
+        result = runner.invoke(subcommand.filter, ["-i", str(input_path)])
+        assert result.exit_code == 0
+        assert result.stdout_bytes == b"".join(expected_output)
+        args, kwargs = api_client.filter.call_args
+        assert isinstance(args[0], MappedLines)
+        assert kwargs == {
+            "noise_only": False,
+            "riot_only": False,
+            "markup": {},
+            "input_format": "text",
+            "fields": None,
+            "chunk_bytes": None,
+            "chunk_ip_addresses": None,
+            "line_cache_size": 0,
+            "ipv6": False,
+        }
+
     @pytest.mark.parametrize(
         "text, expected_output",
         [
@@ -266,6 +687,226 @@ class TestFilter(object):
         assert api_client.filter.call_args[1] == {
             "noise_only": False,
             "riot_only": False,
+            "markup": {},
+            "input_format": "text",
+            "fields": None,
+            "chunk_bytes": None,
+            "chunk_ip_addresses": None,
+            "line_cache_size": 0,
+            "ipv6": False,
+        }
+
+    @pytest.mark.parametrize(
+        "output_mode, expected_markup",
+        [
+            ("ansi", FILTER_ANSI_MARKUP),
+            ("plain", {}),
+            ("tagged", FILTER_MARKUP["tagged"]),
+        ],
+    )
+    def test_output_mode(self, api_client, output_mode, expected_markup):
+        """Markup templates are selected from the output mode."""
+        runner = CliRunner()
+
+        api_client.filter.return_value = ["<output_text>"]
+
+        result = runner.invoke(
+            subcommand.filter, ["--output-mode", output_mode], input="<input_text>"
+        )
+        assert result.exit_code == 0
+        assert result.output == "<output_text>"
+        assert api_client.filter.call_args[1]["markup"] == expected_markup
+
+    def test_split(self, api_client, tmp_path):
+        """Lines are split into noise, RIOT and clean files."""
+        runner = CliRunner()
+
+        def split(text, sinks, **_kwargs):
+            for route, sink in sinks.items():
+                sink.write("<{}>".format(route))
+
+        api_client.split.side_effect = split
+        paths = {route: tmp_path / route for route in ("noise", "riot", "clean")}
+
+        result = runner.invoke(
+            subcommand.filter,
+            [
+                "--noise-output",
+                str(paths["noise"]),
+                "--riot-output",
+                str(paths["riot"]),
+                "--clean-output",
+                str(paths["clean"]),
+            ],
+            input="<input_text>",
+        )
+        assert result.exit_code == 0
+        assert result.output == ""
+        for route, path in paths.items():
+            assert path.read_text() == "<{}>".format(route)
+        api_client.filter.assert_not_called()
+        assert api_client.split.call_args[1]["summary"] is None
+        assert api_client.split.call_args[1]["markup"] == {}
+
+    def test_summary(self, api_client, tmp_path):
+        """Selected lines are written to the output along with the summary."""
+        runner = CliRunner()
+
+        def split(text, sinks, summary, **_kwargs):
+            sinks["noise"].write("<output_text>")
+            summary.write("<summary>")
+
+        api_client.split.side_effect = split
+        summary_path = tmp_path / "summary.jsonl"
+
+        result = runner.invoke(
+            subcommand.filter,
+            ["--noise-only", "--summary", str(summary_path)],
+            input="<input_text>",
+        )
+        assert result.exit_code == 0
+        assert result.output == "<output_text>"
+        assert summary_path.read_text() == "<summary>"
+
+    def test_split_noise_only(self, api_client, tmp_path):
+        """Noise only can't be used when splitting lines."""
+        runner = CliRunner()
+
+        result = runner.invoke(
+            subcommand.filter,
+            ["--noise-only", "--clean-output", str(tmp_path / "clean")],
+            input="<input_text>",
+        )
+        assert result.exit_code == 2
+        assert "--noise-only" in result.output
+        api_client.split.assert_not_called()
+
+    def test_ipv6(self, api_client):
+        """IPv6 extraction is enabled."""
+        runner = CliRunner()
+
+        api_client.filter.return_value = ["<output_text>"]
+
+        result = runner.invoke(subcommand.filter, ["--ipv6"], input="<input_text>")
+        assert result.exit_code == 0
+        assert api_client.filter.call_args[1]["ipv6"] is True
+
+    def test_line_cache(self, api_client):
+        """Line cache size is passed to the API client."""
+        runner = CliRunner()
+
+        api_client.filter.return_value = ["<output_text>"]
+
+        result = runner.invoke(
+            subcommand.filter, ["--line-cache", "1000"], input="<input_text>"
+        )
+        assert result.exit_code == 0
+        assert api_client.filter.call_args[1]["line_cache_size"] == 1000
+
+    def test_auto_output_mode_terminal(self, api_client):
+        """Colors are used when writing to a terminal."""
+        runner = CliRunner()
+
+        api_client.filter.return_value = ["<output_text>"]
+
+        with patch("greynoise.cli.subcommand.click.open_file") as open_file:
+            open_file.return_value.isatty.return_value = True
+            result = runner.invoke(subcommand.filter, ["-i", StringIO("<text>")])
+        assert result.exit_code == 0
+        open_file.return_value.write.assert_called_with("<output_text>")
+        assert api_client.filter.call_args[1]["markup"] == FILTER_ANSI_MARKUP
+
+    def test_input_format(self, api_client):
+        """Filter structured input using only the given fields."""
+        runner = CliRunner()
+
+        api_client.filter.return_value = ["<output_text>"]
+
+        result = runner.invoke(
+            subcommand.filter,
+            ["--format-in", "jsonl", "--field", "src_ip", "--field", "dest_ip"],
+            input="<input_text>",
+        )
+        assert result.exit_code == 0
+        assert result.output == "<output_text>"
+        assert api_client.filter.call_args[1] == {
+            "noise_only": False,
+            "riot_only": False,
+            "markup": {},
+            "input_format": "jsonl",
+            "fields": ["src_ip", "dest_ip"],
+            "chunk_bytes": None,
+            "chunk_ip_addresses": None,
+            "line_cache_size": 0,
+            "ipv6": False,
+        }
+
+    def test_dry_run(self, api_client):
+        """Estimate API cost as JSON without filtering."""
+        runner = CliRunner()
+
+        estimate = {
+            "line_count": 10,
+            "ip_count": 5,
+            "ip_count_error": 0.0081,
+            "requests": {"noise/multi/quick": 1},
+            "scan_time": 0.01,
+            "projected_time": 0.51,
+        }
+        api_client.estimate.return_value = estimate
+
+        result = runner.invoke(
+            subcommand.filter, ["--dry-run", "--ipv6"], input="<input_text>"
+        )
+        assert result.exit_code == 0
+        assert json.loads(result.output) == estimate
+        assert api_client.estimate.call_args[1]["command"] == "filter"
+        assert api_client.estimate.call_args[1]["ipv6"] is True
+        api_client.filter.assert_not_called()
+
+    def test_compressed_input_file(self, api_client, tmp_path):
+        """Filter text from a compressed file."""
+        runner = CliRunner()
+
+        input_path = tmp_path / "input.txt.gz"
+        input_path.write_bytes(gzip.compress(b"line 1\nline 2"))
+
+        def filter_lines(text, **_kwargs):
+            return [b"<" + line + b">" for line in text]
+
+        api_client.filter.side_effect = filter_lines
+
+        result = runner.invoke(subcommand.filter, ["-i", str(input_path)])
+        assert result.exit_code == 0
+        assert result.stdout_bytes == b"<line 1\n><line 2>"
+
+    @pytest.mark.parametrize(
+        "text, expected_output",
+        [
+            (b"<input_text>\xff", (b"<output_text>\xff",)),
+            (b"<input_text>", (b"<chunk_1>\n", b"<chunk_2>\n")),
+        ],
+    )
+    def test_binary_stdin_input(self, api_client, text, expected_output):
+        """Filter bytes from stdin without decoding them."""
+        runner = CliRunner()
+
+        api_client.filter.return_value = expected_output
+
+        result = runner.invoke(subcommand.filter, ["--binary"], input=text)
+        assert result.exit_code == 0
+        assert result.stdout_bytes == b"".join(expected_output)
+        assert api_client.filter.call_args[0][0].read() == text
+        assert api_client.filter.call_args[1] == {
+            "noise_only": False,
+            "riot_only": False,
+            "markup": {},
+            "input_format": "text",
+            "fields": None,
+            "chunk_bytes": None,
+            "chunk_ip_addresses": None,
+            "line_cache_size": 0,
+            "ipv6": False,
         }
 
     @pytest.mark.parametrize(
@@ -288,6 +929,13 @@ class TestFilter(object):
         assert api_client.filter.call_args[1] == {
             "noise_only": True,
             "riot_only": False,
+            "markup": {},
+            "input_format": "text",
+            "fields": None,
+            "chunk_bytes": None,
+            "chunk_ip_addresses": None,
+            "line_cache_size": 0,
+            "ipv6": False,
         }
 
     @pytest.mark.parametrize(
@@ -310,6 +958,13 @@ class TestFilter(object):
         assert api_client.filter.call_args[1] == {
             "noise_only": False,
             "riot_only": True,
+            "markup": {},
+            "input_format": "text",
+            "fields": None,
+            "chunk_bytes": None,
+            "chunk_ip_addresses": None,
+            "line_cache_size": 0,
+            "ipv6": False,
         }
 
     @pytest.mark.parametrize(
@@ -332,6 +987,13 @@ class TestFilter(object):
         assert api_client.filter.call_args[1] == {
             "noise_only": False,
             "riot_only": False,
+            "markup": {},
+            "input_format": "text",
+            "fields": None,
+            "chunk_bytes": None,
+            "chunk_ip_addresses": None,
+            "line_cache_size": 0,
+            "ipv6": False,
         }
 
     def test_request_failure(self, api_client):
@@ -793,7 +1455,7 @@ class TestQuick(object):
         result = runner.invoke(subcommand.quick, ["-f", output_format, ip_address])
         assert result.exit_code == 0
         assert result.output.strip("\n") == expected
-        api_client.quick.assert_called_with(ip_addresses=[ip_address])
+        api_client.quick.assert_called_with(ip_addresses=[ip_address], as_table=True)
 
     @pytest.mark.parametrize(
         "ip_addresses, mock_response, expected",
@@ -826,7 +1488,21 @@ class TestQuick(object):
         )
         assert result.exit_code == 0
         assert result.output.strip("\n") == expected
-        api_client.quick.assert_called_with(ip_addresses=ip_addresses)
+        api_client.quick.assert_called_with(ip_addresses=ip_addresses, as_table=True)
+
+    def test_compressed_input_file(self, api_client, tmp_path):
+        """Quickly check IP address from compressed input file."""
+        runner = CliRunner()
+
+        input_path = tmp_path / "input.txt.gz"
+        input_path.write_bytes(gzip.compress(b"8.8.8.8\n8.8.8.9\n"))
+        api_client.quick.return_value = []
+
+        result = runner.invoke(subcommand.quick, ["-i", str(input_path)])
+        assert result.exit_code == 0
+        api_client.quick.assert_called_with(
+            ip_addresses=["8.8.8.8", "8.8.8.9"], as_table=True
+        )
 
     @pytest.mark.parametrize(
         "ip_addresses, mock_response, expected",
@@ -859,7 +1535,7 @@ class TestQuick(object):
         )
         assert result.exit_code == 0
         assert result.output.strip("\n") == expected
-        api_client.quick.assert_called_with(ip_addresses=ip_addresses)
+        api_client.quick.assert_called_with(ip_addresses=ip_addresses, as_table=True)
 
     def test_no_ip_address_passed(self, api_client):
         """Usage is returned if no IP address or input file is passed."""
@@ -893,6 +1569,142 @@ class TestQuick(object):
         assert expected in result.output
         api_client.quick.assert_not_called()
 
+    @pytest.mark.parametrize(
+        "output_format, expected",
+        (
+            (
+                "json",
+                json.dumps(
+                    [
+                        {
+                            "code": "0x01",
+                            "code_message": "<message>",
+                            "ip": "8.8.8.8",
+                            "noise": True,
+                            "riot": False,
+                        }
+                    ],
+                    indent=4,
+                    sort_keys=True,
+                ),
+            ),
+            ("txt", "8.8.8.8 is classified as NOISE."),
+        ),
+    )
+    def test_table(self, api_client, output_format, expected):
+        """Results are formatted from a columnar table."""
+        runner = CliRunner()
+
+        api_client.quick.return_value = QuickResultTable.from_results(
+            [{"ip": "8.8.8.8", "noise": True, "code": "0x01"}], {"0x01": "<message>"}
+        )
+
+        result = runner.invoke(subcommand.quick, ["-f", output_format, "8.8.8.8"])
+        assert result.exit_code == 0
+        assert result.output.strip("\n") == expected
+
+    def test_community(self, api_client):
+        """Community offering message is returned instead of a table."""
+        runner = CliRunner()
+
+        with patch("greynoise.cli.decorator.GreyNoise") as api_client_cls:
+            api_client_cls.return_value = GreyNoise(
+                api_key="<api_key>", offering="community"
+            )
+            result = runner.invoke(
+                subcommand.quick, ["-O", "community", "-f", "json", "8.8.8.8"]
+            )
+        assert result.exit_code == 0
+        assert json.loads(result.output) == [
+            {"message": "Quick Lookup not supported with Community offering"}
+        ]
+
+    @pytest.mark.parametrize(
+        "output_format, expected",
+        (
+            (
+                "json",
+                '{"ip": "8.8.8.8", "noise": true}\n{"ip": "8.8.8.9", "noise": false}',
+            ),
+            (
+                "txt",
+                "8.8.8.8 is classified as NOISE.\n"
+                "8.8.8.9 is classified as NOT NOISE.",
+            ),
+        ),
+    )
+    def test_stream(self, api_client, output_format, expected):
+        """Results are written as they are streamed."""
+        runner = CliRunner()
+
+        api_client.quick_iter.return_value = (
+            result
+            for result in [
+                {"ip": "8.8.8.8", "noise": True},
+                {"ip": "8.8.8.9", "noise": False},
+            ]
+        )
+
+        result = runner.invoke(
+            subcommand.quick,
+            ["--stream", "-w", "2", "-f", output_format, "8.8.8.8", "8.8.8.9"],
+        )
+        assert result.exit_code == 0
+        assert result.output.strip("\n") == expected
+        api_client.quick_iter.assert_called_with(
+            ip_addresses=["8.8.8.8", "8.8.8.9"], ordered=True, max_workers=2
+        )
+        api_client.quick.assert_not_called()
+
+    def test_stream_completion_order(self, api_client):
+        """Streamed results may be written in completion order."""
+        runner = CliRunner()
+
+        api_client.quick_iter.return_value = (result for result in [])
+
+        result = runner.invoke(
+            subcommand.quick, ["--stream", "--completion-order", "8.8.8.8"]
+        )
+        assert result.exit_code == 0
+        api_client.quick_iter.assert_called_with(
+            ip_addresses=["8.8.8.8"], ordered=False, max_workers=1
+        )
+
+    def test_stream_exception(self, api_client):
+        """Error is displayed on requests library exception while streaming."""
+        runner = CliRunner()
+
+        def quick_iter(**kwargs):
+            yield {"ip": "8.8.8.8", "noise": True}
+            raise RequestException("<error message>")
+
+        api_client.quick_iter.side_effect = quick_iter
+
+        result = runner.invoke(
+            subcommand.quick, ["--stream", "-f", "json", "8.8.8.8", "8.8.8.9"]
+        )
+        assert result.exit_code == -1
+        assert result.output == (
+            '{"ip": "8.8.8.8", "noise": true}\nAPI error: <error message>\n'
+        )
+
+    @pytest.mark.parametrize(
+        "args",
+        (
+            ["--stream", "-f", "xml"],
+            ["--completion-order"],
+            ["-w", "2"],
+        ),
+    )
+    def test_stream_usage_error(self, api_client, args):
+        """Streaming options can't be combined with other options."""
+        runner = CliRunner()
+
+        result = runner.invoke(subcommand.quick, args + ["8.8.8.8"])
+        assert result.exit_code == 2
+        api_client.quick.assert_not_called()
+        api_client.quick_iter.assert_not_called()
+
     def test_invalid_ip_address_as_argument(self, api_client):
         """Quick subcommand fails when ip_address is invalid."""
         runner = CliRunner()
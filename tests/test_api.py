@@ -1,10 +1,24 @@
 """GreyNoise API client test cases."""
 
+import collections
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+
 import pytest
 from mock import Mock, call, patch
 
 from greynoise.__version__ import __version__
 from greynoise.api import GreyNoise
+from greynoise.api.analyzer import Analyzer
+from greynoise.api.chunker import Chunker, ChunkSizeController
+from greynoise.api.enricher import Enricher
+from greynoise.api.extractor import TextExtractor
+from greynoise.api.filter import ClassifiedIPAddress, ClassifiedLine, Filter
+from greynoise.api.reader import MappedLines
+from greynoise.api.table import QuickResultTable
 from greynoise.exceptions import RateLimitError, RequestFailure
 
 
@@ -147,10 +161,12 @@ class TestAnalyze(object):
     def client(self, client):
         """API client fixture with quick method mocked."""
         client.quick = Mock(
-            return_value=[
-                {"ip": "8.8.8.8", "noise": True, "riot": False},
-                {"ip": "123.123.123.123", "noise": False, "riot": False},
-            ]
+            return_value=QuickResultTable.from_results(
+                [
+                    {"ip": "8.8.8.8", "noise": True, "riot": False},
+                    {"ip": "123.123.123.123", "noise": False, "riot": False},
+                ]
+            )
         )
         client.riot = Mock(return_value={"ip": "8.8.8.8", "riot": False})
         client.stats = Mock(
@@ -271,6 +287,764 @@ class TestAnalyze(object):
         output = client.analyze(text)
         assert output == expected_output
 
+    def test_analyze_bytes(self, client):
+        """Analyze bytes without decoding them."""
+        output = client.analyze(b"8.8.8.8 \xff\n123.123.123.123\n8.8.8.8")
+        assert output["summary"]["ip_count"] == 2
+        assert sorted(output["query"]) == ["123.123.123.123", "8.8.8.8"]
+
+    def test_analyze_structured_input(self, client):
+        """Analyze IP addresses only from the given fields."""
+        text = "src_ip,message\n8.8.8.8,1.1.1.1\n123.123.123.123,8.8.4.4\n"
+        output = client.analyze(text, input_format="csv", fields=["src_ip"])
+        assert output["summary"]["ip_count"] == 2
+        assert sorted(output["query"]) == ["123.123.123.123", "8.8.8.8"]
+
+    def test_analyze_mapped_lines(self, client, tmp_path):
+        """Analyze memory mapped input."""
+        input_path = tmp_path / "input.txt"
+        input_path.write_bytes(b"8.8.8.8\n\xff\n123.123.123.123")
+        with open(str(input_path)) as input_file:
+            with MappedLines.from_file(input_file) as mapped_lines:
+                output = client.analyze(mapped_lines)
+        assert output["summary"]["ip_count"] == 2
+        assert sorted(output["query"]) == ["123.123.123.123", "8.8.8.8"]
+
+
+class TestBatchStats(object):
+    """Greynoise client analyze with batched stats test cases."""
+
+    TEXT = "".join(
+        "8.8.8.{0} 2001:db8::{0}\n".format(index) for index in range(20)
+    )
+
+    @staticmethod
+    def get_stats(ip_addresses):
+        """Stats as the API would return them for some IP addresses."""
+        countries = collections.Counter(
+            "country_{}".format(len(ip_address) % 3) for ip_address in ip_addresses
+        )
+        return {
+            "count": len(ip_addresses),
+            "stats": {
+                "countries": [
+                    {"country": country, "count": count}
+                    for country, count in countries.items()
+                ],
+                "tags": None,
+            },
+        }
+
+    @pytest.fixture
+    def client(self, client):
+        """API client fixture with quick and stats methods mocked."""
+
+        def stats(query, count=None):
+            ip_addresses = [term.replace("ip:", "") for term in query.split(" OR ")]
+            return dict(self.get_stats(ip_addresses), query=query)
+
+        client.quick = Mock(
+            side_effect=lambda ip_addresses, as_table: QuickResultTable.from_results(
+                {"ip": ip_address, "noise": False} for ip_address in ip_addresses
+            )
+        )
+        client.stats = Mock(side_effect=stats)
+        yield client
+
+    def test_same_stats(self, client):
+        """Batched stats are the same as stats for each IP address."""
+        expected = client.analyze(self.TEXT, ipv6=True)
+        assert client.stats.call_count == 40
+
+        client.stats.reset_mock()
+        result = client.analyze(self.TEXT, ipv6=True, batch_stats=True)
+        assert client.stats.call_count == 21
+        assert sorted(result.pop("query")) == sorted(expected.pop("query"))
+        assert result == expected
+
+    def test_query_max_length(self, client):
+        """Batches are split to keep queries under the maximum length."""
+        with patch.object(Analyzer, "ANALYZE_STATS_QUERY_MAX_LENGTH", 60):
+            result = client.analyze(self.TEXT, batch_stats=True)
+        assert result["count"] == 20
+        queries = [stats_call[1]["query"] for stats_call in client.stats.call_args_list]
+        assert len(queries) == 5
+        assert all(len(query) <= 60 for query in queries)
+
+    def test_fallback(self, client):
+        """IP addresses are queried one by one when a batched query fails."""
+        stats = client.stats.side_effect
+
+        def failing_stats(query, **kwargs):
+            if " OR " in query:
+                raise RequestFailure(400, {"message": "<error>"})
+            return stats(query, **kwargs)
+
+        client.stats.side_effect = failing_stats
+        result = client.analyze(self.TEXT, batch_stats=True)
+        assert client.stats.call_count == 21
+        assert result["count"] == 20
+
+    @staticmethod
+    def organization_stats(query, count=10):
+        """Stats with a different organization for every IP address.
+
+        Sections are cut to ``count`` elements (10 by default) as the API does.
+
+        """
+        ip_addresses = [term.replace("ip:", "") for term in query.split(" OR ")]
+        organizations = [
+            {"organization": "organization_{}".format(ip_address), "count": 1}
+            for ip_address in ip_addresses
+        ]
+        return {
+            "query": query,
+            "count": len(ip_addresses),
+            "stats": {"organizations": organizations[:count]},
+        }
+
+    def test_all_elements(self, client):
+        """Batched queries get every element, not only the default page."""
+        client.stats.side_effect = self.organization_stats
+        expected = client.analyze(self.TEXT)
+
+        client.stats.reset_mock()
+        result = client.analyze(self.TEXT, batch_stats=True)
+        assert client.stats.call_count == 1
+        assert client.stats.call_args[1]["count"] == 200
+        assert sorted(result.pop("query")) == sorted(expected.pop("query"))
+        assert result == expected
+        assert len(result["stats"]["organizations"]) == 20
+
+    def test_truncated_fallback(self, client):
+        """IP addresses are queried one by one when sections might be cut."""
+        client.stats.side_effect = self.organization_stats
+        expected = client.analyze(self.TEXT)
+
+        client.stats.reset_mock()
+        with patch.object(Analyzer, "ANALYZE_BATCH_STATS_COUNT_PER_IP", 1):
+            result = client.analyze(self.TEXT, batch_stats=True)
+        assert client.stats.call_count == 21
+        assert result == expected
+
+    def test_rate_limit(self, client):
+        """Rate limit errors are not retried one by one."""
+        client.stats.side_effect = RateLimitError()
+        with pytest.raises(RateLimitError):
+            client.analyze(self.TEXT, batch_stats=True)
+        assert client.stats.call_count == 1
+
+
+class TestConcurrentStats(object):
+    """Greynoise client analyze with concurrent stats queries test cases."""
+
+    TEXT = TestBatchStats.TEXT
+    get_stats = staticmethod(TestBatchStats.get_stats)
+    client = TestBatchStats.client
+
+    @pytest.mark.parametrize("batch_stats", [False, True])
+    def test_same_output(self, client, batch_stats):
+        """Output is the same regardless of the number of workers."""
+        expected = client.analyze(self.TEXT, ipv6=True, batch_stats=batch_stats)
+        for max_workers in (2, 8):
+            result = client.analyze(
+                self.TEXT, ipv6=True, batch_stats=batch_stats, max_workers=max_workers
+            )
+            assert result == expected
+
+    def test_rate_limit(self, client):
+        """Rate limited queries are retried after waiting."""
+        stats = client.stats.side_effect
+        client.stats.side_effect = [RateLimitError()] + [
+            stats("8.8.8.{}".format(index)) for index in range(20)
+        ]
+        with patch("greynoise.api.analyzer.time.sleep") as sleep:
+            result = client.analyze(self.TEXT, max_workers=2)
+        assert result["count"] == 20
+        assert client.stats.call_count == 21
+        assert sleep.call_count >= 1
+
+    def test_rate_limit_retries(self, client):
+        """Rate limit errors are raised once retries are exhausted."""
+        client.stats.side_effect = RateLimitError()
+        with patch("greynoise.api.analyzer.time.sleep"):
+            with pytest.raises(RateLimitError):
+                client.analyze(self.TEXT, max_workers=2)
+
+    def test_bounded_submissions(self, client):
+        """Batches are submitted as their results are consumed."""
+        analyzer = Analyzer(client, max_workers=2)
+        ip_addresses = ["8.8.8.{}".format(index) for index in range(20)]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with patch.object(executor, "submit", wraps=executor.submit) as submit:
+                query_stats = analyzer._lookup_stats(ip_addresses, executor)
+                assert next(query_stats)["query"] == "8.8.8.0"
+                assert submit.call_count == 2
+                assert len(list(query_stats)) == 19
+                assert submit.call_count == 20
+
+    def test_invalid_workers(self, client):
+        """Number of workers must be positive."""
+        with pytest.raises(ValueError):
+            client.analyze(self.TEXT, max_workers=0)
+
+
+class TestStreamingStats(object):
+    """Greynoise client analyze with incremental stats aggregation test cases."""
+
+    TEXT = TestBatchStats.TEXT
+    get_stats = staticmethod(TestBatchStats.get_stats)
+    client = TestBatchStats.client
+
+    def test_snapshot(self, client):
+        """Partial stats can be obtained while the analysis is running."""
+        analyzer = Analyzer(client)
+        assert analyzer.snapshot() is None
+
+        stats = client.stats.side_effect
+        snapshots = []
+
+        def snapshot_stats(query):
+            snapshots.append(analyzer.snapshot())
+            return stats(query)
+
+        client.stats.side_effect = snapshot_stats
+        result = analyzer.analyze(self.TEXT)
+        assert [snapshot["count"] for snapshot in snapshots] == list(range(20))
+        assert snapshots[10]["query"] == result["query"][:10]
+        assert sum(
+            country["count"] for country in snapshots[10]["stats"]["countries"]
+        ) == 10
+
+        snapshot = analyzer.snapshot()
+        assert "summary" not in snapshot
+        result.pop("summary")
+        assert snapshot == result
+
+    def test_counters(self, client):
+        """Stats are folded into counters as soon as they are received."""
+        analyzer = Analyzer(client, batch_stats=True)
+        analyzer.analyze(self.TEXT)
+        (countries,) = analyzer._text_stats["stats"].values()
+        assert isinstance(countries, collections.Counter)
+        assert sum(countries.values()) == 20
+
+    def test_iterator(self, client):
+        """Chunk stats are consumed lazily."""
+        analyzer = Analyzer(client)
+        chunk = next(
+            Chunker(TextExtractor(client), 1000, 10).chunks(self.TEXT.splitlines(True))
+        )
+        _, chunk_stats = analyzer._analyze_chunk(chunk, set())
+        assert client.stats.call_count == 0
+        next(chunk_stats)
+        assert client.stats.call_count == 1
+
+
+class TestCompactIPAddresses(object):
+    """Greynoise client analyze with compact IP address set test cases."""
+
+    TEXT = TestBatchStats.TEXT + "8.8.8.0 not-an-ip 0.0.0.0\n"
+    get_stats = staticmethod(TestBatchStats.get_stats)
+    client = TestBatchStats.client
+
+    def test_same_output(self, client):
+        """Output is the same with a compact IP address set."""
+        expected = client.analyze(self.TEXT, ipv6=True)
+        result = client.analyze(self.TEXT, ipv6=True, compact_ip_addresses=True)
+        assert result == expected
+        assert result["summary"]["ip_count"] == 41
+
+    def test_summary_chunks(self, client):
+        """Quick checks for the summary are made in chunks."""
+        with patch.object(client, "IP_QUICK_CHECK_CHUNK_SIZE", 10):
+            analyzer = Analyzer(
+                client, ipv6=True, chunk_ip_addresses=10, compact_ip_addresses=True
+            )
+        result = analyzer.analyze(self.TEXT)
+        assert result["summary"]["ip_count"] == 41
+        assert client.quick.call_count == 5
+
+
+class TestCheckpointedAnalyze(object):
+    """Greynoise client checkpointed analyze test cases."""
+
+    TEXT = TestBatchStats.TEXT
+    get_stats = staticmethod(TestBatchStats.get_stats)
+    client = TestBatchStats.client
+
+    def analyzer(self, client, checkpoint_path, **kwargs):
+        """Analyzer with chunks of 5 unique IP addresses."""
+        with patch.object(client, "IP_QUICK_CHECK_CHUNK_SIZE", 5):
+            return Analyzer(
+                client, chunk_ip_addresses=5, checkpoint_path=checkpoint_path, **kwargs
+            )
+
+    def test_checkpoint(self, client, tmp_path):
+        """Output is the same with checkpoints."""
+        expected = self.analyzer(client, None).analyze(self.TEXT)
+        checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+        client.quick.reset_mock()
+        result = self.analyzer(client, checkpoint_path).analyze(self.TEXT)
+        assert result == expected
+        assert client.quick.call_count == 4
+
+    @pytest.mark.parametrize(
+        "batch_stats, failed_call_count, call_count",
+        [(False, 7, 15), (True, 1, 3)],
+    )
+    def test_resume(
+        self, client, tmp_path, batch_stats, failed_call_count, call_count
+    ):
+        """Analysis continues from the checkpoint without repeating look-ups."""
+        expected = self.analyzer(client, None, batch_stats=batch_stats).analyze(
+            self.TEXT
+        )
+        checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+
+        stats = client.stats.side_effect
+
+        def failing_stats(query, **kwargs):
+            if client.stats.call_count > failed_call_count:
+                raise RateLimitError()
+            return stats(query, **kwargs)
+
+        client.stats.reset_mock()
+        client.stats.side_effect = failing_stats
+        with pytest.raises(RateLimitError):
+            self.analyzer(client, checkpoint_path, batch_stats=batch_stats).analyze(
+                self.TEXT
+            )
+
+        client.stats.reset_mock()
+        client.stats.side_effect = stats
+        result = self.analyzer(
+            client, checkpoint_path, batch_stats=batch_stats, resume=True
+        ).analyze(self.TEXT)
+        assert result == expected
+        assert client.stats.call_count == call_count
+
+    def test_resume_header(self, client, tmp_path):
+        """Header is kept when resuming CSV input."""
+        text = "src_ip\n" + "".join("8.8.8.{}\n".format(index) for index in range(20))
+        checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+        self.analyzer(client, checkpoint_path, input_format="csv").analyze(
+            text.splitlines(True)[:11]
+        )
+        client.stats.reset_mock()
+        result = self.analyzer(
+            client, checkpoint_path, input_format="csv", resume=True
+        ).analyze(text)
+        assert result["summary"]["ip_count"] == 20
+        assert client.stats.call_count == 10
+
+    def test_resume_without_checkpoint(self, client, tmp_path):
+        """Analysis starts from the beginning if there's no checkpoint."""
+        checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+        result = self.analyzer(client, checkpoint_path, resume=True).analyze(self.TEXT)
+        assert result["count"] == 20
+
+    def test_resume_requires_checkpoint(self, client):
+        """A checkpoint file is required to resume."""
+        with pytest.raises(ValueError):
+            Analyzer(client, resume=True)
+
+
+class TestTopStats(object):
+    """Greynoise client analyze with top and approximate stats test cases."""
+
+    TEXT = "".join(
+        "8.8.{}.{}\n".format(index // 256, index % 256) for index in range(500)
+    )
+
+    @pytest.fixture
+    def client(self, client):
+        """API client fixture with quick and stats methods mocked."""
+
+        def stats(query):
+            # Organization counts with a long tail (1 for most of them)
+            index = int(query.split(".")[-1]) + 256 * int(query.split(".")[-2])
+            organization = "organization_{}".format(
+                index % 10 if index < 250 else index
+            )
+            return {
+                "query": query,
+                "count": 1,
+                "stats": {
+                    "organizations": [{"organization": organization, "count": 1}],
+                },
+            }
+
+        client.quick = Mock(
+            side_effect=lambda ip_addresses, as_table: QuickResultTable.from_results(
+                {"ip": ip_address, "noise": False} for ip_address in ip_addresses
+            )
+        )
+        client.stats = Mock(side_effect=stats)
+        yield client
+
+    def test_top_k(self, client):
+        """Only the top elements are kept, in the same order."""
+        expected = client.analyze(self.TEXT)
+        result = client.analyze(self.TEXT, top_k=12)
+        organizations = result["stats"]["organizations"]
+        assert organizations == expected["stats"]["organizations"][:12]
+        counts = [organization["count"] for organization in organizations]
+        assert counts == [25] * 10 + [1, 1]
+
+    def test_approximate(self, client):
+        """Approximate counts are upper bounds within their maximum error."""
+        expected = client.analyze(self.TEXT)
+        expected_counts = {
+            organization["organization"]: organization["count"]
+            for organization in expected["stats"]["organizations"]
+        }
+        with patch.object(Analyzer, "ANALYZE_SKETCH_CAPACITY", 20):
+            result = client.analyze(self.TEXT, top_k=10, approximate=True)
+        assert result["summary"] == expected["summary"]
+
+        organizations = result["stats"]["organizations"]
+        assert sorted(
+            organization["organization"] for organization in organizations
+        ) == sorted("organization_{}".format(index) for index in range(10))
+        for organization in organizations:
+            expected_count = expected_counts[organization["organization"]]
+            assert organization["count"] >= expected_count
+            assert organization["count"] - organization["max_error"] <= expected_count
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"top_k": 0}, {"approximate": True, "checkpoint_path": "<path>"}]
+    )
+    def test_invalid(self, client, kwargs):
+        """Top elements must be positive and approximate stats not checkpointed."""
+        with pytest.raises(ValueError):
+            Analyzer(client, **kwargs)
+
+
+class TestSampledAnalyze(object):
+    """Greynoise client analyze with a sample of IP addresses test cases."""
+
+    # 40 /16 networks with 250 IP addresses in each one of them
+    TEXT = "".join(
+        "10.{}.0.{}\n".format(index // 250, index % 250) for index in range(10000)
+    )
+
+    @pytest.fixture
+    def client(self, client):
+        """API client fixture with quick and stats methods mocked."""
+
+        def is_noise(ip_address):
+            # Every network has a different noise ratio (0.5 on average)
+            network, host = (int(part) for part in ip_address.split(".")[1::2])
+            return host < 250 * network / 39
+
+        def stats(query):
+            return {
+                "query": query,
+                "count": 1,
+                "stats": {
+                    "classifications": [
+                        {
+                            "classification": (
+                                "malicious" if is_noise(query) else "unknown"
+                            ),
+                            "count": 1,
+                        }
+                    ],
+                },
+            }
+
+        client.quick = Mock(
+            side_effect=lambda ip_addresses, as_table: QuickResultTable.from_results(
+                {"ip": ip_address, "noise": is_noise(ip_address), "riot": False}
+                for ip_address in ip_addresses
+            )
+        )
+        client.stats = Mock(side_effect=stats)
+        yield client
+
+    @pytest.mark.parametrize("stratify", [False, True])
+    def test_sample(self, client, stratify):
+        """Only the sample is looked up and ratios are estimated for all."""
+        expected = client.analyze(self.TEXT)
+        client.stats.reset_mock()
+        client.quick.reset_mock()
+
+        result = client.analyze(self.TEXT, sample_rate=0.1, stratify=stratify)
+        summary = result["summary"]
+        assert summary["ip_count"] == 10000
+        assert summary["sample_rate"] == 0.1
+        assert 800 < summary["sampled_ip_count"] < 1200
+        assert client.stats.call_count == summary["sampled_ip_count"]
+        assert len(result["query"]) == summary["sampled_ip_count"]
+
+        expected_ratio = expected["summary"]["noise_ip_ratio"]
+        lower_bound, upper_bound = summary["noise_ip_ratio_interval"]
+        assert lower_bound <= expected_ratio <= upper_bound
+        assert lower_bound <= summary["noise_ip_ratio"] <= upper_bound
+        lower_bound, upper_bound = summary["riot_ip_ratio_interval"]
+        assert lower_bound == 0
+        assert 0 < upper_bound < 0.01
+
+        # Section counts are scaled to all the IP addresses
+        assert result["count"] == 10000
+        for expected_element, element in zip(
+            expected["stats"]["classifications"], result["stats"]["classifications"]
+        ):
+            assert element["classification"] == expected_element["classification"]
+            assert element["count"] == pytest.approx(expected_element["count"], rel=0.1)
+
+    def test_stratified_narrower_interval(self, client):
+        """Stratified samples have narrower intervals for different networks."""
+        uniform = client.analyze(self.TEXT, sample_rate=0.1)["summary"]
+        stratified = client.analyze(self.TEXT, sample_rate=0.1, stratify=True)[
+            "summary"
+        ]
+
+        def width(summary):
+            lower_bound, upper_bound = summary["noise_ip_ratio_interval"]
+            return upper_bound - lower_bound
+
+        assert width(stratified) < width(uniform)
+
+    def test_full_sample(self, client):
+        """Sampling every IP address gives exact results."""
+        expected = client.analyze(self.TEXT)
+        result = client.analyze(self.TEXT, sample_rate=1)
+        assert result["stats"] == expected["stats"]
+        assert result["summary"]["noise_ip_ratio"] == pytest.approx(
+            expected["summary"]["noise_ip_ratio"]
+        )
+        assert result["summary"]["noise_ip_ratio_interval"] == pytest.approx(
+            [expected["summary"]["noise_ip_ratio"]] * 2
+        )
+
+    @pytest.mark.parametrize("batch_stats", [False, True])
+    def test_stratum_scale(self, client, batch_stats):
+        """Counts are scaled by the sampling ratio of every network."""
+        # One large network and many networks with a single IP address
+        text = "".join(
+            "10.0.{}.{}\n".format(index // 250, index % 250) for index in range(5000)
+        ) + "".join("10.{}.0.1\n".format(network) for network in range(1, 51))
+
+        def stats(query, count=None):
+            ip_addresses = [term.replace("ip:", "") for term in query.split(" OR ")]
+            assert len({ip_address.split(".")[1] for ip_address in ip_addresses}) == 1
+            classifications = collections.Counter(
+                "unknown" if ip_address.startswith("10.0.") else "malicious"
+                for ip_address in ip_addresses
+            )
+            return {
+                "query": query,
+                "count": len(ip_addresses),
+                "stats": {
+                    "classifications": [
+                        {"classification": classification, "count": count}
+                        for classification, count in classifications.items()
+                    ],
+                },
+            }
+
+        client.stats.side_effect = stats
+        result = client.analyze(
+            text, sample_rate=0.1, stratify=True, batch_stats=batch_stats
+        )
+        assert result["count"] == 5050
+        counts = {
+            element["classification"]: element["count"]
+            for element in result["stats"]["classifications"]
+        }
+        assert counts == {"unknown": 5000, "malicious": 50}
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"sample_rate": 0},
+            {"sample_rate": 1.5},
+            {"stratify": True},
+            {"sample_rate": 0.1, "checkpoint_path": "<path>"},
+            {"sample_rate": 0.1, "stratify": True, "approximate": True},
+        ],
+    )
+    def test_invalid(self, client, kwargs):
+        """Sample rate must be a fraction and the sample not checkpointed."""
+        with pytest.raises(ValueError):
+            Analyzer(client, **kwargs)
+
+
+class TestWindowedAnalyze(object):
+    """Greynoise client analyze for every window test cases."""
+
+    TEXT = "".join("8.8.8.{} 1.1.1.1\n".format(index % 7) for index in range(10))
+
+    @pytest.fixture
+    def client(self, client):
+        """API client fixture with requests and quick method mocked."""
+        client._request = Mock(
+            side_effect=lambda endpoint, params: dict(
+                TestBatchStats.get_stats([params["query"]]), query=params["query"]
+            )
+        )
+        client.quick = Mock(
+            side_effect=lambda ip_addresses, as_table: QuickResultTable.from_results(
+                {"ip": ip_address, "noise": ip_address.startswith("8.")}
+                for ip_address in ip_addresses
+            )
+        )
+        yield client
+
+    @staticmethod
+    def get_lines(windows):
+        """Get first line and number of lines for every window."""
+        return [
+            (window["window"]["start_line"], window["window"]["line_count"])
+            for window in windows
+        ]
+
+    def test_tumbling(self, client):
+        """Every window has the same results as analyzing its lines."""
+        lines = self.TEXT.splitlines(True)
+        windows = list(client.analyze_windows(self.TEXT, 4))
+        assert self.get_lines(windows) == [(0, 4), (4, 4), (8, 2)]
+        # The last window is closed at the end of the text
+        assert [window["window"]["partial"] for window in windows] == [
+            False,
+            False,
+            True,
+        ]
+        for window in windows:
+            start_line = window["window"]["start_line"]
+            expected = client.analyze(
+                "".join(lines[start_line : start_line + 4])  # noqa: E203
+            )
+            window.pop("window")
+            assert window == expected
+
+    def test_sliding(self, client):
+        """Windows overlap and lookups are reused from the previous window."""
+        windows = list(client.analyze_windows(self.TEXT, 4, window_slide=2))
+        assert self.get_lines(windows) == [(0, 2), (0, 4), (2, 4), (4, 4), (6, 4)]
+        # The first window covers only one slide
+        assert [window["window"]["partial"] for window in windows] == [
+            True,
+            False,
+            False,
+            False,
+            False,
+        ]
+        assert windows[1]["query"] == [
+            "1.1.1.1",
+            "8.8.8.0",
+            "8.8.8.1",
+            "8.8.8.2",
+            "8.8.8.3",
+        ]
+        assert windows[1]["summary"]["noise_ip_count"] == 4
+        # Stats are requested once for every unique IP address
+        assert client._request.call_count == 8
+
+    def test_lookups_reused(self, client):
+        """IP addresses are looked up again only after leaving the window."""
+        client.use_cache = False
+        text = "".join(
+            "{}\n".format(ip_address)
+            for ip_address in ["8.8.8.1", "8.8.8.2", "8.8.8.3", "8.8.8.1"]
+        )
+        windows = list(client.analyze_windows(text, 2, window_slide=1))
+        assert [window["summary"]["noise_ip_count"] for window in windows] == [
+            1,
+            2,
+            2,
+            2,
+        ]
+        assert [
+            request_call[1]["params"]["query"]
+            for request_call in client._request.call_args_list
+        ] == ["8.8.8.1", "8.8.8.2", "8.8.8.3", "8.8.8.1"]
+        assert [quick_call[0][0] for quick_call in client.quick.call_args_list] == [
+            ["8.8.8.1"],
+            ["8.8.8.2"],
+            ["8.8.8.3"],
+            ["8.8.8.1"],
+        ]
+
+    def test_batch_stats(self, client):
+        """Batched stats can only be used with tumbling windows."""
+        windows = list(client.analyze_windows(self.TEXT, 4, batch_stats=True))
+        assert self.get_lines(windows) == [(0, 4), (4, 4), (8, 2)]
+        with pytest.raises(ValueError):
+            client.analyze_windows(self.TEXT, 4, window_slide=2, batch_stats=True)
+
+    def test_stream(self, client):
+        """Windows are yielded as soon as they're closed."""
+        lines = []
+
+        def read_lines():
+            for line in self.TEXT.splitlines(True):
+                lines.append(line)
+                yield line
+
+        windows = client.analyze_windows(read_lines(), 3)
+        next(windows)
+        assert len(lines) == 3
+
+    def test_seconds(self, client):
+        """Windows are split by the wall time when lines are read."""
+        # Lines read at 0, 1, 2, 5, 6 and 100 seconds
+        times = [1000.0, 1001.0, 1002.0, 1005.0, 1006.0, 1100.0]
+        with patch("greynoise.api.reader.time.time", side_effect=times):
+            windows = list(
+                client.analyze_windows(
+                    self.TEXT.splitlines(True)[:6],
+                    4,
+                    window_slide=2,
+                    window_unit="seconds",
+                )
+            )
+        # Windows without lines are skipped
+        assert self.get_lines(windows) == [
+            (0, 2),
+            (0, 3),
+            (2, 2),
+            (3, 2),
+            (4, 1),
+            (5, 1),
+        ]
+        assert windows[0]["window"]["start_time"] == "1970-01-01T00:16:40Z"
+        assert windows[-1]["window"]["end_time"] == "1970-01-01T00:18:20Z"
+
+    def test_seconds_timer(self, client):
+        """Time windows are closed even when no line is read after them."""
+        window_closed = threading.Event()
+
+        def read_lines():
+            yield "8.8.8.1\n"
+            # Wait until the window is yielded before reading the next line
+            window_closed.wait(10)
+            yield "8.8.8.2\n"
+
+        windows = client.analyze_windows(read_lines(), 0.05, window_unit="seconds")
+        window = next(windows)
+        window_closed.set()
+        assert window["query"] == ["8.8.8.1"]
+        assert not window["window"]["partial"]
+        assert [window["query"] for window in windows][-1] == ["8.8.8.2"]
+
+    @pytest.mark.parametrize(
+        "args, kwargs",
+        [
+            ((0,), {}),
+            ((4,), {"window_slide": 3}),
+            ((2.5,), {}),
+            ((4,), {"window_unit": "<unit>"}),
+        ],
+    )
+    def test_invalid(self, client, args, kwargs):
+        """Window size must be a positive multiple of the slide."""
+        with pytest.raises(ValueError):
+            client.analyze_windows(self.TEXT, *args, **kwargs)
+        client._request.assert_not_called()
+
 
 class TestFilter(object):
     """GreyNoise client filter test cases."""
@@ -325,6 +1099,469 @@ class TestFilter(object):
         output = "".join(client.filter(text, noise_only=True))
         assert output == expected_output
 
+    @pytest.mark.parametrize(
+        "text, markup, expected_output",
+        [
+            ("8.8.8.8\n123.123.123.123\n", {}, "123.123.123.123\n"),
+            (b"8.8.8.8\n123.123.123.123\n", {}, b"123.123.123.123\n"),
+            (
+                "8.8.8.8 123.123.123.123\n",
+                {"noise": "[{}]", "not-noise": "{}", "riot": "({})"},
+                "[8.8.8.8] 123.123.123.123\n",
+            ),
+        ],
+    )
+    def test_markup(self, client, text, markup, expected_output):
+        """Lines are marked up using the given templates."""
+        output = list(client.filter(text, markup=markup))
+        assert output[0][:0].join(output) == expected_output
+
+    @pytest.mark.parametrize(
+        "text, noise_only, expected_output",
+        [
+            (
+                (
+                    '{"src_ip": "8.8.8.8", "msg": "123.123.123.123"}\n'
+                    '{"src_ip": "123.123.123.123", "msg": "8.8.8.8"}\n'
+                ),
+                False,
+                (
+                    '{"src_ip": "<not-noise>123.123.123.123</not-noise>", '
+                    '"msg": "8.8.8.8"}\n'
+                ),
+            ),
+            (
+                '{"src_ip": "8.8.8.8", "msg": "123.123.123.123"}\n{"msg": "8.8.8.8"}\n',
+                True,
+                '{"src_ip": "<noise>8.8.8.8</noise>", "msg": "123.123.123.123"}\n',
+            ),
+        ],
+    )
+    def test_structured_input(self, client, text, noise_only, expected_output):
+        """Filter lines using only IP addresses in the given fields."""
+        output = "".join(
+            client.filter(text, noise_only=noise_only, input_format="jsonl")
+        )
+        assert output == expected_output
+
+    def test_header_line(self, client):
+        """Header lines are always kept."""
+        text = "src_ip\n8.8.8.8\n123.123.123.123\n"
+        output = "".join(client.filter(text, noise_only=True, input_format="csv"))
+        assert output == "src_ip\n<noise>8.8.8.8</noise>\n"
+
+    @pytest.mark.parametrize(
+        "text, expected_output",
+        [
+            (
+                b"8.8.8.8\n\xff 123.123.123.123\nnot an ip address",
+                b"\xff <not-noise>123.123.123.123</not-noise>\nnot an ip address",
+            ),
+            (
+                b"8.8.8.8 123.123.123.123\n\xfe\xff",
+                (
+                    b"<noise>8.8.8.8</noise> <not-noise>123.123.123.123</not-noise>\n"
+                    b"\xfe\xff"
+                ),
+            ),
+        ],
+    )
+    def test_bytes(self, client, text, expected_output):
+        """Filter bytes without decoding them."""
+        output = b"".join(client.filter(text))
+        assert output == expected_output
+        assert sorted(client.quick.call_args[0][0]) == [
+            "123.123.123.123",
+            "8.8.8.8",
+        ]
+
+    @pytest.mark.parametrize(
+        "text, noise_only, expected_output",
+        [
+            (
+                b"8.8.8.8\n123.123.123.123\n\xff not utf-8",
+                False,
+                b"<not-noise>123.123.123.123</not-noise>\n\xff not utf-8",
+            ),
+            (
+                b"8.8.8.8 \xff\n123.123.123.123\nnot an ip address",
+                True,
+                b"<noise>8.8.8.8</noise> \xff\n",
+            ),
+        ],
+    )
+    def test_mapped_lines(self, client, tmp_path, text, noise_only, expected_output):
+        """Filter memory mapped input."""
+        input_path = tmp_path / "input.txt"
+        input_path.write_bytes(text)
+        with open(str(input_path)) as input_file:
+            with MappedLines.from_file(input_file) as mapped_lines:
+                output = b"".join(client.filter(mapped_lines, noise_only=noise_only))
+        assert output == expected_output
+
+    def test_chunk_budget(self, client):
+        """Lines are filtered in chunks limited by their size."""
+        text = "8.8.8.8\n123.123.123.123\nnot an ip address\n"
+        output = list(client.filter(text, chunk_bytes=10, markup={}))
+        assert output == ["", "123.123.123.123\n", "not an ip address\n"]
+        assert client.quick.call_args_list == [
+            call(["8.8.8.8"]),
+            call(["123.123.123.123"]),
+            call([]),
+        ]
+
+    @pytest.mark.parametrize(
+        "chunk_ip_addresses, expected", [(None, 10000), (1, 1000), (1500, 2000)]
+    )
+    def test_chunk_ip_addresses(self, client, chunk_ip_addresses, expected):
+        """Unique IP address budget is rounded up to fill whole quick requests."""
+        filter = Filter(client, chunk_ip_addresses=chunk_ip_addresses)
+        assert filter.chunk_ip_addresses == expected
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "8.8.8.8 a\n123.123.123.123 b\n8.8.8.8 a\n123.123.123.123 b\n",
+            b"8.8.8.8 a\n123.123.123.123 b\n8.8.8.8 a\n123.123.123.123 b\n",
+        ],
+    )
+    def test_line_cache(self, client, text):
+        """Repeated lines are not scanned again."""
+        filter = Filter(client, line_cache_size=10)
+        output = list(filter.filter(text, noise_only=False, riot_only=False))
+        expected = "<not-noise>123.123.123.123</not-noise> b\n"
+        if isinstance(text, bytes):
+            expected = expected.encode("ascii")
+        assert output[0][:0].join(output) == expected * 2
+        assert filter.statistics == {
+            "lines": 4,
+            "clean_lines": 2,
+            "line_cache_hits": 2,
+            "line_cache_misses": 2,
+        }
+        assert filter.line_cache_hit_rate == 0.5
+
+    @pytest.mark.parametrize("chunk_bytes", [1, 20, 1000])
+    def test_line_cache_chunks(self, client, chunk_bytes):
+        """Repeated lines get the same output regardless of chunk boundaries."""
+        text = "8.8.8.8 a\n123.123.123.123 b\nc\n" * 3
+        filter = Filter(client, chunk_bytes=chunk_bytes, line_cache_size=3)
+        output = "".join(filter.filter(text, noise_only=False, riot_only=False))
+        assert output == "<not-noise>123.123.123.123</not-noise> b\nc\n" * 3
+        assert filter.statistics["line_cache_misses"] == 3
+
+    def test_line_cache_mapped_lines(self, client, tmp_path):
+        """Cached lines don't keep references to the memory mapped file."""
+        input_path = tmp_path / "input.txt"
+        input_path.write_bytes(b"123.123.123.123\n" * 2)
+        filter = Filter(client, line_cache_size=10)
+        with open(str(input_path)) as input_file:
+            with MappedLines.from_file(input_file) as mapped_lines:
+                output = b"".join(
+                    filter.filter(mapped_lines, noise_only=False, riot_only=False)
+                )
+        assert output == b"<not-noise>123.123.123.123</not-noise>\n" * 2
+        assert filter.line_cache_hit_rate == 0.5
+
+    def test_line_cache_header(self, client):
+        """Line cache is cleared on header lines."""
+        text = (
+            "#fields\tid.orig_h\tid.resp_h\n8.8.8.8\t123.123.123.123\n"
+            "#fields\tid.resp_h\tid.orig_h\n8.8.8.8\t123.123.123.123\n"
+        )
+        filter = Filter(
+            client, input_format="zeek", fields=["id.orig_h"], line_cache_size=10
+        )
+        output = "".join(
+            filter.filter(text, noise_only=True, riot_only=False, markup={})
+        )
+        assert output == (
+            "#fields\tid.orig_h\tid.resp_h\n8.8.8.8\t123.123.123.123\n"
+            "#fields\tid.resp_h\tid.orig_h\n"
+        )
+        assert filter.statistics["line_cache_hits"] == 0
+
+
+class TestIPv6(object):
+    """Filter and analyze IPv6 test cases."""
+
+    TEXT = "2001:db8::1 a\n2001:DB8:0:0:0:0:0:1 b\n::ffff:8.8.8.8 c\n8.8.8.8 d\n"
+
+    @pytest.fixture
+    def client(self, client):
+        """API client fixture with quick and stats methods mocked."""
+
+        def quick(ip_addresses, as_table=False):
+            results = [
+                {"ip": ip_address, "noise": ip_address == "2001:db8::1", "riot": False}
+                for ip_address in ip_addresses
+            ]
+            if as_table:
+                return QuickResultTable.from_results(results)
+            return results
+
+        client.quick = Mock(side_effect=quick)
+        client.stats = Mock(
+            side_effect=lambda query: {"query": query, "count": 1, "stats": {}}
+        )
+        yield client
+
+    @pytest.mark.parametrize("binary", [False, True])
+    def test_filter(self, client, binary):
+        """Different forms of the same address are looked up just once."""
+        text = self.TEXT.encode("ascii") if binary else self.TEXT
+        output = list(client.filter(text, noise_only=True, ipv6=True, markup={}))
+        assert output[0] == text[:0].join(text.splitlines(True)[:2])
+        client.quick.assert_called_once()
+        assert sorted(client.quick.call_args[0][0]) == ["2001:db8::1", "8.8.8.8"]
+
+    def test_analyze(self, client):
+        """IPv6 addresses are analyzed in their canonical form."""
+        result = client.analyze(self.TEXT, ipv6=True)
+        assert sorted(result["query"]) == ["2001:db8::1", "8.8.8.8"]
+        assert result["summary"]["ip_count"] == 2
+        assert result["summary"]["noise_ip_count"] == 1
+
+
+class TestClassifyLines(object):
+    """Filter classify lines test cases."""
+
+    @pytest.fixture
+    def client(self, client):
+        """API client fixture with quick method mocked."""
+        client.quick = Mock(
+            return_value=[
+                {"ip": "8.8.8.8", "noise": True, "riot": True},
+                {"ip": "123.123.123.123", "noise": False, "riot": False},
+            ]
+        )
+        yield client
+
+    @pytest.mark.parametrize("binary", [False, True])
+    def test_classify_lines(self, client, binary):
+        """A record is yielded for every line."""
+        text = "8.8.8.8 - 123.123.123.123\nnot an ip address\n"
+        expected = [
+            ClassifiedLine(
+                "8.8.8.8 - 123.123.123.123\n",
+                [
+                    ClassifiedIPAddress("8.8.8.8", 0, 7, True, True),
+                    ClassifiedIPAddress("123.123.123.123", 10, 25, False, False),
+                ],
+                ["clean"],
+            ),
+            ClassifiedLine("not an ip address\n", [], ["clean"]),
+        ]
+        if binary:
+            text = text.encode("ascii")
+            expected = [
+                classified_line._replace(
+                    line=classified_line.line.encode("ascii"),
+                    ip_addresses=[
+                        ip_address._replace(
+                            ip_address=ip_address.ip_address.encode("ascii")
+                        )
+                        for ip_address in classified_line.ip_addresses
+                    ],
+                )
+                for classified_line in expected
+            ]
+        filter = Filter(client)
+        assert list(filter.classify_lines(text)) == expected
+        assert filter.statistics["lines"] == 2
+
+    def test_header(self, client):
+        """Header lines are routed to all outputs."""
+        text = "src_ip,msg\n8.8.8.8,123.123.123.123\n"
+        filter = Filter(client, input_format="csv", fields=["src_ip"])
+        header, line = filter.classify_lines(text)
+        assert header == ClassifiedLine("src_ip,msg\n", None, list(Filter.ROUTES))
+        assert line.ip_addresses == [
+            ClassifiedIPAddress("8.8.8.8", 0, 7, True, True)
+        ]
+        assert line.routes == ["noise", "riot"]
+
+    def test_chunks(self, client):
+        """Lines are looked up in chunks."""
+        filter = Filter(client, chunk_bytes=1)
+        lines = list(filter.classify_lines("8.8.8.8\n123.123.123.123\n"))
+        assert len(lines) == 2
+        assert client.quick.call_args_list == [
+            call(["8.8.8.8"]),
+            call(["123.123.123.123"]),
+        ]
+
+
+class TestSplit(object):
+    """GreyNoise client split test cases."""
+
+    TEXT = "8.8.8.8\n123.123.123.123\nnot an ip address\n8.8.8.8 123.123.123.123\n"
+
+    @pytest.fixture
+    def client(self, client):
+        """API client fixture with quick method mocked."""
+        client.quick = Mock(
+            return_value=[
+                {"ip": "8.8.8.8", "noise": True, "riot": True, "code": "0x01"},
+                {"ip": "123.123.123.123", "noise": False, "riot": False},
+            ]
+        )
+        yield client
+
+    @pytest.mark.parametrize("text", [TEXT, TEXT.encode("ascii")])
+    def test_split(self, client, text):
+        """Lines are written to the output for every route they match."""
+        noise_output = StringIO() if isinstance(text, str) else BytesIO()
+        clean_chunks = []
+        summary = StringIO()
+        client.split(
+            text,
+            {"noise": noise_output, "clean": clean_chunks.append},
+            markup={},
+            summary=summary,
+        )
+        expected_noise = text.splitlines(True)[0]
+        expected_clean = text[:0].join(text.splitlines(True)[1:])
+        assert noise_output.getvalue() == expected_noise
+        assert text[:0].join(clean_chunks) == expected_clean
+        assert [json.loads(line) for line in summary.getvalue().splitlines()] == [
+            {"ip": "8.8.8.8", "noise": True, "riot": True, "code": "0x01"},
+            {"ip": "123.123.123.123", "noise": False, "riot": False, "code": None},
+        ]
+
+    @pytest.mark.parametrize(
+        "route, noise_only, riot_only",
+        [("noise", True, False), ("riot", False, True), ("clean", False, False)],
+    )
+    def test_same_as_filter(self, client, route, noise_only, riot_only):
+        """Lines for every route are the same as the ones selected by filter."""
+        outputs = {route: StringIO() for route in Filter.ROUTES}
+        client.split(self.TEXT, outputs)
+        expected = "".join(
+            client.filter(self.TEXT, noise_only=noise_only, riot_only=riot_only)
+        )
+        assert outputs[route].getvalue() == expected
+
+    def test_summary_once_per_ip_address(self, client):
+        """IP addresses are written to the summary only once."""
+        summary = StringIO()
+        filter = Filter(client, chunk_bytes=1)
+        filter.split(self.TEXT, {}, summary=summary)
+        assert len(summary.getvalue().splitlines()) == 2
+        assert filter.statistics["lines"] == 4
+
+    def test_unknown_route(self, client):
+        """Error is raised on unknown routes."""
+        with pytest.raises(ValueError):
+            client.split(self.TEXT, {"<route>": StringIO()})
+
+
+class TestEnrich(object):
+    """GreyNoise client enrich test cases."""
+
+    @pytest.fixture
+    def client(self, client):
+        """API client fixture with quick and ip methods mocked."""
+
+        def quick(ip_addresses):
+            return [
+                {
+                    "ip": ip_address,
+                    "noise": ip_address == "8.8.8.8",
+                    "riot": False,
+                    "code": "0x01" if ip_address == "8.8.8.8" else "0x00",
+                }
+                for ip_address in ip_addresses
+            ]
+
+        client.quick = Mock(side_effect=quick)
+        client.ip = Mock(return_value={"ip": "8.8.8.8", "classification": "benign"})
+        yield client
+
+    def test_jsonl(self, client):
+        """JSON records are annotated and yielded in the input order."""
+        text = "\n".join(
+            '{{"id": {}, "src_ip": "{}", "dest_ip": "10.0.0.1"}}'.format(
+                index, "8.8.8.8" if index % 2 else "123.123.123.123"
+            )
+            for index in range(10)
+        )
+        with patch.object(Enricher, "ENRICH_BATCH_SIZE", 3):
+            records = list(client.enrich(text, fields=["src_ip"], max_workers=2))
+
+        assert [record["id"] for record in records] == list(range(10))
+        assert records[1]["greynoise"] == {
+            "src_ip": {"noise": True, "riot": False, "code": "0x01"}
+        }
+        assert records[2]["greynoise"] == {
+            "src_ip": {"noise": False, "riot": False, "code": "0x00"}
+        }
+        assert client.quick.call_count == 4
+
+    def test_invalid_jsonl(self, client):
+        """Invalid lines are skipped and values that aren't objects kept."""
+        text = '{"src_ip": "8.8.8.8"}\nnot json\n[1, 2]\n3\n{"src_ip": "8.8.4.4"}\n'
+        with patch("greynoise.api.enricher.LOGGER") as logger:
+            records = list(client.enrich(text, fields=["src_ip"]))
+        assert records == [
+            {
+                "src_ip": "8.8.8.8",
+                "greynoise": {
+                    "src_ip": {"noise": True, "riot": False, "code": "0x01"}
+                },
+            },
+            [1, 2],
+            3,
+            {
+                "src_ip": "8.8.4.4",
+                "greynoise": {
+                    "src_ip": {"noise": False, "riot": False, "code": "0x00"}
+                },
+            },
+        ]
+        logger.warning.assert_called_once()
+        assert logger.warning.call_args[1]["line_number"] == 2
+
+    def test_csv_with_context(self, client):
+        """CSV records get annotation columns for each field."""
+        text = "src_ip,message\n8.8.8.8,hello\nnot an ip address,bye\n"
+        records = list(client.enrich(text, input_format="csv", context=True))
+        assert records == [
+            {
+                "src_ip": "8.8.8.8",
+                "message": "hello",
+                "src_ip_noise": True,
+                "src_ip_riot": False,
+                "src_ip_code": "0x01",
+                "src_ip_classification": "benign",
+                "dest_ip_noise": None,
+                "dest_ip_riot": None,
+                "dest_ip_code": None,
+                "dest_ip_classification": None,
+            },
+            {
+                "src_ip": "not an ip address",
+                "message": "bye",
+                "src_ip_noise": None,
+                "src_ip_riot": None,
+                "src_ip_code": None,
+                "src_ip_classification": None,
+                "dest_ip_noise": None,
+                "dest_ip_riot": None,
+                "dest_ip_code": None,
+                "dest_ip_classification": None,
+            },
+        ]
+        client.ip.assert_called_once_with("8.8.8.8")
+
+    def test_community(self, client):
+        """Enrichment is not supported with the community offering."""
+        client.offering = "community"
+        assert client.enrich(["8.8.8.8\n"]) == [
+            {"message": "Enrichment not supported with Community offering"}
+        ]
+        client.quick.assert_not_called()
+
 
 class TestInteresting(object):
     """GreyNoise client "interesting" IP test cases."""
@@ -614,6 +1851,204 @@ class TestQuick(object):
         client.quick(ip_addresses)
         client._request.assert_has_calls([expected_request])
 
+    @pytest.mark.parametrize("use_cache", (True, False))
+    def test_duplicates(self, use_cache):
+        """Duplicate IP addresses are looked up and returned once."""
+        client = GreyNoise(api_key="<api_key>", use_cache=use_cache)
+        client._request = Mock(
+            return_value=[
+                {"code": "0x00", "ip": "8.8.8.8", "noise": False},
+                {"code": "0x01", "ip": "67.68.68.79", "noise": True},
+            ]
+        )
+        results = client.quick(
+            ["8.8.8.8", "67.68.68.79", "8.8.8.8", "not-an-ip", "not-an-ip"],
+            include_invalid=True,
+        )
+        client._request.assert_called_once_with(
+            "noise/multi/quick", json={"ips": ["8.8.8.8", "67.68.68.79"]}
+        )
+        assert [(result["ip"], result["code"]) for result in results] == [
+            ("8.8.8.8", "0x00"),
+            ("67.68.68.79", "0x01"),
+            ("not-an-ip", "404"),
+        ]
+
+    def test_invalid_logged_once(self, client):
+        """Invalid IP addresses are logged once per call."""
+        client._request = Mock(return_value=[])
+        with patch("greynoise.api.LOGGER") as logger:
+            client.quick(["not-an-ip#{}".format(index) for index in range(100)])
+        logger.warning.assert_called_once()
+        assert logger.warning.call_args[1]["count"] == 100
+
+    def test_cache_not_churned(self, client):
+        """Only results that fit in the cache are cached."""
+        ip_addresses = [
+            "8.8.{}.{}".format(index // 256, index % 256) for index in range(1500)
+        ]
+        client._request = Mock(
+            side_effect=lambda endpoint, json: [
+                {"code": "0x00", "ip": ip_address, "noise": False}
+                for ip_address in json["ips"]
+            ]
+        )
+        results = client.quick(ip_addresses)
+        assert [result["ip"] for result in results] == ip_addresses
+        assert set(client.ip_quick_check_cache) == set(ip_addresses[500:])
+
+    def test_million_ip_addresses(self, client_without_cache):
+        """Million IP address inputs are processed in linear time."""
+        client = client_without_cache
+        ip_addresses = [
+            "{}.{}.{}.{}".format(
+                1 + index % 9, index >> 16, (index >> 8) & 255, index & 255
+            )
+            for index in range(1000000)
+        ]
+        # Every tenth IP address is invalid and every valid one is duplicated
+        ip_addresses[::10] = ["not-an-ip#{}".format(index) for index in range(100000)]
+        ip_addresses += ip_addresses[1::2]
+        client._request = Mock(
+            side_effect=lambda endpoint, json: [
+                {"code": "0x00", "ip": ip_address, "noise": False}
+                for ip_address in json["ips"]
+            ]
+        )
+
+        start = time.perf_counter()
+        results = client.quick(ip_addresses, include_invalid=True)
+        elapsed = time.perf_counter() - start
+
+        assert len(results) == 1000000
+        assert client._request.call_count == 900
+        assert elapsed < 60
+
+
+class TestQuickIter(object):
+    """GreyNoise client streaming IP quick check test cases."""
+
+    @pytest.fixture
+    def client(self, client):
+        """API client fixture with small chunks and _request mocked."""
+
+        def request(endpoint, json):
+            return [
+                {"code": "0x00", "ip": ip_address, "noise": False}
+                for ip_address in json["ips"]
+            ]
+
+        client.IP_QUICK_CHECK_CHUNK_SIZE = 2
+        client._request = Mock(side_effect=request)
+        yield client
+
+    def test_chunks_requested_lazily(self, client):
+        """Results are yielded as each chunk is requested."""
+        results = client.quick_iter(["8.8.8.8", "8.8.8.9", "8.8.8.10"])
+        assert next(results)["ip"] == "8.8.8.8"
+        assert client._request.call_count == 1
+        assert [result["ip"] for result in results] == ["8.8.8.9", "8.8.8.10"]
+        assert client._request.call_count == 2
+
+    def test_cached_results_in_order(self, client):
+        """Cached results are yielded in the same order as in the input."""
+        client.quick(["8.8.8.9"])
+        client._request.reset_mock()
+
+        ip_addresses = ["8.8.8.8", "8.8.8.9", "8.8.8.10", "8.8.8.11", "8.8.8.12"]
+        results = list(client.quick_iter(ip_addresses + ["not-an-ip"]))
+        assert [result["ip"] for result in results] == ip_addresses
+        assert all("code_message" in result for result in results)
+        client._request.assert_has_calls(
+            [
+                call("noise/multi/quick", json={"ips": ["8.8.8.8", "8.8.8.10"]}),
+                call("noise/multi/quick", json={"ips": ["8.8.8.11", "8.8.8.12"]}),
+            ]
+        )
+        assert client._request.call_count == 2
+
+    @pytest.mark.parametrize("ordered", (True, False))
+    def test_workers(self, client, ordered):
+        """Chunks are requested concurrently."""
+        ip_addresses = ["8.8.8.{}".format(index) for index in range(1, 11)]
+        results = list(
+            client.quick_iter(
+                ip_addresses, include_invalid=True, ordered=ordered, max_workers=3
+            )
+        )
+        result_ip_addresses = [result["ip"] for result in results]
+        if ordered:
+            assert result_ip_addresses == ip_addresses
+        else:
+            assert sorted(result_ip_addresses) == sorted(ip_addresses)
+        assert client._request.call_count == 5
+
+    def test_single_worker_inline(self, client):
+        """Chunks are requested in the calling thread with a single worker."""
+        with patch("greynoise.api.ThreadPoolExecutor") as executor:
+            results = list(client.quick_iter(["8.8.8.8", "8.8.8.9", "8.8.8.10"]))
+        executor.assert_not_called()
+        assert [result["ip"] for result in results] == [
+            "8.8.8.8",
+            "8.8.8.9",
+            "8.8.8.10",
+        ]
+
+    def test_include_invalid(self, client):
+        """Invalid IP addresses are yielded last."""
+        results = list(
+            client.quick_iter(["not-an-ip", "8.8.8.8"], include_invalid=True)
+        )
+        assert [(result["ip"], result["code"]) for result in results] == [
+            ("8.8.8.8", "0x00"),
+            ("not-an-ip", "404"),
+        ]
+
+    @pytest.mark.parametrize("use_cache", (True, False))
+    def test_chunk_size_controller(self, use_cache):
+        """Chunk size is taken from the controller before every request."""
+        controller = Mock(size=2)
+
+        def record(size, latency, payload_bytes, error=False):
+            controller.size = 3
+
+        controller.record.side_effect = record
+        client = GreyNoise(
+            api_key="<api_key>", use_cache=use_cache, chunk_size_controller=controller
+        )
+        client._request = Mock(return_value=[])
+
+        list(client.quick_iter(["8.8.8.{}".format(index) for index in range(1, 7)]))
+        assert [
+            request_call[1]["json"]["ips"]
+            for request_call in client._request.call_args_list
+        ] == [["8.8.8.1", "8.8.8.2"], ["8.8.8.3", "8.8.8.4", "8.8.8.5"], ["8.8.8.6"]]
+        assert [
+            record_call[0][0] for record_call in controller.record.call_args_list
+        ] == [2, 3, 1]
+        assert controller.record.call_args_list[0][0][2] == len(
+            json.dumps({"ips": ["8.8.8.1", "8.8.8.2"]})
+        )
+
+    def test_chunk_size_controller_error(self):
+        """Failed requests are recorded as errors."""
+        controller = ChunkSizeController(min_size=1, max_size=4)
+        client = GreyNoise(api_key="<api_key>", chunk_size_controller=controller)
+        client._request = Mock(side_effect=RateLimitError())
+
+        with pytest.raises(RateLimitError):
+            client.quick(["8.8.8.8", "8.8.8.9"])
+        assert controller.size == 2
+        assert controller.decisions[-1].error
+
+    def test_community(self, client):
+        """Quick lookups are not supported with the community offering."""
+        client.offering = "community"
+        assert list(client.quick_iter(["8.8.8.8"])) == [
+            {"message": "Quick Lookup not supported with Community offering"}
+        ]
+        client._request.assert_not_called()
+
 
 class TestQuery(object):
     """GreyNoise client run GNQL query test cases."""
@@ -656,6 +2091,49 @@ class TestStats(object):
         )
         assert response == expected_response
 
+    def test_stats_cache(self, client):
+        """Stats are cached by normalized query and count."""
+        client._request = Mock(side_effect=lambda endpoint, params: dict(params))
+        assert client.stats("ip:8.8.8.8  OR ip:1.1.1.1") == {
+            "query": "ip:8.8.8.8  OR ip:1.1.1.1"
+        }
+        client.stats(" ip:8.8.8.8 OR ip:1.1.1.1")
+        assert client._request.call_count == 1
+
+        client.stats("ip:8.8.8.8 OR ip:1.1.1.1", count=10)
+        assert client._request.call_count == 2
+        assert len(client.stats_cache) == 2
+
+    def test_stats_cache_options(self):
+        """Stats cache has the same size and TTL as the other caches."""
+        client = GreyNoise(api_key="<api_key>", cache_max_size=5, cache_ttl=60)
+        assert client.stats_cache.maxsize == 5
+        assert client.stats_cache.ttl == 60
+
+    def test_stats_without_cache(self, client_without_cache):
+        """Stats are not cached when the cache is not used."""
+        client_without_cache._request = Mock(return_value={"count": 1})
+        client_without_cache.stats("<query>")
+        client_without_cache.stats("<query>")
+        assert client_without_cache._request.call_count == 2
+
+    def test_analyze_stats_cache(self, client):
+        """Analyzing overlapping text doesn't query stats again for IP addresses."""
+        client._request = Mock(
+            side_effect=lambda endpoint, params: dict(
+                TestBatchStats.get_stats([params["query"]]), query=params["query"]
+            )
+        )
+        client.quick = Mock(
+            side_effect=lambda ip_addresses, as_table: QuickResultTable.from_results(
+                {"ip": ip_address, "noise": False} for ip_address in ip_addresses
+            )
+        )
+        client.analyze("8.8.8.8 1.1.1.1")
+        result = client.analyze("1.1.1.1 8.8.8.8 8.8.4.4")
+        assert client._request.call_count == 3
+        assert result["count"] == 3
+
 
 class TestMeta(object):
     """GreyNoise client run GNQL stats query test cases."""
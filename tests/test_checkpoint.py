@@ -0,0 +1,114 @@
+"""Analyzer checkpoint test cases."""
+
+import os
+
+from mock import patch
+
+from greynoise.api.checkpoint import Checkpoint
+
+
+def save(checkpoint, line_count, ip_addresses):
+    """Save checkpoint record with some stats."""
+    checkpoint.save(
+        line_count,
+        ip_addresses,
+        len(ip_addresses),
+        {"spoofable": {True: line_count, False: 1}},
+        line_count,
+        0,
+    )
+
+
+class TestCheckpoint(object):
+    """Checkpoint test cases."""
+
+    def test_load(self, tmp_path):
+        """State is loaded from the last record and every IP address is kept."""
+        path = str(tmp_path / "checkpoint.jsonl")
+        with Checkpoint(path) as checkpoint:
+            save(checkpoint, 2, ["8.8.8.8"])
+            save(checkpoint, 5, ["1.1.1.1", "2.2.2.2"])
+
+        state = Checkpoint(path).load()
+        assert state == {
+            "line_count": 5,
+            "ip_addresses": ["8.8.8.8", "1.1.1.1", "2.2.2.2"],
+            "count": 2,
+            "stats": {"spoofable": {True: 5, False: 1}},
+            "noise_ip_count": 5,
+            "riot_ip_count": 0,
+        }
+
+    def test_throttled_writes(self, tmp_path):
+        """Queued records are written together."""
+        path = str(tmp_path / "checkpoint.jsonl")
+        with patch("greynoise.api.checkpoint.os.replace", wraps=os.replace) as replace:
+            with Checkpoint(path, interval=60) as checkpoint:
+                for line_count in range(1, 101):
+                    save(checkpoint, line_count, ["8.8.8.{}".format(line_count)])
+        assert replace.call_count == 1
+        assert len(Checkpoint(path).load()["ip_addresses"]) == 100
+
+    def test_bounded_size(self, tmp_path):
+        """Stats are replaced on every write and only IP addresses appended."""
+        path = tmp_path / "checkpoint.jsonl"
+        stats = {
+            "organizations": {
+                "<organization_{}>".format(index): index for index in range(1000)
+            }
+        }
+        state_sizes = []
+        for index in range(50):
+            checkpoint = Checkpoint(str(path))
+            checkpoint.load()
+            checkpoint.start(append=index > 0)
+            checkpoint.save(index, ["8.8.8.{}".format(index)], index, stats, 0, 0)
+            checkpoint.close()
+            state_sizes.append(os.path.getsize(checkpoint.state_path))
+
+        assert max(state_sizes) - min(state_sizes) < 10
+        assert path.stat().st_size == sum(
+            len("8.8.8.{}\n".format(index)) for index in range(50)
+        )
+        assert len(Checkpoint(str(path)).load()["ip_addresses"]) == 50
+
+    def test_latest_record_kept(self, tmp_path):
+        """Only the latest record is kept until it's written."""
+        checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+        save(checkpoint, 2, ["8.8.8.8"])
+        save(checkpoint, 5, ["1.1.1.1", "2.2.2.2"])
+        assert checkpoint._record["line_count"] == 5
+        assert "ip_addresses" not in checkpoint._record
+        assert checkpoint._pending_ip_addresses == ["8.8.8.8", "1.1.1.1", "2.2.2.2"]
+
+    def test_missing(self, tmp_path):
+        """No state is loaded if there's no checkpoint."""
+        assert Checkpoint(str(tmp_path / "checkpoint.jsonl")).load() is None
+
+    def test_incomplete_journal(self, tmp_path):
+        """IP addresses after the last state are discarded when appending."""
+        path = tmp_path / "checkpoint.jsonl"
+        with Checkpoint(str(path)) as checkpoint:
+            save(checkpoint, 2, ["8.8.8.8"])
+        with path.open("a") as checkpoint_file:
+            checkpoint_file.write("1.1.1")
+
+        checkpoint = Checkpoint(str(path))
+        assert checkpoint.load()["line_count"] == 2
+        checkpoint.start(append=True)
+        save(checkpoint, 3, ["1.1.1.1"])
+        checkpoint.close()
+
+        state = Checkpoint(str(path)).load()
+        assert state["line_count"] == 3
+        assert state["ip_addresses"] == ["8.8.8.8", "1.1.1.1"]
+
+    def test_new_analysis(self, tmp_path):
+        """State from a previous analysis is removed when starting again."""
+        path = str(tmp_path / "checkpoint.jsonl")
+        with Checkpoint(path) as checkpoint:
+            save(checkpoint, 2, ["8.8.8.8"])
+        checkpoint = Checkpoint(path)
+        checkpoint.start()
+        checkpoint.close()
+        assert Checkpoint(path).load() is None
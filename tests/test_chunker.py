@@ -0,0 +1,158 @@
+"""Chunker test cases."""
+
+import pytest
+
+from greynoise.api import GreyNoise
+from greynoise.api.chunker import Chunker, ChunkSizeController, round_up
+from greynoise.api.extractor import CSVExtractor, TextExtractor
+
+
+@pytest.fixture
+def client():
+    """API client fixture."""
+    client = GreyNoise(api_key="<api_key>", integration_name="test")
+    yield client
+
+
+class TestChunker(object):
+    """Chunker test cases."""
+
+    @pytest.mark.parametrize(
+        "text, max_bytes, expected",
+        [
+            (["a\n", "b\n", "c\n"], 100, [["a\n", "b\n", "c\n"]]),
+            (["a\n", "b\n", "c\n"], 4, [["a\n", "b\n"], ["c\n"]]),
+            (["a\n", "long line\n", "c\n"], 4, [["a\n"], ["long line\n"], ["c\n"]]),
+            ([b"a\n", b"b\n", b"c\n"], 2, [[b"a\n"], [b"b\n"], [b"c\n"]]),
+        ],
+    )
+    def test_max_bytes(self, client, text, max_bytes, expected):
+        """Chunks are closed before going over the byte budget."""
+        chunker = Chunker(TextExtractor(client), max_bytes, 100)
+        assert [chunk.lines for chunk in chunker.chunks(text)] == expected
+
+    def test_max_ip_addresses(self, client):
+        """Chunks are closed before going over the unique IP address budget."""
+        text = [
+            "1.1.1.1\n",
+            "1.1.1.1 2.2.2.2\n",
+            "no IP address\n",
+            "2.2.2.2 3.3.3.3\n",
+            "3.3.3.3\n",
+        ]
+        chunker = Chunker(TextExtractor(client), 1000, 2)
+        chunks = list(chunker.chunks(text))
+        assert [chunk.lines for chunk in chunks] == [text[:3], text[3:]]
+        assert [chunk.ip_addresses for chunk in chunks] == [
+            {"1.1.1.1", "2.2.2.2"},
+            {"2.2.2.2", "3.3.3.3"},
+        ]
+
+    def test_ip_spans(self, client):
+        """IP address spans are kept for every line in the chunk."""
+        text = ["src_ip,msg\n", "1.1.1.1,2.2.2.2\n"]
+        chunker = Chunker(CSVExtractor(client, ["src_ip"]), 1000, 10)
+        (chunk,) = chunker.chunks(text)
+        assert chunk.ip_spans == [None, [(0, 7)]]
+        assert chunk.ip_addresses == {"1.1.1.1"}
+
+    def test_without_spans(self, client):
+        """IP address spans aren't kept unless needed."""
+        chunker = Chunker(TextExtractor(client), 1000, 10, keep_spans=False)
+        (chunk,) = chunker.chunks(["1.1.1.1 2.2.2.2\n"])
+        assert chunk.ip_spans is None
+        assert chunk.ip_addresses == {"1.1.1.1", "2.2.2.2"}
+
+    def test_spans_size(self, client):
+        """IP address spans are counted in the byte budget."""
+        text = ["1.1.1.1 2.2.2.2\n"] * 4
+        max_bytes = 2 * (len(text[0]) + 2 * Chunker.SPAN_SIZE)
+        chunker = Chunker(TextExtractor(client), max_bytes, 100)
+        assert [len(chunk.lines) for chunk in chunker.chunks(text)] == [2, 2]
+        chunker = Chunker(TextExtractor(client), max_bytes, 100, keep_spans=False)
+        assert [len(chunk.lines) for chunk in chunker.chunks(text)] == [4]
+
+    def test_empty_text(self, client):
+        """No chunks are yielded for empty text."""
+        chunker = Chunker(TextExtractor(client), 1000, 10)
+        assert list(chunker.chunks([])) == []
+
+    @pytest.mark.parametrize("max_bytes, max_ip_addresses", [(0, 10), (10, 0)])
+    def test_invalid_budget(self, client, max_bytes, max_ip_addresses):
+        """Budgets must be positive."""
+        with pytest.raises(ValueError):
+            Chunker(TextExtractor(client), max_bytes, max_ip_addresses)
+
+
+class TestChunkSizeController(object):
+    """Chunk size controller test cases."""
+
+    @pytest.fixture
+    def controller(self):
+        """Chunk size controller fixture."""
+        yield ChunkSizeController(
+            min_size=10, max_size=1000, target_latency=1.0, max_payload_bytes=20000
+        )
+
+    def test_latency(self, controller):
+        """Chunk size shrinks when requests are over the target latency."""
+        assert controller.record(1000, 4.0, 10000) == 250
+        assert controller.size == 250
+        assert controller.decisions[-1].reason == "latency"
+
+    def test_grow(self, controller):
+        """Chunk size grows back when requests are fast."""
+        controller.size = 100
+        assert controller.record(100, 0.1, 1000) == 150
+        assert controller.decisions[-1].reason == "grow"
+
+    def test_hold(self, controller):
+        """Chunk size is kept when close to the target latency."""
+        assert controller.record(1000, 0.9, 10000) == 1000
+        assert controller.decisions[-1].reason == "hold"
+
+    def test_error(self, controller):
+        """Chunk size is halved on errors and doesn't grow until they're gone."""
+        assert controller.record(1000, 10.0, 10000, error=True) == 500
+        assert controller.decisions[-1].reason == "error"
+        assert controller.error_rate == 1.0
+        assert controller.record(500, 0.1, 5000) == 500
+        assert controller.decisions[-1].reason == "hold"
+        assert controller.error_rate == 0.5
+
+    def test_payload(self, controller):
+        """Chunk size is capped to keep payloads under the limit."""
+        assert controller.record(1000, 0.1, 40000) == 500
+        assert controller.decisions[-1].reason == "payload"
+
+    def test_bounds(self, controller):
+        """Chunk size is kept within bounds."""
+        assert controller.record(1000, 1000.0, 10000) == 10
+
+        controller = ChunkSizeController(min_size=10, max_size=1000)
+        controller.size = 900
+        assert controller.record(900, 0.0, 9000) == 1000
+
+    def test_decisions(self, controller):
+        """Decisions are recorded."""
+        controller.record(1000, 4.0, 10000)
+        (decision,) = controller.decisions
+        assert decision == (1000, 4.0, 10000, False, 1000, 250, "latency")
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"min_size": 0}, {"min_size": 10, "max_size": 5}, {"target_latency": 0}],
+    )
+    def test_invalid_bounds(self, kwargs):
+        """Bounds must be positive and ordered."""
+        with pytest.raises(ValueError):
+            ChunkSizeController(**kwargs)
+
+
+@pytest.mark.parametrize(
+    "value, multiple, expected",
+    [(1, 1000, 1000), (1000, 1000, 1000), (1001, 1000, 2000)],
+)
+def test_round_up(value, multiple, expected):
+    """Values are rounded up to a multiple."""
+    assert round_up(value, multiple) == expected
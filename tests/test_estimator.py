@@ -0,0 +1,83 @@
+"""API cost estimator test cases."""
+
+import pytest
+from mock import Mock
+
+from greynoise.api import GreyNoise
+from greynoise.api.estimator import Estimator
+
+
+@pytest.fixture
+def client():
+    """API client fixture with every request mocked."""
+    client = GreyNoise(api_key="<api_key>", integration_name="test")
+    client._request = Mock()
+    yield client
+
+
+class TestEstimator(object):
+    """Estimator test cases."""
+
+    TEXT = "".join(
+        "10.0.{}.{} connected to 10.0.0.1\n".format(index // 250, index % 250)
+        for index in range(2500)
+    )
+
+    def test_analyze(self, client):
+        """Requests for analyze are estimated without looking anything up."""
+        estimate = Estimator(client, request_latency=1.0).estimate(self.TEXT)
+        client._request.assert_not_called()
+        assert estimate["line_count"] == 2500
+        assert estimate["ip_count"] == pytest.approx(2501, rel=0.05)
+        assert estimate["requests"] == {
+            client.EP_NOISE_MULTI: 3,
+            client.EP_GNQL_STATS: estimate["ip_count"],
+        }
+        assert estimate["projected_time"] == pytest.approx(
+            estimate["scan_time"] + 3 + estimate["ip_count"]
+        )
+
+    def test_analyze_batch_stats(self, client):
+        """Many IP addresses fit in every batched stats query."""
+        estimate = Estimator(client, batch_stats=True, max_workers=4).estimate(
+            self.TEXT
+        )
+        assert 10 < estimate["requests"][client.EP_GNQL_STATS] < 20
+
+    def test_filter(self, client):
+        """Quick checks are made for every chunk when filtering."""
+        estimate = Estimator(
+            client, command="filter", chunk_ip_addresses=1000
+        ).estimate(self.TEXT.encode("utf-8"))
+        assert estimate["line_count"] == 2500
+        assert estimate["requests"] == {client.EP_NOISE_MULTI: 3}
+
+    def test_rate_limit(self, client):
+        """Projected time can't be under the rate limit."""
+        estimate = Estimator(
+            client, command="filter", request_latency=0.1, requests_per_second=0.5
+        ).estimate(self.TEXT)
+        requests = estimate["requests"][client.EP_NOISE_MULTI]
+        assert estimate["projected_time"] == pytest.approx(
+            estimate["scan_time"] + requests * 2
+        )
+
+    def test_ipv6(self, client):
+        """IPv6 addresses are counted when enabled."""
+        estimate = Estimator(client, ipv6=True).estimate("::1\n10.0.0.1\n::2\n")
+        assert estimate["ip_count"] == 3
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"command": "<command>"}, {"input_format": "<format>"}, {"max_workers": 0}],
+    )
+    def test_invalid_options(self, client, kwargs):
+        """Invalid options are rejected."""
+        with pytest.raises(ValueError):
+            Estimator(client, **kwargs)
+
+    def test_client_estimate(self, client):
+        """Estimates are available through the API client."""
+        estimate = client.estimate("10.0.0.1\n10.0.0.2\n", command="filter")
+        assert estimate["ip_count"] == 2
+        assert estimate["requests"] == {client.EP_NOISE_MULTI: 1}
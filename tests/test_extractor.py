@@ -0,0 +1,185 @@
+"""IP address extractor test cases."""
+
+import pytest
+
+from greynoise.api import GreyNoise
+from greynoise.api.extractor import EXTRACTORS, Extractor, normalize_ipv6
+
+
+@pytest.fixture
+def client():
+    """API client fixture."""
+    client = GreyNoise(api_key="<api_key>", integration_name="test")
+    yield client
+
+
+def extract_all(extractor, lines):
+    """Extract IP address values from every line."""
+    results = []
+    for line in lines:
+        matches = extractor.extract(line)
+        results.append(None if matches is None else [m.group(0) for m in matches])
+    return results
+
+
+class TestExtractor(object):
+    """Extractor base class test cases."""
+
+    def test_abstract(self, client):
+        """Extractors must implement extract."""
+        with pytest.raises(TypeError):
+            Extractor(client)
+
+
+class TestTextExtractor(object):
+    """Text extractor test cases."""
+
+    @pytest.mark.parametrize(
+        "line, expected",
+        [
+            ("8.8.8.8 and 1.1.1.1", ["8.8.8.8", "1.1.1.1"]),
+            (b"8.8.8.8 \xff", [b"8.8.8.8"]),
+            (memoryview(b"from 8.8.8.8"), [b"8.8.8.8"]),
+        ],
+    )
+    def test_extract(self, client, line, expected):
+        """IP addresses are extracted anywhere in the line."""
+        extractor = EXTRACTORS["text"](client)
+        assert [match.group(0) for match in extractor.extract(line)] == expected
+        assert extractor.findall(line) == expected
+
+    @pytest.mark.parametrize(
+        "line, expected",
+        [
+            ("8.8.8.8 and 2001:db8::1", ["8.8.8.8", "2001:db8::1"]),
+            ("[2001:DB8:0:0:0:0:0:1]:443", ["2001:DB8:0:0:0:0:0:1"]),
+            ("from ::ffff:8.8.8.8", ["::ffff:8.8.8.8"]),
+            (b"2001:db8::1 \xff", [b"2001:db8::1"]),
+            ("at 12:30:45 from 00:1a:2b:3c:4d:5e", []),
+            ("1:2:3:4:5:6:7::8:9", []),
+            ("2001:db8::12345", []),
+        ],
+    )
+    def test_extract_ipv6(self, client, line, expected):
+        """IPv6 addresses are extracted when enabled."""
+        extractor = EXTRACTORS["text"](client, ipv6=True)
+        assert [match.group(0) for match in extractor.extract(line)] == expected
+        assert extractor.findall(line) == expected
+
+    def test_ipv6_disabled(self, client):
+        """IPv6 addresses are not extracted by default."""
+        extractor = EXTRACTORS["text"](client)
+        assert extractor.findall("2001:db8::1") == []
+
+
+@pytest.mark.parametrize(
+    "ip_address, expected",
+    [
+        ("2001:DB8:0000:0000:0000:0000:0000:0001", "2001:db8::1"),
+        ("2001:db8::1", "2001:db8::1"),
+        ("::ffff:8.8.8.8", "8.8.8.8"),
+        ("1:2:3:4:5:6:7::8:9", None),
+    ],
+)
+def test_normalize_ipv6(ip_address, expected):
+    """IPv6 addresses are normalized to their canonical form."""
+    assert normalize_ipv6(ip_address) == expected
+
+
+class TestJSONExtractor(object):
+    """JSON lines extractor test cases."""
+
+    @pytest.mark.parametrize(
+        "input_format, fields, line, expected",
+        [
+            (
+                "eve",
+                None,
+                '{"src_ip": "8.8.8.8", "payload": "1.1.1.1", "dest_ip":"9.9.9.9"}',
+                ["8.8.8.8", "9.9.9.9"],
+            ),
+            (
+                "jsonl",
+                ["id.orig_h"],
+                b'{"id.orig_h": "8.8.8.8:53", "id.resp_h": "1.1.1.1"}',
+                [b"8.8.8.8"],
+            ),
+            ("jsonl", None, '{"src_ip": null, "message": "8.8.8.8"}', []),
+        ],
+    )
+    def test_extract(self, client, input_format, fields, line, expected):
+        """IP addresses are extracted only from the given fields."""
+        extractor = EXTRACTORS[input_format](client, fields)
+        assert extract_all(extractor, [line]) == [expected]
+
+    def test_extract_ipv6(self, client):
+        """IPv6 addresses are extracted from the given fields when enabled."""
+        extractor = EXTRACTORS["eve"](client, ipv6=True)
+        line = '{"src_ip": "2001:db8::1", "payload": "2001:db8::2"}'
+        assert extract_all(extractor, [line]) == [["2001:db8::1"]]
+
+    def test_offsets(self, client):
+        """Matches point to the IP address in the original line."""
+        extractor = EXTRACTORS["jsonl"](client)
+        (match,) = extractor.extract('{"src_ip": "8.8.8.8"}')
+        assert match.span() == (12, 19)
+
+
+class TestCSVExtractor(object):
+    """CSV extractor test cases."""
+
+    @pytest.mark.parametrize(
+        "fields, lines, expected",
+        [
+            (
+                None,
+                ["src_ip,message,dest_ip\n", '8.8.8.8,"1.1.1.1, x",9.9.9.9\n'],
+                [None, ["8.8.8.8", "9.9.9.9"]],
+            ),
+            (
+                ["message"],
+                [b'src_ip,"message"\n', b'8.8.8.8,"from 1.1.1.1"\n'],
+                [None, [b"1.1.1.1"]],
+            ),
+            (["1"], ["8.8.8.8,1.1.1.1\n", "short\n"], [["1.1.1.1"], []]),
+            (["missing"], ["src_ip\n", "8.8.8.8\n"], [None, []]),
+        ],
+    )
+    def test_extract(self, client, fields, lines, expected):
+        """IP addresses are extracted only from the given columns."""
+        extractor = EXTRACTORS["csv"](client, fields)
+        assert extract_all(extractor, lines) == expected
+
+    def test_skip(self, client):
+        """Columns are taken from the header even if it's skipped."""
+        extractor = EXTRACTORS["csv"](client)
+        extractor.skip("message,src_ip\n")
+        extractor.skip("1.1.1.1,2.2.2.2\n")
+        assert extract_all(extractor, ["3.3.3.3,8.8.8.8\n"]) == [["8.8.8.8"]]
+
+
+class TestZeekExtractor(object):
+    """Zeek extractor test cases."""
+
+    def test_extract(self, client):
+        """IP addresses are extracted using the columns in the fields header."""
+        extractor = EXTRACTORS["zeek"](client)
+        lines = [
+            b"#separator \\x09\n",
+            b"#fields\tts\tuid\tid.orig_h\tid.orig_p\tid.resp_h\n",
+            b"1\tC1\t8.8.8.8\t53\t1.1.1.1\n",
+            b"#close\t2021-01-01\n",
+        ]
+        assert extract_all(extractor, lines) == [
+            None,
+            None,
+            [b"8.8.8.8", b"1.1.1.1"],
+            None,
+        ]
+
+    def test_skip(self, client):
+        """Columns are taken from the fields header even if it's skipped."""
+        extractor = EXTRACTORS["zeek"](client)
+        extractor.skip(b"#fields\tts\tid.orig_h\n")
+        extractor.skip(b"1\t1.1.1.1\n")
+        assert extract_all(extractor, [b"2\t8.8.8.8\n"]) == [[b"8.8.8.8"]]
@@ -0,0 +1,60 @@
+"""Compact IP address set test cases."""
+
+import pytest
+
+from greynoise.api.ipset import IntegerHashSet, IPAddressSet
+
+
+class TestIntegerHashSet(object):
+    """Integer hash set test cases."""
+
+    @pytest.mark.parametrize(
+        "typecode, width, values",
+        [
+            ("I", 1, [0, 1, 2 ** 32 - 1] + list(range(100, 5000, 7))),
+            ("Q", 2, [0, 1, 2 ** 128 - 1, 2 ** 64] + list(range(100, 5000, 7))),
+        ],
+    )
+    def test_values(self, typecode, width, values):
+        """Values are added once and kept when the table grows."""
+        integer_set = IntegerHashSet(typecode, width, capacity=2)
+        assert all(integer_set.add(value) for value in values)
+        assert not any(integer_set.add(value) for value in values)
+        assert len(integer_set) == len(values)
+        assert sorted(integer_set) == sorted(values)
+        assert all(value in integer_set for value in values)
+        assert 3 not in integer_set
+
+    def test_compact(self):
+        """Values are kept in a single array of machine words."""
+        integer_set = IntegerHashSet("I")
+        for value in range(1, 1001):
+            integer_set.add(value)
+        assert integer_set._slots.itemsize == 4
+        assert len(integer_set._slots) == 2048
+
+
+class TestIPAddressSet(object):
+    """IP address set test cases."""
+
+    IP_ADDRESSES = ["8.8.8.8", "0.0.0.0", "2001:db8::1", "::", "not-an-ip"]
+
+    def test_ip_addresses(self):
+        """IP addresses are packed and converted back to strings."""
+        ip_address_set = IPAddressSet(self.IP_ADDRESSES)
+        assert len(ip_address_set) == 5
+        assert sorted(ip_address_set) == sorted(self.IP_ADDRESSES)
+        assert "8.8.8.8" in ip_address_set
+        assert "8.8.4.4" not in ip_address_set
+        assert len(ip_address_set.ipv4) == 2
+        assert len(ip_address_set.ipv6) == 2
+        assert ip_address_set.other == {"not-an-ip"}
+
+    def test_add_new(self):
+        """Only IP addresses not in the set are returned."""
+        ip_address_set = IPAddressSet(["8.8.8.8", "2001:db8::1"])
+        new_ip_addresses = ip_address_set.add_new(
+            ["8.8.8.8", "1.1.1.1", "2001:db8::1", "2001:db8::2", "1.1.1.1"]
+        )
+        assert new_ip_addresses == {"1.1.1.1", "2001:db8::2"}
+        assert len(ip_address_set) == 4
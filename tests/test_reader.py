@@ -0,0 +1,172 @@
+"""Reader test cases."""
+
+import bz2
+import gzip
+import io
+import lzma
+import threading
+
+import pytest
+from six import StringIO
+
+from greynoise.api.reader import DecompressedLines, MappedLines, TimedLines
+
+
+class SlowInput(io.RawIOBase):
+    """Binary input that returns only 2 bytes on every read, like a slow pipe."""
+
+    def __init__(self, data):
+        super(SlowInput, self).__init__()
+        self.data = data
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), len(self.data), 2)
+        buffer[:size] = self.data[:size]
+        self.data = self.data[size:]
+        return size
+
+
+class TestMappedLines(object):
+    """Memory mapped lines test cases."""
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            (b"line 1\nline 2\n", [b"line 1\n", b"line 2\n"]),
+            (b"line 1\n\nline 3", [b"line 1\n", b"\n", b"line 3"]),
+        ],
+    )
+    def test_lines(self, tmp_path, text, expected):
+        """Lines are yielded as slices of the mapped file."""
+        input_path = tmp_path / "input.txt"
+        input_path.write_bytes(text)
+        with open(str(input_path)) as input_file:
+            with MappedLines.from_file(input_file) as mapped_lines:
+                lines = list(mapped_lines)
+                assert all(isinstance(line, memoryview) for line in lines)
+                assert [line.tobytes() for line in lines] == expected
+                del lines
+
+    def test_empty_file(self, tmp_path):
+        """Empty files are not mapped."""
+        input_path = tmp_path / "input.txt"
+        input_path.write_bytes(b"")
+        with open(str(input_path)) as input_file:
+            assert MappedLines.from_file(input_file) is None
+
+    def test_not_a_file(self):
+        """File-like objects without a file descriptor are not mapped."""
+        assert MappedLines.from_file(StringIO("line 1\n")) is None
+
+
+class TestDecompressedLines(object):
+    """Decompressed lines test cases."""
+
+    @pytest.mark.parametrize(
+        "compression, compress",
+        [("gzip", gzip.compress), ("bz2", bz2.compress), ("xz", lzma.compress)],
+    )
+    def test_lines(self, tmp_path, compression, compress):
+        """Lines are decompressed across block boundaries."""
+        lines = [b"line %d\n" % index for index in range(1000)] + [b"last line"]
+        input_path = tmp_path / "input"
+        input_path.write_bytes(compress(b"".join(lines)))
+        with open(str(input_path)) as input_file:
+            with DecompressedLines.from_file(input_file) as decompressed_lines:
+                decompressed_lines.BLOCK_SIZE = 100
+                assert decompressed_lines.compression == compression
+                assert list(decompressed_lines) == lines
+
+    def test_zstd(self, tmp_path):
+        """Zstandard compressed lines are decompressed."""
+        zstandard = pytest.importorskip("zstandard")
+        input_path = tmp_path / "input"
+        input_path.write_bytes(zstandard.ZstdCompressor().compress(b"line 1\nline 2"))
+        with open(str(input_path)) as input_file:
+            with DecompressedLines.from_file(input_file) as decompressed_lines:
+                assert list(decompressed_lines) == [b"line 1\n", b"line 2"]
+
+    def test_stop_iteration(self, tmp_path):
+        """Decompression stops when lines are no longer consumed."""
+        input_path = tmp_path / "input"
+        input_path.write_bytes(gzip.compress(b"line\n" * 100000))
+        with open(str(input_path)) as input_file:
+            with DecompressedLines.from_file(input_file) as decompressed_lines:
+                decompressed_lines.BLOCK_SIZE = 10
+                decompressed_lines.QUEUE_SIZE = 1
+                lines = iter(decompressed_lines)
+                assert next(lines) == b"line\n"
+                lines.close()
+
+    def test_not_compressed(self, tmp_path):
+        """Input is not consumed when it's not compressed."""
+        input_path = tmp_path / "input"
+        input_path.write_bytes(b"line 1\n")
+        with open(str(input_path)) as input_file:
+            assert DecompressedLines.from_file(input_file) is None
+            assert input_file.read() == "line 1\n"
+
+    def test_zstd_frames(self, tmp_path):
+        """Every frame of a zstandard input is decompressed."""
+        zstandard = pytest.importorskip("zstandard")
+        compressor = zstandard.ZstdCompressor()
+        input_path = tmp_path / "input"
+        input_path.write_bytes(
+            compressor.compress(b"line 1\n") + compressor.compress(b"line 2\n")
+        )
+        with open(str(input_path)) as input_file:
+            with DecompressedLines.from_file(input_file) as decompressed_lines:
+                assert list(decompressed_lines) == [b"line 1\n", b"line 2\n"]
+
+    @pytest.mark.parametrize(
+        "data, expected_compression, expected_lines",
+        [
+            (lzma.compress(b"line 1\nline 2\n"), "xz", [b"line 1\n", b"line 2\n"]),
+            (b"\xfd7z line\n", None, [b"\xfd7z line\n"]),
+        ],
+    )
+    def test_partial_header(self, data, expected_compression, expected_lines):
+        """Headers are read until complete when only part of them is buffered."""
+        # Pipes might have only a few bytes available at once
+        input_file = io.BufferedReader(SlowInput(data))
+        with DecompressedLines.from_file(input_file) as decompressed_lines:
+            assert decompressed_lines.compression == expected_compression
+            assert list(decompressed_lines) == expected_lines
+
+
+class TestTimedLines(object):
+    """Timed lines test cases."""
+
+    def test_lines(self):
+        """Every line is yielded with the time it was read."""
+        timed_lines = list(TimedLines(["line 1\n", "line 2\n"], lambda: None))
+        assert [line for line, _ in timed_lines] == ["line 1\n", "line 2\n"]
+        assert all(isinstance(read_time, float) for _, read_time in timed_lines)
+
+    def test_timeout(self):
+        """No line is yielded when the timeout expires before a line is read."""
+        ready = threading.Event()
+
+        def read_lines():
+            yield "line 1\n"
+            ready.wait()
+            yield "line 2\n"
+
+        lines = iter(TimedLines(read_lines(), lambda: 0.01))
+        assert next(lines)[0] == "line 1\n"
+        assert next(lines)[0] is None
+        ready.set()
+        assert [line for line, _ in lines if line is not None] == ["line 2\n"]
+
+    def test_error(self):
+        """Errors reading lines are raised when iterating."""
+
+        def read_lines():
+            yield "line 1\n"
+            raise IOError("<error>")
+
+        with pytest.raises(IOError):
+            list(TimedLines(read_lines(), lambda: None))
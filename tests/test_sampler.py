@@ -0,0 +1,110 @@
+"""IP address sampling test cases."""
+
+import pytest
+
+from greynoise.api.sampler import Sampler
+from greynoise.api.table import QuickResultTable
+
+
+@pytest.fixture
+def ip_addresses():
+    """IP addresses in a few /16 networks of different sizes."""
+    yield ["10.0.{}.{}".format(index // 256, index % 256) for index in range(5000)] + [
+        "10.{}.0.1".format(network) for network in range(1, 11)
+    ]
+
+
+class TestSampler(object):
+    """Sampler test cases."""
+
+    def test_sample(self, ip_addresses):
+        """Selection depends only on every IP address."""
+        sampler = Sampler(0.1)
+        sampled_ip_addresses = sampler.sample(ip_addresses)
+        assert 400 < len(sampled_ip_addresses) < 600
+        assert sampler.population_size == len(ip_addresses)
+        assert sampler.sample_size == len(sampled_ip_addresses)
+        assert sampler.scale == pytest.approx(
+            float(len(ip_addresses)) / len(sampled_ip_addresses)
+        )
+
+        chunked_sampler = Sampler(0.1)
+        chunked_sampled_ip_addresses = chunked_sampler.sample(
+            ip_addresses[::2]
+        ) | chunked_sampler.sample(reversed(ip_addresses[1::2]))
+        assert chunked_sampled_ip_addresses == sampled_ip_addresses
+
+    def test_stratify(self, ip_addresses):
+        """Every /16 network is represented when stratified."""
+        sampler = Sampler(0.01, stratify=True)
+        sampled_ip_addresses = sampler.sample(ip_addresses)
+        for network in range(1, 11):
+            assert "10.{}.0.1".format(network) in sampled_ip_addresses
+        assert len(sampler.population) == 11
+        assert sampler.population["10.0.0.0/16"] == 5000
+
+    def test_summary(self, ip_addresses):
+        """Ratios are estimated with confidence intervals."""
+        sampler = Sampler(0.2, stratify=True)
+        sampled_ip_addresses = sampler.sample(ip_addresses)
+        # Small networks are all noise and half of the large one is
+        sampler.add_results(
+            QuickResultTable.from_results(
+                {
+                    "ip": ip_address,
+                    "noise": not ip_address.startswith("10.0.")
+                    or int(ip_address.split(".")[2]) < 10,
+                    "riot": False,
+                }
+                for ip_address in sampled_ip_addresses
+            )
+        )
+        summary = sampler.summary()
+        expected_ratio = (2560 + 10) / 5010.0
+        lower_bound, upper_bound = summary["noise_ip_ratio_interval"]
+        assert lower_bound <= expected_ratio <= upper_bound
+        assert upper_bound - lower_bound < 0.1
+        assert summary["ip_count"] == 5010
+        assert summary["noise_ip_count"] == int(round(summary["noise_ip_ratio"] * 5010))
+        assert summary["riot_ip_ratio"] == 0
+        assert summary["sampled_ip_count"] == len(sampled_ip_addresses)
+
+    def test_empty(self):
+        """Nothing is estimated without IP addresses."""
+        summary = Sampler(0.5).summary()
+        assert summary["ip_count"] == 0
+        assert summary["noise_ip_ratio_interval"] == [0, 1]
+
+    def test_single_ip_address_strata(self):
+        """Intervals don't collapse when networks have one IP address sampled."""
+        sampler = Sampler(0.001, stratify=True)
+        sampled_ip_addresses = sampler.sample(
+            "10.{}.0.{}".format(network, host)
+            for network in range(100)
+            for host in range(1, 51)
+        )
+        # Half of the networks are noise
+        sampler.add_results(
+            QuickResultTable.from_results(
+                {"ip": ip_address, "noise": int(ip_address.split(".")[1]) < 50}
+                for ip_address in sampled_ip_addresses
+            )
+        )
+        lower_bound, upper_bound = sampler.summary()["noise_ip_ratio_interval"]
+        assert lower_bound < 0.5 < upper_bound
+
+    def test_stratum_scale(self, ip_addresses):
+        """Counts are scaled by the sampling ratio of every stratum."""
+        sampler = Sampler(0.01, stratify=True)
+        sampler.sample(ip_addresses)
+        assert sampler.stratum_scale("10.1.0.0/16") == 1
+        assert sampler.stratum_scale("10.0.0.0/16") == pytest.approx(
+            5000.0 / sampler.sample_sizes["10.0.0.0/16"]
+        )
+        assert sampler.stratum_scale("10.99.0.0/16") == 1
+
+    @pytest.mark.parametrize("rate", [0, -0.1, 1.1])
+    def test_invalid_rate(self, rate):
+        """Sample rate must be a fraction."""
+        with pytest.raises(ValueError):
+            Sampler(rate)
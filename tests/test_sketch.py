@@ -0,0 +1,112 @@
+"""Approximate counting test cases."""
+
+import collections
+import random
+
+import pytest
+
+from greynoise.api.sketch import CountMinSketch, HyperLogLog, SectionSketch, SpaceSaving
+
+
+@pytest.fixture
+def counts():
+    """Zipf-like counts for many keys."""
+    rng = random.Random(0)
+    counts = collections.Counter()
+    for key in range(5000):
+        counts["key_{}".format(key)] = max(int(10000 / (key + 1)), 1)
+    keys = list(counts.elements())
+    rng.shuffle(keys)
+    yield counts, keys
+
+
+class TestCountMinSketch(object):
+    """Count-min sketch test cases."""
+
+    def test_estimate(self, counts):
+        """Estimates are within the error bound."""
+        counts, keys = counts
+        sketch = CountMinSketch(width=1000, depth=5)
+        for key in keys:
+            sketch.add(key)
+        assert sketch.total == len(keys)
+
+        max_error = sketch.epsilon * sketch.total
+        errors = [sketch.estimate(key) - count for key, count in counts.items()]
+        assert min(errors) >= 0
+        assert sum(error > max_error for error in errors) <= sketch.delta * len(errors)
+
+    @pytest.mark.parametrize("width, depth", [(0, 1), (1, 0)])
+    def test_invalid(self, width, depth):
+        """Width and depth must be positive."""
+        with pytest.raises(ValueError):
+            CountMinSketch(width, depth)
+
+
+class TestSpaceSaving(object):
+    """Space-saving summary test cases."""
+
+    def test_heavy_hitters(self, counts):
+        """Frequent keys are tracked with bounded errors."""
+        counts, keys = counts
+        summary = SpaceSaving(capacity=100)
+        for key in keys:
+            summary.add(key)
+        assert len(summary.counts) == 100
+
+        items = {key: (count, error) for key, count, error in summary.items()}
+        for key, count in counts.items():
+            if count > summary.total / summary.capacity:
+                assert key in items
+        for key, (count, error) in items.items():
+            assert count - error <= counts[key] <= count
+            assert error <= summary.total / summary.capacity
+
+    def test_weighted(self):
+        """Keys can be added with any count."""
+        summary = SpaceSaving(capacity=2)
+        summary.add("a", 5)
+        summary.add("b", 1)
+        summary.add("c", 2)
+        assert sorted(summary.items()) == [("a", 5, 0), ("c", 3, 1)]
+
+
+class TestSectionSketch(object):
+    """Section sketch test cases."""
+
+    def test_items(self, counts):
+        """True counts are between count - max_error and count."""
+        counts, keys = counts
+        sketch = SectionSketch(capacity=100, width=1000)
+        for key in keys:
+            sketch.add(key)
+        for key, count, max_error in sketch.items():
+            assert count - max_error <= counts[key] <= count
+
+
+class TestHyperLogLog(object):
+    """HyperLogLog sketch test cases."""
+
+    @pytest.mark.parametrize("distinct_count", [0, 10, 1000, 100000])
+    def test_count(self, distinct_count):
+        """Distinct values are counted within a few standard errors."""
+        sketch = HyperLogLog()
+        for _ in range(2):
+            sketch.update(
+                "10.{}.{}".format(value >> 8, value & 255)
+                for value in range(distinct_count)
+            )
+        assert abs(sketch.count() - distinct_count) <= 3 * sketch.error * max(
+            distinct_count, 1
+        )
+
+    def test_error(self):
+        """Error depends on the precision."""
+        assert HyperLogLog(precision=4).error == pytest.approx(0.26)
+        assert HyperLogLog().error < 0.01
+
+    @pytest.mark.parametrize("precision", [3, 19])
+    def test_invalid_precision(self, precision):
+        """Precision must be within bounds."""
+        with pytest.raises(ValueError):
+            HyperLogLog(precision)
@@ -0,0 +1,100 @@
+"""Quick check result table test cases."""
+
+import pytest
+
+from greynoise.api import GreyNoise
+from greynoise.api.table import QuickResultTable
+
+RESULTS = [
+    {"ip": "8.8.8.8", "noise": True, "riot": False, "code": "0x01"},
+    {"ip": "1.1.1.1", "noise": False, "riot": True, "code": "0x00"},
+    {"ip": "2001:db8::1", "noise": True, "riot": True, "code": "0x01"},
+    {"ip": "255.255.255.254", "noise": False, "riot": False, "code": "0x99"},
+]
+
+
+@pytest.fixture
+def table():
+    """Quick check result table fixture."""
+    yield QuickResultTable.from_results(
+        RESULTS, GreyNoise.CODE_MESSAGES, GreyNoise.UNKNOWN_CODE_MESSAGE
+    )
+
+
+class TestQuickResultTable(object):
+    """Quick check result table test cases."""
+
+    def test_rows(self, table):
+        """Rows are converted to dictionaries on demand."""
+        assert len(table) == 4
+        assert [
+            {key: row[key] for key in ("ip", "noise", "riot", "code")} for row in table
+        ] == RESULTS
+        assert table[0]["code_message"] == GreyNoise.CODE_MESSAGES["0x01"]
+        assert table[-1]["code_message"] == "Code message unknown: 0x99"
+        with pytest.raises(IndexError):
+            table[4]
+
+    def test_compact_columns(self, table):
+        """IPv4 addresses are packed and codes are interned."""
+        assert table.ip_addresses.itemsize == 4
+        assert list(table.ip_addresses) == [0x08080808, 0x01010101, 0, 0xFFFFFFFE]
+        assert table.other_ip_addresses == {2: "2001:db8::1"}
+        assert table.codes == ["0x01", "0x00", "0x99"]
+        assert table[0]["code_message"] is table[2]["code_message"]
+
+    @pytest.mark.parametrize(
+        "kwargs, expected",
+        [
+            ({}, 4),
+            ({"noise": True}, 2),
+            ({"noise": False}, 2),
+            ({"riot": True}, 2),
+            ({"noise": True, "riot": True}, 1),
+            ({"code": "0x01"}, 2),
+            ({"code": ["0x00", "0x99"]}, 2),
+            ({"code": "0x02"}, 0),
+            ({"noise": False, "code": "0x99"}, 1),
+        ],
+    )
+    def test_count(self, table, kwargs, expected):
+        """Rows that match all values are counted."""
+        assert table.count(**kwargs) == expected
+
+    def test_filter(self, table):
+        """Rows that match all values are kept."""
+        filtered = table.filter(noise=True)
+        assert [row["ip"] for row in filtered] == ["8.8.8.8", "2001:db8::1"]
+        assert filtered.other_ip_addresses == {1: "2001:db8::1"}
+
+        filtered = filtered.filter(riot=False)
+        assert [row["ip"] for row in filtered] == ["8.8.8.8"]
+
+    def test_code_counts(self, table):
+        """Rows are counted for every code."""
+        assert table.code_counts() == {"0x01": 2, "0x00": 1, "0x99": 1}
+
+    def test_empty(self):
+        """Empty tables can be counted and filtered."""
+        table = QuickResultTable()
+        assert table.count(noise=True) == 0
+        assert list(table.filter(code="0x00")) == []
+
+
+class TestQuickAsTable(object):
+    """GreyNoise client IP quick check as table test cases."""
+
+    def test_quick(self):
+        """Quick check results are returned as a table."""
+        client = GreyNoise(api_key="<api_key>", use_cache=False)
+        client._request = lambda endpoint, json: [
+            {"ip": ip_address, "noise": True, "riot": False, "code": "0x01"}
+            for ip_address in json["ips"]
+        ]
+        table = client.quick(
+            ["8.8.8.8", "1.2.3", "not-an-ip"], include_invalid=True, as_table=True
+        )
+        assert isinstance(table, QuickResultTable)
+        assert table.count(noise=True) == 1
+        assert table.code_counts() == {"0x01": 1, "404": 2}
+        assert [row["ip"] for row in table] == ["8.8.8.8", "1.2.3", "not-an-ip"]
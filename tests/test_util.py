@@ -6,7 +6,14 @@ import pytest
 from mock import patch
 from six import StringIO
 
-from greynoise.util import CONFIG_FILE, load_config, save_config, validate_ip
+from greynoise.util import (
+    CONFIG_FILE,
+    is_routable_ip,
+    load_config,
+    normalize_query,
+    save_config,
+    validate_ip,
+)
 
 
 class TestLoadConfig(object):
@@ -317,3 +324,49 @@ class TestValidateIP(object):
         with pytest.raises(ValueError) as exception:
             validate_ip(ip)
         assert str(exception.value) == "Non-Routable IP address: {!r}".format(ip)
+
+
+class TestIsRoutableIP(object):
+    """Cheap IP validation test cases."""
+
+    @pytest.mark.parametrize(
+        "ip", ("123.123.123.123", "8.8.8.8", "1.0.0.1", "2001:4860:4860::8888")
+    )
+    def test_routable(self, ip):
+        """Valid and routable IP addresses."""
+        assert is_routable_ip(ip)
+
+    @pytest.mark.parametrize(
+        "ip",
+        (
+            "0.0.0.-1",
+            "255.255.255.256",
+            "01.2.3.4",
+            "not an ip address",
+            "0.0.0.0",
+            "10.0.0.1",
+            "192.168.1.0",
+            "255.255.255.255",
+            "::1",
+        ),
+    )
+    def test_not_routable(self, ip):
+        """Invalid or non-routable IP addresses."""
+        assert not is_routable_ip(ip)
+
+
+class TestNormalizeQuery(object):
+    """GNQL query normalization test cases."""
+
+    @pytest.mark.parametrize(
+        "query, expected",
+        (
+            ("ip:8.8.8.8", "ip:8.8.8.8"),
+            ("  ip:8.8.8.8 \n", "ip:8.8.8.8"),
+            ("ip:1.1.1.1   OR\tip:8.8.8.8", "ip:1.1.1.1 OR ip:8.8.8.8"),
+            ('tags:"Web  Scanner"  OR  tags:SSH', 'tags:"Web  Scanner" OR tags:SSH'),
+        ),
+    )
+    def test_normalize_query(self, query, expected):
+        """Whitespace between terms is collapsed."""
+        assert normalize_query(query) == expected